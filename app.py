@@ -1,10 +1,14 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
-import pandas as pd
 import os
-import uvicorn
+import asyncio
+import threading
+from proven_connections.workers import run_blocking
+from proven_connections.metrics import MetricsMiddleware, registry, time_stage
+from proven_connections.profiling import ProfilingMiddleware, admin_router
+from proven_connections.querylog import QueryLogMiddleware
 
 # Load environment variables
 load_dotenv()
@@ -21,18 +25,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Capture stack profiles of requests selected by admin header or sampling
+app.add_middleware(ProfilingMiddleware)
+
+# Capture anonymized query traces when QUERY_LOG_PATH is set
+app.add_middleware(QueryLogMiddleware, routes=app.router.routes)
+
+# Record per-route request metrics
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
+# Admin endpoints for retrieving captured profiles
+app.include_router(admin_router)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Load data
+# Data is loaded once per process by load_data() at startup, not at import,
+# so the reloader parent and liveness checks don't wait on the parse.
+# The CSV is served when no dataset version has been published yet.
 csv_path = "data/vendor_client_relationships_11Mar2025.csv"
-print(f"Loading relationship data from: {csv_path}")
-vendor_client_df = pd.read_csv(csv_path)
+vendor_client_df = None
+data_error = None
+_data_lock = threading.Lock()
+
+def load_data():
+    """Read the current published dataset, or the relationships CSV, unless already loaded.
+
+    pandas is imported on first use.
+    """
+    global vendor_client_df, data_error
+    with _data_lock:
+        if vendor_client_df is None:
+            import pandas as pd
+            from proven_connections.publish import dataset_path
+            path = dataset_path() or csv_path
+            print(f"Loading relationship data from: {path}")
+            try:
+                vendor_client_df = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+            except Exception as e:
+                data_error = str(e)
+                print(f"Failed to load relationship data: {data_error}")
+                raise
+            data_error = None
+    return vendor_client_df
+
+@app.on_event("startup")
+async def start_data_load():
+    """Load the data in the background so liveness checks answer while parsing."""
+    threading.Thread(target=load_data, name="data-loader", daemon=True).start()
+
+def require_data():
+    """Raise 503 while the relationship data is still loading."""
+    if vendor_client_df is None:
+        raise HTTPException(status_code=503, detail="Relationship data is loading")
 
 @app.get("/")
 async def read_root():
     return FileResponse("static/index.html")
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness check: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness check: the relationship data is loaded."""
+    if vendor_client_df is None:
+        detail = {"status": "loading" if data_error is None else "failed", "error": data_error}
+        return JSONResponse(status_code=503, content=detail)
+    return {"status": "ready", "relationships": len(vendor_client_df)}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose request and internal stage metrics in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/config/map")
 async def get_map_config():
     token = os.environ.get("MAPBOX_ACCESS_TOKEN")
@@ -46,108 +114,166 @@ async def get_map_config():
         "zoom": 3
     }
 
-if __name__ == "__main__":
-    uvicorn.run("app:app", host="0.0.0.0", port=8004, reload=True)
-
 @app.get("/api/search/companies")
 async def search_companies(q: str = ""):
     if not q:
         return {"results": []}
+    require_data()
     
     try:
         # Search in both name and domain, removing spaces and special characters
         search_term = q.lower().replace(' ', '').replace('-', '').replace('_', '').replace('.', '')
-        
-        # Search for vendors
-        vendor_name_mask = vendor_client_df["vendor_name"].str.lower().str.replace(' ', '').str.replace('-', '').str.replace('_', '').str.contains(search_term, na=False)
-        vendor_domains = vendor_client_df["vendor_domain"].str.lower()
-        vendor_domains = vendor_domains.str.replace(r'\.com|\.org|\.net|\.co\.\w+|\.\w+$', '', regex=True)
-        vendor_domains = vendor_domains.str.replace('.', '').str.replace('-', '').str.replace('_', '')
-        vendor_domain_mask = vendor_domains.str.contains(search_term, na=False)
-        vendor_mask = vendor_name_mask | vendor_domain_mask
-        vendor_details = vendor_client_df[vendor_mask].drop_duplicates("vendor_name")
-        
-        # Search for clients
-        client_name_mask = vendor_client_df["client_name"].str.lower().str.replace(' ', '').str.replace('-', '').str.replace('_', '').str.contains(search_term, na=False)
-        client_domains = vendor_client_df["client_domain"].str.lower()
-        client_domains = client_domains.str.replace(r'\.com|\.org|\.net|\.co\.\w+|\.\w+$', '', regex=True)
-        client_domains = client_domains.str.replace('.', '').str.replace('-', '').str.replace('_', '')
-        client_domain_mask = client_domains.str.contains(search_term, na=False)
-        client_mask = client_name_mask | client_domain_mask
-        client_details = vendor_client_df[client_mask].drop_duplicates("client_name")
-        
-        # Convert vendors to list of dicts
-        vendor_results = [
-            {
-                "name": row["vendor_name"],
-                "domain": row["vendor_domain"],
-                "logo": row["vendor_logo"],
-                "latitude": float(row["vendor_lat"]) if pd.notna(row["vendor_lat"]) else None,
-                "longitude": float(row["vendor_lng"]) if pd.notna(row["vendor_lng"]) else None,
-                "type": "service_provider"
-            }
-            for _, row in vendor_details.iterrows()
-        ]
-        
-        # Convert clients to list of dicts
-        client_results = [
-            {
-                "name": row["client_name"],
-                "domain": row["client_domain"],
-                "logo": row["client_logo"],
-                "latitude": float(row["client_lat"]) if pd.notna(row["client_lat"]) else None,
-                "longitude": float(row["client_lng"]) if pd.notna(row["client_lng"]) else None,
-                "type": "client"
-            }
-            for _, row in client_details.iterrows()
-        ]
-        
-        # Combine and sort results
-        all_results = vendor_results + client_results
-        all_results.sort(key=lambda x: len(x["name"]))  # Sort by name length to prioritize shorter matches
-        
-        return {"results": all_results}
+        return {"results": await run_blocking(_timed, "search_lookup", _search_companies, search_term)}
+    except asyncio.TimeoutError:
+        print(f"Search timed out for query: {q}")
+        raise HTTPException(status_code=504, detail="Search timed out")
     except Exception as e:
         print(f"Error in search_companies: {str(e)}")
         return {"results": []}
 
+def _timed(stage: str, func, *args):
+    """Call ``func`` and record its duration as an internal request stage."""
+    with time_stage(stage):
+        return func(*args)
+
+def _search_companies(search_term: str):
+    """Scan the relationships for vendors and clients matching a normalized term."""
+    import pandas as pd
+    # Search for vendors
+    vendor_name_mask = vendor_client_df["vendor_name"].str.lower().str.replace(' ', '').str.replace('-', '').str.replace('_', '').str.contains(search_term, na=False)
+    vendor_domains = vendor_client_df["vendor_domain"].str.lower()
+    vendor_domains = vendor_domains.str.replace(r'\.com|\.org|\.net|\.co\.\w+|\.\w+$', '', regex=True)
+    vendor_domains = vendor_domains.str.replace('.', '').str.replace('-', '').str.replace('_', '')
+    vendor_domain_mask = vendor_domains.str.contains(search_term, na=False)
+    vendor_mask = vendor_name_mask | vendor_domain_mask
+    vendor_details = vendor_client_df[vendor_mask].drop_duplicates("vendor_name")
+    
+    # Search for clients
+    client_name_mask = vendor_client_df["client_name"].str.lower().str.replace(' ', '').str.replace('-', '').str.replace('_', '').str.contains(search_term, na=False)
+    client_domains = vendor_client_df["client_domain"].str.lower()
+    client_domains = client_domains.str.replace(r'\.com|\.org|\.net|\.co\.\w+|\.\w+$', '', regex=True)
+    client_domains = client_domains.str.replace('.', '').str.replace('-', '').str.replace('_', '')
+    client_domain_mask = client_domains.str.contains(search_term, na=False)
+    client_mask = client_name_mask | client_domain_mask
+    client_details = vendor_client_df[client_mask].drop_duplicates("client_name")
+    
+    # Convert vendors to list of dicts
+    vendor_results = [
+        {
+            "name": row["vendor_name"],
+            "domain": row["vendor_domain"],
+            "logo": row["vendor_logo"],
+            "latitude": float(row["vendor_lat"]) if pd.notna(row["vendor_lat"]) else None,
+            "longitude": float(row["vendor_lng"]) if pd.notna(row["vendor_lng"]) else None,
+            "type": "service_provider"
+        }
+        for _, row in vendor_details.iterrows()
+    ]
+    
+    # Convert clients to list of dicts
+    client_results = [
+        {
+            "name": row["client_name"],
+            "domain": row["client_domain"],
+            "logo": row["client_logo"],
+            "latitude": float(row["client_lat"]) if pd.notna(row["client_lat"]) else None,
+            "longitude": float(row["client_lng"]) if pd.notna(row["client_lng"]) else None,
+            "type": "client"
+        }
+        for _, row in client_details.iterrows()
+    ]
+    
+    # Combine and sort results
+    all_results = vendor_results + client_results
+    all_results.sort(key=lambda x: len(x["name"]))  # Sort by name length to prioritize shorter matches
+    
+    return all_results
+
+def _vendor_relationships(vendor_name: str):
+    """Collect a vendor and its clients, or None when the vendor is unknown."""
+    import pandas as pd
+    # Get all clients for this vendor
+    relationships = vendor_client_df[
+        vendor_client_df["vendor_name"] == vendor_name
+    ]
+    
+    if relationships.empty:
+        return None
+    
+    # Get first relationship for vendor details
+    vendor_row = relationships.iloc[0]
+    
+    # Create vendor object
+    vendor = {
+        "name": vendor_name,
+        "domain": vendor_row["vendor_domain"],
+        "logo": vendor_row["vendor_logo"],
+        "latitude": float(vendor_row["vendor_lat"]) if pd.notna(vendor_row["vendor_lat"]) else None,
+        "longitude": float(vendor_row["vendor_lng"]) if pd.notna(vendor_row["vendor_lng"]) else None,
+        "type": "service_provider"
+    }
+    
+    # Get all related clients
+    clients = [
+        {
+            "name": row["client_name"],
+            "domain": row["client_domain"],
+            "logo": row["client_logo"],
+            "latitude": float(row["client_lat"]) if pd.notna(row["client_lat"]) else None,
+            "longitude": float(row["client_lng"]) if pd.notna(row["client_lng"]) else None,
+            "type": "client"
+        }
+        for _, row in relationships.iterrows()
+    ]
+    return vendor, clients
+
+def _client_relationships(client_name: str):
+    """Collect a client and its vendors, or None when the client is unknown."""
+    import pandas as pd
+    # Get all vendors for this client
+    relationships = vendor_client_df[
+        vendor_client_df["client_name"] == client_name
+    ]
+    
+    if relationships.empty:
+        return None
+    
+    # Get first relationship for client details
+    client_row = relationships.iloc[0]
+    
+    # Create client object
+    client = {
+        "name": client_name,
+        "domain": client_row["client_domain"],
+        "logo": client_row["client_logo"],
+        "latitude": float(client_row["client_lat"]) if pd.notna(client_row["client_lat"]) else None,
+        "longitude": float(client_row["client_lng"]) if pd.notna(client_row["client_lng"]) else None,
+        "type": "client"
+    }
+    
+    # Get all related vendors
+    vendors = [
+        {
+            "name": row["vendor_name"],
+            "domain": row["vendor_domain"],
+            "logo": row["vendor_logo"],
+            "latitude": float(row["vendor_lat"]) if pd.notna(row["vendor_lat"]) else None,
+            "longitude": float(row["vendor_lng"]) if pd.notna(row["vendor_lng"]) else None,
+            "type": "service_provider"
+        }
+        for _, row in relationships.iterrows()
+    ]
+    return client, vendors
+
 @app.get("/api/vendor/{vendor_name}/clients")
 async def get_vendor_clients(vendor_name: str, include_stats: bool = False):
     """Get all clients for a specific vendor with optional statistics."""
+    require_data()
     try:
-        # Get all clients for this vendor
-        relationships = vendor_client_df[
-            vendor_client_df["vendor_name"] == vendor_name
-        ]
-        
-        if relationships.empty:
+        found = await run_blocking(_timed, "relationship_lookup", _vendor_relationships, vendor_name)
+        if found is None:
             raise HTTPException(status_code=404, detail="Vendor not found")
-        
-        # Get first relationship for vendor details
-        vendor_row = relationships.iloc[0]
-        
-        # Create vendor object
-        vendor = {
-            "name": vendor_name,
-            "domain": vendor_row["vendor_domain"],
-            "logo": vendor_row["vendor_logo"],
-            "latitude": float(vendor_row["vendor_lat"]) if pd.notna(vendor_row["vendor_lat"]) else None,
-            "longitude": float(vendor_row["vendor_lng"]) if pd.notna(vendor_row["vendor_lng"]) else None,
-            "type": "service_provider"
-        }
-        
-        # Get all related clients
-        clients = [
-            {
-                "name": row["client_name"],
-                "domain": row["client_domain"],
-                "logo": row["client_logo"],
-                "latitude": float(row["client_lat"]) if pd.notna(row["client_lat"]) else None,
-                "longitude": float(row["client_lng"]) if pd.notna(row["client_lng"]) else None,
-                "type": "client"
-            }
-            for _, row in relationships.iterrows()
-        ]
+        vendor, clients = found
         
         response = {
             "center": vendor,
@@ -162,6 +288,11 @@ async def get_vendor_clients(vendor_name: str, include_stats: bool = False):
             }
         
         return response
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        print(f"Lookup timed out for vendor: {vendor_name}")
+        raise HTTPException(status_code=504, detail="Lookup timed out")
     except Exception as e:
         print(f"Error in get_vendor_relationships: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -169,40 +300,12 @@ async def get_vendor_clients(vendor_name: str, include_stats: bool = False):
 @app.get("/api/client/{client_name}/vendors")
 async def get_client_vendors(client_name: str, include_stats: bool = False):
     """Get all vendors for a specific client with optional statistics."""
+    require_data()
     try:
-        # Get all vendors for this client
-        relationships = vendor_client_df[
-            vendor_client_df["client_name"] == client_name
-        ]
-        
-        if relationships.empty:
+        found = await run_blocking(_timed, "relationship_lookup", _client_relationships, client_name)
+        if found is None:
             raise HTTPException(status_code=404, detail="Client not found")
-        
-        # Get first relationship for client details
-        client_row = relationships.iloc[0]
-        
-        # Create client object
-        client = {
-            "name": client_name,
-            "domain": client_row["client_domain"],
-            "logo": client_row["client_logo"],
-            "latitude": float(client_row["client_lat"]) if pd.notna(client_row["client_lat"]) else None,
-            "longitude": float(client_row["client_lng"]) if pd.notna(client_row["client_lng"]) else None,
-            "type": "client"
-        }
-        
-        # Get all related vendors
-        vendors = [
-            {
-                "name": row["vendor_name"],
-                "domain": row["vendor_domain"],
-                "logo": row["vendor_logo"],
-                "latitude": float(row["vendor_lat"]) if pd.notna(row["vendor_lat"]) else None,
-                "longitude": float(row["vendor_lng"]) if pd.notna(row["vendor_lng"]) else None,
-                "type": "service_provider"
-            }
-            for _, row in relationships.iterrows()
-        ]
+        client, vendors = found
         
         response = {
             "center": client,
@@ -217,6 +320,15 @@ async def get_client_vendors(client_name: str, include_stats: bool = False):
             }
         
         return response
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        print(f"Lookup timed out for client: {client_name}")
+        raise HTTPException(status_code=504, detail="Lookup timed out")
     except Exception as e:
         print(f"Error in get_client_relationships: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("app:app", host="0.0.0.0", port=8004, reload=True)
@@ -0,0 +1,77 @@
+"""
+Offline enrichment throughput: runs a data processor against the local
+mock Clearbit server (proven_connections.mock_clearbit) with an empty
+enrichment cache, so results depend only on the settings below.
+
+    python benchmarks/enrichment_benchmark.py --latency-ms 80 --rate-202 0.1 --rate-429 0.02
+    python benchmarks/enrichment_benchmark.py --processor sync --cassette data/clearbit.cassette.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+VENDORS_CSV = os.path.join(os.path.dirname(BENCH_DIR), 'data', 'vendors_ireland_10Mar2025.csv')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=VENDORS_CSV, help='Vendors CSV to enrich')
+    parser.add_argument('--processor', choices=['async', 'sync'], default='async')
+    parser.add_argument('--cassette', help='Replay this cassette (default: synthetic responses only)')
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--rate-202', type=float, default=0.0)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=100.0, help='CLEARBIT_RATE_LIMIT for the run')
+    parser.add_argument('--max-in-flight', type=int, default=20, help='CLEARBIT_MAX_IN_FLIGHT for the run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from proven_connections.mock_clearbit import start_mock_server
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = start_mock_server(
+            args.cassette or os.path.join(tmp, 'empty.cassette.jsonl'), synthesize=True,
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+            rate_202=args.rate_202, rate_429=args.rate_429, seed=args.seed
+        )
+        # The processors read these when they are imported
+        os.environ.update({
+            'CLEARBIT_COMPANY_URL': server.base_url,
+            'CLEARBIT_AUTOCOMPLETE_URL': server.base_url,
+            'ENRICHMENT_CACHE_PATH': os.path.join(tmp, 'cache.sqlite'),
+            'CLEARBIT_RATE_LIMIT': str(args.rate_limit),
+            'CLEARBIT_BURST': str(args.max_in_flight),
+            'CLEARBIT_MAX_IN_FLIGHT': str(args.max_in_flight),
+            'DEFERRED_BASE_DELAY': '0.2',
+        })
+        from proven_connections.run_report import start_report
+        report = start_report(quiet=True)
+        try:
+            start = time.perf_counter()
+            if args.processor == 'async':
+                from proven_connections.data_processor_async import process_vendor_data
+                relationships = asyncio.run(process_vendor_data(args.input))
+            else:
+                from proven_connections.data_processor_sync import process_vendor_data
+                relationships = process_vendor_data(args.input)
+            elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    stats = server.stats()
+    print(json.dumps({
+        'processor': args.processor,
+        'relationships': len(relationships),
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(stats['requests'] / elapsed, 1) if elapsed else 0.0,
+        'server': stats,
+        'report': report.as_dict()
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Client-list parsing benchmark: the old row-by-row parser against the
+vectorized parser shared by the processors (proven_connections.parsing).
+
+The vendors file's client column is repeated to reach each size.
+
+    python benchmarks/parse_benchmark.py --sizes 1000,100000,1000000
+"""
+import argparse
+import os
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+from proven_connections.metrics import percentiles
+from proven_connections.parsing import CLIENTS_COLUMN, explode_clients, group_by_row
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+VENDORS_CSV = os.path.join(os.path.dirname(BENCH_DIR), 'data', 'vendors_ireland_10Mar2025.csv')
+
+def parse_client_list(clients_str: str) -> List[Dict[str, str]]:
+    """The per-row parser the processors used before (reference implementation)."""
+    if not pd.notna(clients_str):
+        return []
+    clients = []
+    for entry in (entry.strip() for entry in clients_str.split(',')):
+        if not entry:
+            continue
+        if '.' in entry:
+            clients.append({'domain': entry, 'name': None})
+        else:
+            clients.append({'domain': None, 'name': entry})
+    return clients
+
+def timed(func, repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {k + '_ms': round(v, 1) for k, v in percentiles(samples, (50,)).items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='Comma-separated numbers of vendor rows')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per parser and size')
+    args = parser.parse_args()
+
+    source = pd.read_csv(VENDORS_CSV)[CLIENTS_COLUMN]
+    for size in (int(s) for s in args.sizes.split(',')):
+        column = pd.Series(source.to_numpy()[[i % len(source) for i in range(size)]])
+        entries = len(explode_clients(column))
+        row_wise = timed(lambda: [parse_client_list(value) for value in column], args.repeat)
+        vectorized = timed(lambda: group_by_row(explode_clients(column)), args.repeat)
+        explode_only = timed(lambda: explode_clients(column), args.repeat)
+        print(f"{size} rows, {entries} entries: row-wise {row_wise['p50_ms']} ms, "
+              f"vectorized {vectorized['p50_ms']} ms (explode only {explode_only['p50_ms']} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Latency and memory benchmarks for RelationshipSearch and the HTTP endpoints.
+
+Each scenario runs at several dataset sizes and reports p50/p95/p99 latency
+and peak traced memory. Results are compared against a stored baseline and
+the run exits non-zero when any scenario regresses past the threshold.
+
+    python benchmarks/run_benchmarks.py                    # compare to baseline
+    python benchmarks/run_benchmarks.py --save-baseline    # record a new baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import quote
+
+from proven_connections.metrics import percentiles
+from proven_connections.search import RelationshipSearch
+from proven_connections.synthetic_data import write_dataset
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+SOURCE_CSV = os.path.join(REPO_DIR, 'data', 'vendor_client_relationships_11Mar2025.csv')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+def build_dataset(rows: int, out_dir: str) -> str:
+    """Write a synthetic relationships dataset with ``rows`` rows (0 = the real data)."""
+    if not rows:
+        return SOURCE_CSV
+    path = os.path.join(out_dir, f'relationships_{rows}.csv')
+    write_dataset(path, rows)
+    return path
+
+async def asgi_get(app, path: str, query: str = '') -> Tuple[int, bytes]:
+    """Issue a GET request to an ASGI app in-process and return (status, body)."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': quote(path).encode(),
+        'root_path': '',
+        'query_string': query.encode(),
+        'headers': [(b'host', b'benchmark')],
+        'client': ('127.0.0.1', 0),
+        'server': ('benchmark', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    status = next(m['status'] for m in messages if m['type'] == 'http.response.start')
+    body = b''.join(m.get('body', b'') for m in messages if m['type'] == 'http.response.body')
+    return status, body
+
+def measure(func: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    """Time ``func`` over several iterations, then trace one call for peak memory."""
+    func()  # Warm up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {k + '_ms': round(v, 3) for k, v in percentiles(samples).items()}
+    result['peak_kb'] = round(peak / 1024, 1)
+    return result
+
+def _pick(names: List[str]) -> str:
+    """Pick a mid-list name that can be used as a single path segment."""
+    return next(n for n in names[len(names) // 2:] + names if '/' not in n)
+
+def scenarios(search: RelationshipSearch, app_module, loop) -> Dict[str, Callable[[], Any]]:
+    """Build the benchmark callables for one loaded dataset."""
+    vendor = _pick(search.vendors)
+    client = _pick(search.clients)
+    app_module.search = search
+
+    def http(path, query=''):
+        status, _ = loop.run_until_complete(asgi_get(app_module.app, path, query))
+        assert status == 200, f'{path} returned {status}'
+
+    return {
+        'search_short': lambda: search.search_all('ar'),
+        'search_long': lambda: search.search_all(client[:8]),
+        'vendor_clients': lambda: search.get_vendor_clients(vendor),
+        'client_vendors': lambda: search.get_client_vendors(client),
+        'vendor_details': lambda: search.get_vendor_details(vendor),
+        'client_details': lambda: search.get_client_details(client),
+        'http_search': lambda: http('/api/search/companies', f'q={quote(client[:8])}'),
+        'http_vendor_clients': lambda: http(f'/api/vendor/{vendor}/clients'),
+        'http_client_vendors': lambda: http(f'/api/client/{client}/vendors'),
+    }
+
+def run(sizes: List[int], iterations: int) -> Dict[str, Dict[str, float]]:
+    from proven_connections import app as app_module
+
+    results = {}
+    # One loop for all HTTP scenarios, as in a server process
+    loop = asyncio.new_event_loop()
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = build_dataset(size, tmp)
+            load = measure(lambda: RelationshipSearch(path), 1)
+            search = RelationshipSearch(path)
+            label = f'rows{size}' if size else 'real'
+            print(f"\n{label}: {len(search.df)} rows, {len(search.vendors)} vendors, {len(search.clients)} clients")
+            results[f'{label}/load'] = load
+            print(f"  {'load':<22} {load}")
+            for name, func in scenarios(search, app_module, loop).items():
+                results[f'{label}/{name}'] = measure(func, iterations)
+                print(f"  {name:<22} {results[f'{label}/{name}']}")
+    return results
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], metric: str, threshold: float) -> List[str]:
+    """List the scenarios whose metric grew more than ``threshold`` over the baseline."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous or not previous.get(metric):
+            continue
+        change = current[metric] / previous[metric] - 1
+        if change > threshold:
+            regressions.append(f"{key}: {metric} {previous[metric]} -> {current[metric]} (+{change:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='0,20000,200000', help='Comma-separated synthetic row counts (0 = real data)')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed iterations per scenario')
+    parser.add_argument('--metric', default='p95_ms', help='Metric compared against the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative regression (0.2 = 20%%)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline results file')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    args = parser.parse_args()
+
+    results = run([int(s) for s in args.sizes.split(',')], args.iterations)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.metric, args.threshold)
+    if regressions:
+        print("\nRegressions past threshold:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions past threshold")
+
+if __name__ == "__main__":
+    main()
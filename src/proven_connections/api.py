@@ -1,6 +1,6 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from .database import Database
 
 app = FastAPI(title="Proven Connections API")
@@ -17,21 +17,43 @@ class VendorResponse(BaseModel):
     email: str
     service_type: str
 
-@app.get("/clients/{client_id}/vendors", response_model=List[VendorResponse])
-async def get_client_vendors(client_id: int):
-    """Get all vendors associated with a specific client."""
-    vendors = db.get_client_vendors(client_id)
-    if not vendors:
+class ClientPage(BaseModel):
+    items: List[ClientResponse]
+    next_after: Optional[int] = None
+
+class VendorPage(BaseModel):
+    items: List[VendorResponse]
+    next_after: Optional[int] = None
+
+@app.get("/clients/{client_id}/vendors", response_model=VendorPage)
+async def get_client_vendors(
+    client_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[int] = None
+):
+    """Get a page of vendors associated with a specific client.
+
+    Pass the returned ``next_after`` as ``after`` to fetch the following page.
+    """
+    vendors, next_after = db.get_client_vendors(client_id, limit=limit, after=after)
+    if not vendors and after is None:
         raise HTTPException(status_code=404, detail="Client not found or has no vendors")
-    return vendors
+    return {"items": vendors, "next_after": next_after}
+
+@app.get("/vendors/{vendor_id}/clients", response_model=ClientPage)
+async def get_vendor_clients(
+    vendor_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[int] = None
+):
+    """Get a page of clients associated with a specific vendor.
 
-@app.get("/vendors/{vendor_id}/clients", response_model=List[ClientResponse])
-async def get_vendor_clients(vendor_id: int):
-    """Get all clients associated with a specific vendor."""
-    clients = db.get_vendor_clients(vendor_id)
-    if not clients:
+    Pass the returned ``next_after`` as ``after`` to fetch the following page.
+    """
+    clients, next_after = db.get_vendor_clients(vendor_id, limit=limit, after=after)
+    if not clients and after is None:
         raise HTTPException(status_code=404, detail="Vendor not found or has no clients")
-    return clients
+    return {"items": clients, "next_after": next_after}
 
 @app.post("/relationships/client-vendor")
 async def create_relationship(client_id: int, vendor_id: int):
@@ -1,14 +1,21 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from typing import Optional, List, Dict, Any
 import os
 import json
+import asyncio
 import logging
-from proven_connections.search import RelationshipSearch
+import threading
+from proven_connections.workers import run_background, run_blocking
+from proven_connections.singleflight import SingleFlight
+from proven_connections.metrics import MetricsMiddleware, registry, time_stage
+from proven_connections.profiling import ProfilingMiddleware, admin_router
+from proven_connections.querylog import QueryLogMiddleware, popular_search_terms
 from proven_connections.config import MAPBOX_ACCESS_TOKEN, DEFAULT_MAP_STYLE, DEFAULT_MAP_CENTER, DEFAULT_MAP_ZOOM
+from proven_connections.config import PREFIX_CACHE_MAX_LEN, PREFIX_WARM_TOP_N, QUERY_LOG_PATH
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,13 +34,74 @@ app.add_middleware(
 # Add Gzip compression
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
+# Capture stack profiles of requests selected by admin header or sampling
+app.add_middleware(ProfilingMiddleware)
+
+# Capture anonymized query traces when QUERY_LOG_PATH is set
+app.add_middleware(QueryLogMiddleware, routes=app.router.routes)
+
+# Record per-route request metrics (outermost, so timings include compression)
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
+# Admin endpoints for retrieving captured profiles
+app.include_router(admin_router)
+
 # Get the absolute path to the data directory
 current_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+# Served when no dataset version has been published yet
 csv_path = os.path.join(current_dir, 'data', 'vendor_client_relationships_11Mar2025.csv')
 
-# Initialize the search
-logging.info(f"Loading relationship data from: {csv_path}")
-search = RelationshipSearch(csv_path)
+# The search index is built once per process by load_index() at startup;
+# requests needing it get a 503 until it is ready
+search = None
+dataset_version: Optional[str] = None
+index_error: Optional[str] = None
+_index_lock = threading.Lock()
+
+def load_index(path: Optional[str] = None):
+    """Build the search index (importing pandas on first use) unless already loaded.
+
+    Loads the current published dataset version, falling back to the CSV.
+    """
+    global search, dataset_version, index_error
+    with _index_lock:
+        if search is not None:
+            return search
+        from proven_connections.search import RelationshipSearch
+        from proven_connections.publish import current_version, dataset_path
+        version = None
+        if path is None:
+            # Resolve the pointer once, so a concurrent publish can't mix versions
+            version = current_version()
+            path = dataset_path(version) if version else None
+            if path is None:
+                version, path = None, csv_path
+        logging.info(f"Loading relationship data from: {path}")
+        try:
+            index = RelationshipSearch(path, prefix_cache_max_len=PREFIX_CACHE_MAX_LEN)
+        except Exception as e:
+            index_error = str(e)
+            logging.error(f"Failed to load relationship data: {index_error}")
+            raise
+        # Warm the autocomplete cache with the most popular logged queries
+        if QUERY_LOG_PATH and os.path.exists(QUERY_LOG_PATH):
+            warmed = index.warm_prefixes(popular_search_terms(QUERY_LOG_PATH, PREFIX_WARM_TOP_N))
+            logging.info(f"Warmed {warmed} popular queries from {QUERY_LOG_PATH}")
+        search = index
+        dataset_version = version
+        index_error = None
+        logging.info(f"Search index ready: {len(search.df)} relationships")
+        return search
+
+@app.on_event("startup")
+async def start_index_load():
+    """Load the index in the background so liveness checks answer while parsing."""
+    threading.Thread(target=load_index, name="index-loader", daemon=True).start()
+
+def require_index():
+    """Raise 503 while the search index is still loading."""
+    if search is None:
+        raise HTTPException(status_code=503, detail="Search index is loading")
 
 # Mount the static files directory
 static_dir = os.path.join(current_dir, 'static')
@@ -43,6 +111,27 @@ app.mount("/static", StaticFiles(directory=static_dir), name="static")
 vendor_cache = {}
 client_cache = {}
 
+# Identical concurrent lookups (e.g. autocomplete bursts) share one computation
+inflight = SingleFlight()
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness check: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness check: the search index is loaded."""
+    if search is None:
+        detail = {"status": "loading" if index_error is None else "failed", "error": index_error}
+        return JSONResponse(status_code=503, content=detail)
+    return {"status": "ready", "relationships": len(search.df), "dataset_version": dataset_version}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose request and internal stage metrics in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/config/map")
 async def get_map_config():
     """Get Mapbox configuration settings."""
@@ -63,44 +152,79 @@ async def search_companies(q: str = ""):
     """Search for both vendors and clients with unified results."""
     if not q:
         return {"results": []}
+    require_index()
     
     try:
         # Search in both name and domain, removing spaces and special characters
         search_term = q.lower().replace(' ', '').replace('-', '').replace('_', '').replace('.', '')
         
-        # Get combined search results
-        results = search.search_all(search_term)
+        # Short and popular queries are answered from the prefix cache;
+        # anything else is scanned off the event loop
+        with time_stage("search_cache"):
+            results = search.cached_search(search_term)
+        if results is None:
+            results = await inflight.do(
+                ("search", search_term),
+                lambda: run_blocking(_search_all, search_term)
+            )
         
         # Convert to list and sort by name length to prioritize shorter matches
-        all_results = [
-            {
-                "name": item["name"],
-                "domain": item["domain"],
-                "logo": item["logo"],
-                "latitude": item["latitude"],
-                "longitude": item["longitude"],
-                "type": "service_provider" if item["type"] == "vendor" else "client",
-                "proven_url": item.get("proven_url")
-            }
-            for item in results
-        ]
-        all_results.sort(key=lambda x: len(x["name"]))
+        with time_stage("search_serialize"):
+            all_results = [
+                {
+                    "name": item["name"],
+                    "domain": item["domain"],
+                    "logo": item["logo"],
+                    "latitude": item["latitude"],
+                    "longitude": item["longitude"],
+                    "type": "service_provider" if item["type"] == "vendor" else "client",
+                    "proven_url": item.get("proven_url")
+                }
+                for item in results
+            ]
+            all_results.sort(key=lambda x: len(x["name"]))
         
         return {"results": all_results}
+    except asyncio.TimeoutError:
+        logging.error(f"Search timed out for query: {q}")
+        raise HTTPException(status_code=504, detail="Search timed out")
     except Exception as e:
         logging.error(f"Error in search_companies: {str(e)}")
         return {"results": []}
 
+def _search_all(search_term: str):
+    """Run the index lookup for a search, timing it as its own stage."""
+    with time_stage("search_lookup"):
+        return search.search_all(search_term)
+
+def _vendor_with_clients(vendor_name: str):
+    """Look up a vendor and its clients in one worker call."""
+    with time_stage("relationship_lookup"):
+        vendor_details = search.get_vendor_details(vendor_name)
+        if not vendor_details:
+            return None, []
+        return vendor_details, search.get_vendor_clients(vendor_name)
+
+def _client_with_vendors(client_name: str):
+    """Look up a client and its vendors in one worker call."""
+    with time_stage("relationship_lookup"):
+        client_details = search.get_client_details(client_name)
+        if not client_details:
+            return None, []
+        return client_details, search.get_client_vendors(client_name)
+
 @app.get("/api/vendor/{vendor_name}/clients")
 async def get_vendor_clients(vendor_name: str, include_stats: bool = False):
     """Get all clients for a specific vendor with optional statistics."""
+    require_index()
     try:
         # Get vendor details and clients
-        vendor_details = search.get_vendor_details(vendor_name)
+        vendor_details, clients = await inflight.do(
+            ("vendor", vendor_name.lower()),
+            lambda: run_blocking(_vendor_with_clients, vendor_name)
+        )
         if not vendor_details:
             raise HTTPException(status_code=404, detail="Vendor not found")
-            
-        clients = search.get_vendor_clients(vendor_name)
         
         response = {
             "center": {
@@ -122,20 +246,27 @@ async def get_vendor_clients(vendor_name: str, include_stats: bool = False):
                 "with_logo": sum(1 for c in clients if c["logo"])
             }
         
-        return JSONResponse(content=response)
+        with time_stage("relationship_serialize"):
+            return JSONResponse(content=response)
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Lookup timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/client/{client_name}/vendors")
 async def get_client_vendors(client_name: str, include_stats: bool = False):
     """Get all vendors for a specific client with optional statistics."""
+    require_index()
     try:
         # Get client details and vendors
-        client_details = search.get_client_details(client_name)
+        client_details, vendors = await inflight.do(
+            ("client", client_name.lower()),
+            lambda: run_blocking(_client_with_vendors, client_name)
+        )
         if not client_details:
             raise HTTPException(status_code=404, detail="Client not found")
-            
-        vendors = search.get_client_vendors(client_name)
         
         response = {
             "center": {
@@ -162,18 +293,65 @@ async def get_client_vendors(client_name: str, include_stats: bool = False):
                 "with_logo": sum(1 for v in vendors if v["logo"])
             }
         
-        return JSONResponse(content=response)
+        with time_stage("relationship_serialize"):
+            return JSONResponse(content=response)
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Lookup timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/stats")
 async def get_stats():
     """Get overall statistics about the dataset."""
+    require_index()
     try:
         return {
             "total_vendors": len(search.vendors),
             "total_clients": len(search.clients),
-            "total_relationships": len(search.df)
+            "total_relationships": len(search.df),
+            "request_coalescing": inflight.stats()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Diffs against the served version by the version they start from (served data never changes in-process)
+changes_cache: Dict[str, Dict[str, Any]] = {}
+CHANGES_CACHE_SIZE = 8
+CHANGES_MAX_LIMIT = 1000
+
+def _changes_since(since: str):
+    """Diff a published dataset version against the served relationships."""
+    from proven_connections.changes import compute_changes
+    from proven_connections.publish import load_dataset
+    with time_stage("changes_diff"):
+        return compute_changes(load_dataset(since), search.df)
+
+@app.get("/api/changes")
+async def get_changes(since: str, limit: int = 100):
+    """Relationships and companies added, removed or changed since dataset version ``since``."""
+    require_index()
+    if dataset_version is None:
+        # The fallback CSV has no version to report as the end of the diff
+        raise HTTPException(status_code=409, detail="The server is not serving a published dataset version")
+    from proven_connections.changes import summarize
+    from proven_connections.publish import list_versions
+    if since not in {manifest["version"] for manifest in list_versions()}:
+        raise HTTPException(status_code=404, detail="Dataset version not found")
+
+    try:
+        changes = changes_cache.get(since)
+        if changes is None:
+            # A diff takes seconds on large datasets, so it runs outside the search pool
+            changes = await inflight.do(("changes", since), lambda: run_background(_changes_since, since))
+            if len(changes_cache) >= CHANGES_CACHE_SIZE:
+                changes_cache.pop(next(iter(changes_cache)))
+            changes_cache[since] = changes
+        return {
+            "from": since,
+            "to": dataset_version,
+            **summarize(changes, max(0, min(limit, CHANGES_MAX_LIMIT)))
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
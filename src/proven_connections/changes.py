@@ -0,0 +1,242 @@
+"""
+Change feed between two versions of the relationships dataset.
+
+Rows are matched on canonical keys: an entity is its normalized domain (or
+its lower-cased name when it has no domain) and an edge is its
+(vendor, client) entity pair. Entities get integer ids shared by both
+versions, edges are hash-joined on the packed id pair and row contents are
+compared through 64-bit hashes, so diffs over millions of edges take
+seconds. The result lists added, removed and changed edges
+and per-field changes of vendor and client attributes.
+
+Versions are published dataset versions (see proven_connections.publish)
+or paths to relationship CSV/Parquet files:
+
+    python -m proven_connections.changes --since 20250310T090000Z-1a2b3c4d
+    python -m proven_connections.changes data/old/vendor_client_relationships_10Mar2025.csv data/vendor_client_relationships_11Mar2025.csv
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .domains import normalize_domains
+from .publish import current_version, dataset_path, load_dataset
+
+SIDES = ['vendor', 'client']
+ENTITY_FIELDS = {
+    'vendor': ['name', 'logo', 'lat', 'lng', 'proven_url'],
+    'client': ['name', 'logo', 'lat', 'lng'],
+}
+
+def load_relationships(ref: str) -> pd.DataFrame:
+    """Read a dataset version by name, or a relationships file by path."""
+    if os.path.exists(ref):
+        return pd.read_parquet(ref) if ref.endswith('.parquet') else pd.read_csv(ref)
+    if dataset_path(ref) is None:
+        raise FileNotFoundError(f"No relationships file or published dataset version {ref!r}")
+    return load_dataset(ref)
+
+def entity_keys(df: pd.DataFrame, side: str) -> pd.Series:
+    """Canonical key of each row's vendor or client: normalized domain, else ``name:<lower-cased name>``."""
+    keys = normalize_domains(df[f'{side}_domain'])
+    missing = keys.isna().to_numpy()
+    if missing.any():
+        names = df.loc[missing, f'{side}_name'].astype(object).fillna('').astype(str).str.strip().str.lower()
+        keys[missing] = ('name:' + names).to_numpy()
+    return keys
+
+def _joint_codes(*columns: pd.Series) -> List[np.ndarray]:
+    """Factorize columns together, so equal values get the same code in each (missing values: -1)."""
+    if len({column.dtype for column in columns}) > 1:
+        columns = tuple(column.astype(object) for column in columns)
+    codes, _ = pd.factorize(pd.concat(columns, ignore_index=True))
+    return np.split(codes, np.cumsum([len(column) for column in columns[:-1]]))
+
+def _edges(edge_ids: np.ndarray, codes: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """One row per distinct edge: its id, a hash of the row's contents and the row's position."""
+    return pd.DataFrame({
+        'edge_id': edge_ids,
+        'row_hash': pd.util.hash_pandas_object(pd.DataFrame(codes), index=False).to_numpy(),
+        'pos': np.arange(len(edge_ids))
+    }).drop_duplicates('edge_id')
+
+def _attribute_sets(order: np.ndarray, starts: np.ndarray, group: np.ndarray, codes: np.ndarray, values: pd.Series):
+    """Distinct values of one attribute for each entity, across all of the entity's rows.
+
+    ``order`` sorts the rows by entity id, ``starts`` marks where each
+    entity's rows begin in it and ``group`` numbers the entity of each
+    sorted row. Returns an order-independent hash of each
+    entity's set of value codes and the value itself: a scalar when the
+    entity's rows agree, else a list of the distinct values (missing ones
+    as None). Only entities whose rows disagree need the distinct pass.
+    """
+    sorted_codes = codes[order]
+    hashes = pd.util.hash_array(sorted_codes[starts])
+    result = values.iloc[order[starts]].to_numpy(dtype=object)
+
+    # Entities with a row whose value differs from the row before it
+    differs = sorted_codes[1:] != sorted_codes[:-1]
+    differs &= group[1:] == group[:-1]
+    mixed = np.unique(group[1:][differs])
+    if len(mixed):
+        rows = np.flatnonzero(np.isin(group, mixed))
+        width = int(codes.max()) + 2
+        pairs, first = np.unique(group[rows] * width + (sorted_codes[rows] + 1), return_index=True)
+        pair_groups = pairs // width
+        bounds = np.flatnonzero(np.r_[True, pair_groups[1:] != pair_groups[:-1]])
+        hashes[pair_groups[bounds]] = np.add.reduceat(pd.util.hash_array(pairs % width - 1), bounds)
+        distinct = values.iloc[order[rows[first]]].to_numpy(dtype=object)
+        for start, end in zip(bounds, np.r_[bounds[1:], len(pairs)]):
+            result[pair_groups[start]] = [None if pd.isna(value) else value for value in distinct[start:end]]
+    return hashes, result
+
+def _entities(df: pd.DataFrame, keys: Dict[str, np.ndarray], ids: Dict[str, np.ndarray], codes: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """One row per (kind, entity id) with the entity's key and attributes.
+
+    An entity is usually listed on many rows. Each attribute is compared as
+    the set of values found on all of them (``<field>_hash``), so a change
+    on any row shows; ``<field>`` holds the value, or the list of values
+    when the rows disagree.
+    """
+    tables = []
+    for side, fields in ENTITY_FIELDS.items():
+        order = np.argsort(ids[side], kind='stable')
+        sorted_ids = ids[side][order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]) if len(order) else np.array([], dtype=np.int64)
+        group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(order)]))
+        table = pd.DataFrame({'kind': side, 'id': sorted_ids[starts], 'key': keys[side][order[starts]]})
+        for field in fields:
+            column = f'{side}_{field}'
+            if column in codes:
+                table[f'{field}_hash'], table[field] = _attribute_sets(order, starts, group, codes[column], df[column])
+        tables.append(table)
+    return pd.concat(tables, ignore_index=True)
+
+def compute_changes(old: pd.DataFrame, new: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Diff two relationship tables.
+
+    Returns DataFrames ``edges_added`` and ``edges_removed`` (full rows),
+    ``edges_changed`` (keys and the columns that changed),
+    ``entities_added``/``entities_removed`` (kind, key, name) and
+    ``entity_changes`` (kind, key, field, old, new).
+    """
+    old = old.reset_index(drop=True)
+    new = new.reset_index(drop=True)
+    # Keys of both versions in one pass, so each distinct domain is normalized once
+    entity_columns = [f'{side}_{field}' for side in SIDES for field in ('domain', 'name')]
+    both_versions = pd.concat([old[entity_columns], new[entity_columns]], ignore_index=True)
+    old_keys, new_keys = {}, {}
+    for side in SIDES:
+        keys = entity_keys(both_versions, side).to_numpy()
+        old_keys[side], new_keys[side] = keys[:len(old)], keys[len(old):]
+
+    # Integer entity ids shared by both versions; an edge id packs its vendor and client ids
+    ids, uniques = pd.factorize(np.concatenate([old_keys['vendor'], old_keys['client'], new_keys['vendor'], new_keys['client']]))
+    old_vendor, old_client, new_vendor, new_client = np.split(ids, np.cumsum([len(old), len(old), len(new)]))
+    old_ids = {'vendor': old_vendor, 'client': old_client}
+    new_ids = {'vendor': new_vendor, 'client': new_client}
+    entity_count = len(uniques)
+    old_edge_ids = old_ids['vendor'].astype(np.int64) * entity_count + old_ids['client']
+    new_edge_ids = new_ids['vendor'].astype(np.int64) * entity_count + new_ids['client']
+
+    # Row contents as per-column value codes, comparable across versions
+    columns = [column for column in new.columns if column in old.columns]
+    old_codes, new_codes = {}, {}
+    for column in columns:
+        old_codes[column], new_codes[column] = _joint_codes(old[column], new[column])
+
+    # Hash join on the edge ids
+    joined = _edges(old_edge_ids, old_codes).merge(
+        _edges(new_edge_ids, new_codes), on='edge_id', how='outer', suffixes=('_old', '_new'), indicator=True
+    )
+    added = joined.loc[joined['_merge'] == 'right_only', 'pos_new'].to_numpy(dtype=np.int64)
+    removed = joined.loc[joined['_merge'] == 'left_only', 'pos_old'].to_numpy(dtype=np.int64)
+    both = joined[joined['_merge'] == 'both']
+    changed = both[both['row_hash_old'].to_numpy() != both['row_hash_new'].to_numpy()]
+    changed_old = changed['pos_old'].to_numpy(dtype=np.int64)
+    changed_new = changed['pos_new'].to_numpy(dtype=np.int64)
+
+    # Columns that changed on each changed edge
+    changed_fields = [[] for _ in range(len(changed))]
+    for column in columns:
+        for i in np.flatnonzero(old_codes[column][changed_old] != new_codes[column][changed_new]):
+            changed_fields[i].append(column)
+    edges_changed = pd.DataFrame({
+        'vendor_key': new_keys['vendor'][changed_new],
+        'client_key': new_keys['client'][changed_new],
+        'fields': changed_fields
+    })
+
+    # Entities, joined on (kind, entity id); hashes are compared on an inner
+    # join, as an outer one would turn them into floats
+    old_entities = _entities(old, old_keys, old_ids, old_codes)
+    new_entities = _entities(new, new_keys, new_ids, new_codes)
+    entities = old_entities[['kind', 'id', 'key', 'name']].merge(
+        new_entities[['kind', 'id', 'key', 'name']], on=['kind', 'id'], how='outer', suffixes=('_old', '_new'), indicator=True
+    )
+    entities['key'] = entities['key_new'].fillna(entities['key_old'])
+    matched = old_entities.merge(new_entities, on=['kind', 'id'], suffixes=('_old', '_new'))
+    entity_changes = []
+    for kind, fields in ENTITY_FIELDS.items():
+        rows = matched[matched['kind'] == kind]
+        for field in fields:
+            if f'{field}_hash_old' not in rows:
+                continue  # Not in both versions
+            diff = rows[rows[f'{field}_hash_old'].to_numpy() != rows[f'{field}_hash_new'].to_numpy()]
+            entity_changes.append(pd.DataFrame({
+                'kind': kind, 'key': diff['key_new'].to_numpy(), 'field': field,
+                'old': diff[f'{field}_old'].to_numpy(), 'new': diff[f'{field}_new'].to_numpy()
+            }))
+
+    return {
+        'edges_added': new.iloc[added].reset_index(drop=True),
+        'edges_removed': old.iloc[removed].reset_index(drop=True),
+        'edges_changed': edges_changed,
+        'entities_added': entities.loc[entities['_merge'] == 'right_only', ['kind', 'key', 'name_new']]
+            .rename(columns={'name_new': 'name'}).reset_index(drop=True),
+        'entities_removed': entities.loc[entities['_merge'] == 'left_only', ['kind', 'key', 'name_old']]
+            .rename(columns={'name_old': 'name'}).reset_index(drop=True),
+        'entity_changes': pd.concat(entity_changes, ignore_index=True),
+    }
+
+def _records(df: pd.DataFrame, limit: Optional[int]) -> List[Dict[str, Any]]:
+    """JSON-ready records (missing values as None) of the first ``limit`` rows."""
+    head = df if limit is None else df.head(limit)
+    head = head.astype(object)
+    return head.where(head.notna(), None).to_dict('records')
+
+def summarize(changes: Dict[str, pd.DataFrame], limit: Optional[int] = 100) -> Dict[str, Any]:
+    """Counts of every kind of change and up to ``limit`` examples of each."""
+    return {
+        'summary': {name: len(df) for name, df in changes.items()},
+        'changes': {name: _records(df, limit) for name, df in changes.items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('old', nargs='?', help='Earlier version name or relationships file')
+    parser.add_argument('new', nargs='?', help='Later version name or file (default: the current version)')
+    parser.add_argument('--since', help='Same as OLD')
+    parser.add_argument('--limit', type=int, default=100, help='Examples listed per kind of change (0 = all)')
+    args = parser.parse_args()
+
+    old_ref = args.since or args.old
+    new_ref = args.new if args.since is None else args.old
+    new_ref = new_ref or current_version()
+    if not old_ref or not new_ref:
+        parser.error('give two versions, or one with a published current version')
+
+    try:
+        old, new = load_relationships(old_ref), load_relationships(new_ref)
+    except FileNotFoundError as e:
+        sys.exit(str(e))
+    result = {'from': old_ref, 'to': new_ref, **summarize(compute_changes(old, new), args.limit or None)}
+    print(json.dumps(result, indent=2, default=str))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from .enrichment_cache import get_cache
+
+def _json_default(value):
+    # numpy scalars from pandas rows
+    return value.item() if hasattr(value, 'item') else str(value)
+
+# Kinds of lookups recorded: company name -> domain, and domain -> company information
+LOOKUP_KINDS = ('domain', 'info')
+
+def definitive_answers(kind: str, answers: Dict[str, Any]) -> Dict[str, Any]:
+    """The answers of one ``kind`` that were found, or stored as not found by the enrichment cache.
+
+    Lookups that failed (errors, 5xx, a missing API key, or still pending
+    when given up) return None without being cached, and are left out.
+    """
+    cache = get_cache()
+    cached = cache.get_domain if kind == 'domain' else cache.get_company_info
+    return {key: value for key, value in answers.items() if value is not None or cached(key)[0]}
+
+def row_lookups(vendor_domain: Optional[str], clients: List[Tuple], name_domains: Dict[str, Optional[str]]) -> Set[str]:
+    """Names and domains whose lookups a vendor row's relationships are built from."""
+    keys = {vendor_domain}
+    for client_domain, client_name in clients:
+        keys.update((client_domain, client_name, name_domains.get(client_name)))
+    keys.discard(None)
+    return keys
+
+class Checkpoint:
+    """Append-only JSON-lines record of a run's lookups and of vendor rows already turned into relationships.
+
+    Row lines are ``{"key", "vendor", "relationships"}``; lookup lines are
+    ``{"lookup", "key", "value"}``, written as soon as the answers are in,
+    before the rows that need them are built. Every line is flushed when
+    written, so an interrupted run loses at most the lookups in flight.
+    Only definitive answers (found, or not found) are recorded, as in the
+    enrichment cache: failed lookups and the rows built from them are left
+    out, so a resumed run retries them instead of keeping the gap.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.completed: Dict[str, List[Dict[str, Any]]] = {}
+        self.lookups: Dict[str, Dict[str, Any]] = {kind: {} for kind in LOOKUP_KINDS}
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Partial last line from an interrupted write
+                    if 'lookup' in entry:
+                        self.lookups[entry['lookup']][entry['key']] = entry['value']
+                    else:
+                        self.completed[entry['key']] = entry['relationships']
+            print(f"Resuming from {path}: {len(self.completed)} vendor rows and "
+                  f"{sum(map(len, self.lookups.values()))} lookups already done")
+        self._file = open(path, 'a' if resume else 'w')
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def row_key(row: pd.Series) -> str:
+        """Content hash of an input row, so edited rows are never taken from the checkpoint."""
+        return hashlib.sha1(json.dumps([str(v) for v in row.tolist()]).encode()).hexdigest()
+
+    @classmethod
+    def row_keys(cls, df: pd.DataFrame) -> pd.Series:
+        """Row keys of every input row, aligned with ``df``."""
+        return pd.Series([cls.row_key(row) for _, row in df.iterrows()], index=df.index, dtype=object)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.completed
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        return self.completed.get(key)
+
+    def record(self, key: str, vendor: str, relationships: List[Dict[str, Any]]):
+        """Persist the relationships produced for one input row."""
+        line = json.dumps({'key': key, 'vendor': vendor, 'relationships': relationships}, default=_json_default)
+        with self._lock:
+            self.completed[key] = relationships
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def record_lookups(self, kind: str, values: Dict[str, Any]):
+        """Persist lookup answers of one ``kind`` (see LOOKUP_KINDS), None for those not found."""
+        lines = ''.join(
+            json.dumps({'lookup': kind, 'key': key, 'value': value}, default=_json_default) + '\n'
+            for key, value in values.items()
+        )
+        with self._lock:
+            self.lookups[kind].update(values)
+            self._file.write(lines)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def remove(self):
+        """Delete the checkpoint once the run's output has been saved."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
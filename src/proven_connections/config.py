@@ -8,7 +8,57 @@ load_dotenv()
 MAPBOX_ACCESS_TOKEN = os.getenv('MAPBOX_ACCESS_TOKEN')
 CLEARBIT_API_KEY = os.getenv('CLEARBIT_API_KEY')
 
+# Clearbit endpoints (point both at proven_connections.mock_clearbit for offline runs)
+CLEARBIT_COMPANY_URL = os.getenv('CLEARBIT_COMPANY_URL', 'https://company.clearbit.com').rstrip('/')
+CLEARBIT_AUTOCOMPLETE_URL = os.getenv('CLEARBIT_AUTOCOMPLETE_URL', 'https://autocomplete.clearbit.com').rstrip('/')
+
 # Default map settings
 DEFAULT_MAP_STYLE = 'mapbox://styles/mapbox/light-v10'
 DEFAULT_MAP_CENTER = [-98.5795, 39.8283]  # Center of USA
 DEFAULT_MAP_ZOOM = 3
+
+# Query execution settings
+SEARCH_WORKERS = int(os.getenv('SEARCH_WORKERS', '4'))  # Threads running search queries
+SEARCH_MAX_CONCURRENCY = int(os.getenv('SEARCH_MAX_CONCURRENCY', '16'))  # Queries admitted at once
+SEARCH_TIMEOUT = float(os.getenv('SEARCH_TIMEOUT', '5'))  # Seconds, including queueing
+
+# Admin and profiling settings
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')  # Admin endpoints are disabled when unset
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))  # Fraction of requests profiled automatically
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.005'))  # Seconds between stack samples
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))  # Oldest profiles are deleted beyond this
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'profiles'))
+
+# Query trace capture (disabled when unset)
+QUERY_LOG_PATH = os.getenv('QUERY_LOG_PATH')
+
+# Autocomplete prefix cache
+PREFIX_CACHE_MAX_LEN = int(os.getenv('PREFIX_CACHE_MAX_LEN', '3'))  # Precompute all queries up to this length (0 = off)
+PREFIX_WARM_TOP_N = int(os.getenv('PREFIX_WARM_TOP_N', '500'))  # Popular longer queries warmed from the query log
+
+# Persistent Clearbit lookup cache shared by the data processors
+ENRICHMENT_CACHE_PATH = os.getenv('ENRICHMENT_CACHE_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'enrichment_cache.sqlite'))
+ENRICHMENT_CACHE_TTL_DAYS = float(os.getenv('ENRICHMENT_CACHE_TTL_DAYS', '30'))
+ENRICHMENT_NEGATIVE_TTL_DAYS = float(os.getenv('ENRICHMENT_NEGATIVE_TTL_DAYS', '7'))  # For "not found" answers
+
+# Clearbit request scheduling (match the account's quota)
+CLEARBIT_RATE_LIMIT = float(os.getenv('CLEARBIT_RATE_LIMIT', '10'))  # Requests per second
+CLEARBIT_BURST = int(os.getenv('CLEARBIT_BURST', '10'))  # Requests allowed back to back after idling
+CLEARBIT_MAX_IN_FLIGHT = int(os.getenv('CLEARBIT_MAX_IN_FLIGHT', '10'))  # Concurrent open requests
+
+# Re-polling of lookups Clearbit is still processing (202)
+DEFERRED_BASE_DELAY = float(os.getenv('DEFERRED_BASE_DELAY', '2'))  # Seconds before the first re-poll
+DEFERRED_MAX_DELAY = float(os.getenv('DEFERRED_MAX_DELAY', '60'))  # Cap on the exponential backoff
+DEFERRED_MAX_ATTEMPTS = int(os.getenv('DEFERRED_MAX_ATTEMPTS', '6'))  # Re-polls before giving up
+
+# Incremental enrichment runs
+INCREMENTAL_MANIFEST_PATH = os.getenv('INCREMENTAL_MANIFEST_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'enrichment_manifest.json'))
+
+# Vendor rows enriched and checkpointed together by a run that can be resumed
+CHECKPOINT_CHUNKSIZE = int(os.getenv('CHECKPOINT_CHUNKSIZE', '500'))
+
+# Streaming enrichment of large vendor files
+STREAM_CHUNKSIZE = int(os.getenv('STREAM_CHUNKSIZE', '5000'))  # Vendor rows per chunk
+
+# Published, versioned relationship datasets (see proven_connections.publish)
+DATASETS_DIR = os.getenv('DATASETS_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'datasets'))
@@ -1,48 +1,102 @@
+import argparse
+import sys
 import pandas as pd
 import os
 from typing import Optional, Dict, Any, List
 
 from . import data_processor_sync as sync
-from . import data_processor_async as async_processor
+from . import incremental
+from .checkpoint import Checkpoint
+from .publish import publish_dataset
+from .run_report import start_report
 
-def process_vendor_data(csv_path: str, use_async: bool = True) -> pd.DataFrame:
+def process_vendor_data(csv_path: str, use_async: bool = True, checkpoint: Optional[Checkpoint] = None) -> pd.DataFrame:
     """Process vendor data from CSV file and create relationship records.
     
     Args:
         csv_path: Path to the CSV file containing vendor data
         use_async: If True, use async version for faster processing (requires aiohttp)
                   If False, use synchronous version
+        checkpoint: If given, finished rows are recorded in it and rows it already
+                    holds are not processed again
     
     Returns:
         DataFrame containing vendor-client relationships
     """
     if use_async:
+        # Imported here, so the module (and --sync) works without aiohttp
         try:
             import asyncio
-            return asyncio.run(async_processor.process_vendor_data(csv_path))
+            from . import data_processor_async as async_processor
         except ImportError:
             print("Warning: aiohttp not installed. Falling back to synchronous version.")
-            return sync.process_vendor_data(csv_path)
+            return sync.process_vendor_data(csv_path, checkpoint)
+        return asyncio.run(async_processor.process_vendor_data(csv_path, checkpoint))
     else:
-        return sync.process_vendor_data(csv_path)
+        return sync.process_vendor_data(csv_path, checkpoint)
 
 if __name__ == "__main__":
+    # Get the absolute path to the data directory
+    current_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+    parser = argparse.ArgumentParser(description="Enrich a vendors CSV into vendor-client relationships")
+    parser.add_argument('--input', default=os.path.join(current_dir, 'data', 'vendors_ireland_10Mar2025.csv'),
+                        help='Vendors CSV to process')
+    parser.add_argument('--sync', action='store_true', help='Use the synchronous processor')
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only re-enrich vendors changed since the last run and merge into its output")
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run from its checkpoint')
+    parser.add_argument('--chunksize', type=int, metavar='ROWS',
+                        help='Stream the input in chunks of this many vendor rows, appending output as it goes')
+    parser.add_argument('--quiet', action='store_true', help='Suppress per-row progress output')
+    parser.add_argument('--report', metavar='PATH',
+                        help='Where to write the JSON run report (default: next to the output, .report.json)')
+    args = parser.parse_args()
+    report = start_report(quiet=args.quiet)
+    if args.chunksize and (args.incremental or args.resume or args.sync):
+        parser.error('--chunksize cannot be combined with --incremental, --resume or --sync')
+
     print("\n=== Starting Proven Connections Data Processor ===")
     print("This may take a few minutes...\n")
 
-    # Get the absolute path to the data directory
-    current_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    csv_path = os.path.join(current_dir, 'data', 'vendors_ireland_10Mar2025.csv')
-    
-    # Process the data (using async by default)
-    processed_df = process_vendor_data(csv_path, use_async=True)
+    csv_path = args.input
     
     # Save the processed data with date suffix from input file
     input_filename = os.path.basename(csv_path)
     date_suffix = input_filename.split('_')[-1]  # Get '3Mar2025.csv'
     output_filename = f'vendor_client_relationships_{date_suffix}'
     output_path = os.path.join(current_dir, 'data', output_filename)
-    processed_df.to_csv(output_path, index=False)
+    report_path = args.report or os.path.splitext(output_path)[0] + '.report.json'
+
+    if args.chunksize:
+        # Streaming keeps memory flat, so statistics over the whole output are skipped
+        from .streaming import stream_vendor_data
+        total = stream_vendor_data(csv_path, output_path, args.chunksize)
+        report.write(report_path)
+        print(f"\nStreamed {total} relationships to: {output_path}")
+        print(f"Run report saved to: {report_path}")
+        sys.exit()
+
+    # Progress is checkpointed next to the output until it has been saved
+    checkpoint = Checkpoint(output_path + '.checkpoint.jsonl', resume=args.resume)
+    process = lambda path: process_vendor_data(path, use_async=not args.sync, checkpoint=checkpoint)
+
+    if args.incremental:
+        processed_df = incremental.process_incremental(csv_path, output_path, process)
+    else:
+        # Process the data (using async by default)
+        processed_df = process(csv_path)
+        with report.stage('write'):
+            processed_df.to_csv(output_path, index=False)
+        # Record this run so the next one can be incremental
+        incremental.write_manifest(csv_path, output_path)
+    checkpoint.remove()
+    
+    # Publish the run as a new immutable dataset version for the server
+    with report.stage('publish'):
+        publish_dataset(processed_df, source=os.path.basename(csv_path))
+    report.write(report_path)
     
     # Calculate statistics
     total_relationships = len(processed_df)
@@ -79,4 +133,5 @@ if __name__ == "__main__":
             print(f"  - {client}")
     
     print(f"\nProcessed data saved to: {output_path}")
+    print(f"Run report saved to: {report_path}")
     print("\n=== Data Processing Complete! ===\n")
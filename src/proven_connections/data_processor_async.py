@@ -2,111 +2,206 @@ import pandas as pd
 import os
 import aiohttp
 import asyncio
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import json
 
+from .checkpoint import Checkpoint, definitive_answers, row_lookups
+from .deferred import PENDING, DeferredRetryQueue
+from .domains import normalize_domain, normalize_domains
+from .enrichment_cache import get_cache
+from .parsing import CLIENTS_COLUMN, explode_clients, group_by_row
+from .rate_limit import RequestScheduler
+from .run_report import get_report, log, trace_config
+
 import os
 config_path = os.path.join(os.path.dirname(__file__), 'config.py')
 with open(config_path) as f:
     exec(f.read())
 
-async def get_company_info_by_domain_async(session: aiohttp.ClientSession, domain: str, max_retries: int = 3) -> Optional[Dict[str, Any]]:
-    """Get company information from Clearbit API with retry logic for 202 responses."""
-    url = f"https://company.clearbit.com/v2/companies/find?domain={domain}"
+async def request_company_info_async(session: aiohttp.ClientSession, scheduler: RequestScheduler, domain: str) -> Any:
+    """Make one Clearbit lookup for a domain; returns PENDING while Clearbit is still processing it."""
+    cache = get_cache()
+    url = f"{CLEARBIT_COMPANY_URL}/v2/companies/find?domain={domain}"
     
     headers = {
         'Authorization': f'Bearer {CLEARBIT_API_KEY}'
     }
     
-    retries = 0
-    while retries < max_retries:
-        try:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return {
-                        'name': data.get('name'),
-                        'domain': domain,  # Use the exact domain we queried with
-                        'logo': data.get('logo'),
-                        'lat': data.get('geo', {}).get('lat'),
-                        'lng': data.get('geo', {}).get('lng')
-                    }
-                elif response.status == 202:
-                    print(f"Request accepted for {domain}, waiting for processing (attempt {retries + 1}/{max_retries})")
-                    retries += 1
-                    if retries < max_retries:
-                        await asyncio.sleep(2)  # Wait 2 seconds before retrying
-                    continue
-                else:
-                    print(f"Failed to get data for {domain}. Status Code: {response.status}")
-                    return None
-        except Exception as e:
-            print(f"Error fetching data for {domain}: {str(e)}")
-            return None
-    
-    print(f"Max retries reached for {domain}")
-    return None
+    try:
+        async with scheduler.slot(), session.get(url, headers=headers) as response:
+            if response.status == 200:
+                data = await response.json()
+                company_info = {
+                    'name': data.get('name'),
+                    'domain': domain,  # Use the exact domain we queried with
+                    'logo': data.get('logo'),
+                    'lat': data.get('geo', {}).get('lat'),
+                    'lng': data.get('geo', {}).get('lng')
+                }
+                cache.set_company_info(domain, company_info)
+                return company_info
+            elif response.status == 404:
+                log(f"No company found for {domain}")
+                cache.set_company_info(domain, None)
+                return None
+            elif response.status == 202:
+                log(f"Request accepted for {domain}, will poll again later")
+                return PENDING
+            elif response.status == 429:
+                log(f"Rate limited on {domain}, will retry later")
+                return PENDING
+            else:
+                log(f"Failed to get data for {domain}. Status Code: {response.status}")
+                return None
+    except Exception as e:
+        log(f"Error fetching data for {domain}: {str(e)}")
+        return None
+
+async def get_company_info_by_domain_async(
+    session: aiohttp.ClientSession,
+    scheduler: RequestScheduler,
+    domain: str,
+    deferred: Optional[DeferredRetryQueue] = None
+) -> Optional[Dict[str, Any]]:
+    """Get company information from Clearbit API.
 
-async def fetch_company_info_batch(domains: List[str]) -> Dict[str, Dict[str, Any]]:
-    """Fetch company information for multiple domains in parallel."""
-    async with aiohttp.ClientSession() as session:
-        tasks = [get_company_info_by_domain_async(session, domain) for domain in domains]
-        results = await asyncio.gather(*tasks)
-        return {domain: result for domain, result in zip(domains, results) if result is not None}
+    A lookup Clearbit is still processing (202) is pushed onto ``deferred``
+    and None is returned for now; without a queue, it is polled until done.
+    """
+    hit, cached_info = get_cache().get_company_info(domain)
+    if hit:
+        return cached_info
+    if deferred is not None and domain in deferred:
+        return None  # Already waiting on Clearbit
 
-async def search_company_domain_async(session: aiohttp.ClientSession, company_name: str) -> Optional[str]:
-    """Search for a company's domain using Clearbit's Name to Domain API."""
+    company_info = await request_company_info_async(session, scheduler, domain)
+    if company_info is not PENDING:
+        return company_info
+    if deferred is not None:
+        deferred.push(domain)
+        return None
+    queue = DeferredRetryQueue()
+    queue.push(domain)
+    resolved = await queue.drain_async(lambda key: request_company_info_async(session, scheduler, key))
+    return resolved.get(domain)
+
+def create_session(scheduler: RequestScheduler) -> aiohttp.ClientSession:
+    """Create a client session whose connection pool matches the scheduler's in-flight limit.
+
+    Every request made through it is recorded in the current run report.
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=scheduler.max_in_flight),
+        trace_configs=[trace_config()]
+    )
+
+async def fetch_company_info_batch(
+    domains: List[str],
+    session: aiohttp.ClientSession,
+    scheduler: RequestScheduler,
+    deferred: Optional[DeferredRetryQueue] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch company information for multiple domains concurrently, within the scheduler's limits.
+
+    Domains Clearbit is still processing are left on ``deferred`` when given.
+    """
+    tasks = [get_company_info_by_domain_async(session, scheduler, domain, deferred) for domain in domains]
+    results = await asyncio.gather(*tasks)
+    return {domain: result for domain, result in zip(domains, results) if result is not None}
+
+async def resolve_company_domains(names: List[str], session: aiohttp.ClientSession, scheduler: RequestScheduler) -> Dict[str, Optional[str]]:
+    """Resolve distinct company names to domains concurrently, one lookup per name.
+
+    Names that were rate limited are retried from a deferred queue before
+    they are given up.
+    """
+    deferred = DeferredRetryQueue()
+    domains = await asyncio.gather(*(search_company_domain_async(session, scheduler, name, deferred) for name in names))
+    name_domains = dict(zip(names, domains))
+    if len(deferred):
+        print(f"Retrying {len(deferred)} rate-limited name lookups...")
+    name_domains.update(await deferred.drain_async(lambda name: request_company_domain_async(session, scheduler, name)))
+    for name in names:
+        domain = name_domains.get(name)
+        if domain:
+            log(f"  Found domain for {name}: {domain}")
+        else:
+            log(f"  Could not find domain for {name}")
+    return name_domains
+
+async def request_company_domain_async(session: aiohttp.ClientSession, scheduler: RequestScheduler, company_name: str) -> Any:
+    """Search for a company's domain using Clearbit's Name to Domain API; returns PENDING when rate limited."""
+    cache = get_cache()
     try:
-        url = f"https://company.clearbit.com/v1/domains/find?name={company_name}"
+        url = f"{CLEARBIT_COMPANY_URL}/v1/domains/find?name={company_name}"
         headers = {
             'Authorization': f'Bearer {CLEARBIT_API_KEY}'
         }
         
-        async with session.get(url, headers=headers) as response:
+        async with scheduler.slot(), session.get(url, headers=headers) as response:
             if response.status == 200:
                 data = await response.json()
-                return data.get('domain')
+                domain = normalize_domain(data.get('domain'))
+                cache.set_domain(company_name, domain)
+                return domain
             elif response.status == 404:
-                print(f"  No domain found for {company_name}")
+                log(f"  No domain found for {company_name}")
+                cache.set_domain(company_name, None)
+            elif response.status == 429:
+                log(f"  Rate limited on {company_name}, will retry later")
+                return PENDING
             else:
-                print(f"  Failed to get domain for {company_name}. Status Code: {response.status}")
+                log(f"  Failed to get domain for {company_name}. Status Code: {response.status}")
     except Exception as e:
-        print(f"  Error searching for {company_name}: {str(e)}")
+        log(f"  Error searching for {company_name}: {str(e)}")
     
     return None
 
-def parse_client_list(clients_str: str) -> List[Dict[str, str]]:
-    """Parse a string of client domains into a list of client info dicts."""
-    if not pd.notna(clients_str):
-        return []
+async def search_company_domain_async(
+    session: aiohttp.ClientSession,
+    scheduler: RequestScheduler,
+    company_name: str,
+    deferred: Optional[DeferredRetryQueue] = None
+) -> Optional[str]:
+    """Search for a company's domain, from the cache when it has one.
 
-    # Split by comma and clean each entry
-    entries = [entry.strip() for entry in clients_str.split(',')]
-    
-    # Process each entry to determine if it's a domain or company name
-    clients = []
-    for entry in entries:
-        if not entry:
-            continue
-            
-        # Check if entry looks like a domain (contains a dot)
-        if '.' in entry:
-            clients.append({'domain': entry, 'name': None})
-        else:
-            # Entry is likely a company name
-            clients.append({'domain': None, 'name': entry})
-    
-    return clients
+    A rate-limited lookup is pushed onto ``deferred`` and None is returned
+    for now; without a queue, it is retried with backoff until done.
+    """
+    hit, cached_domain = get_cache().get_domain(company_name)
+    if hit:
+        return cached_domain
+    if deferred is not None and company_name in deferred:
+        return None
+
+    domain = await request_company_domain_async(session, scheduler, company_name)
+    if domain is not PENDING:
+        return domain
+    if deferred is not None:
+        deferred.push(company_name)
+        return None
+    queue = DeferredRetryQueue()
+    queue.push(company_name)
+    resolved = await queue.drain_async(lambda key: request_company_domain_async(session, scheduler, key))
+    return resolved.get(company_name)
 
-async def process_company_relationships(row: pd.Series, company_info_cache: Dict[str, Dict[str, Any]], session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
-    """Process vendor and client relationships with full company information."""
+def process_company_relationships(
+    row: pd.Series,
+    clients: List[Tuple[Optional[str], Optional[str]]],
+    company_info_cache: Dict[str, Dict[str, Any]],
+    name_domains: Dict[str, Optional[str]]
+) -> List[Dict[str, Any]]:
+    """Process vendor and client relationships with full company information.
+
+    ``clients`` holds the row's parsed (domain, name) client entries.
+    """
     relationships = []
     
     # Get vendor information from cache
     vendor_info = None
     vendor_domain = row['Vendor Domain']
     if pd.notna(vendor_domain):
-        print(f"Processing vendor: {row['Vendor Name']} ({vendor_domain})")
+        log(f"Processing vendor: {row['Vendor Name']} ({vendor_domain})")
         vendor_clearbit = company_info_cache.get(vendor_domain)
         if vendor_clearbit:
             vendor_info = vendor_clearbit
@@ -123,23 +218,15 @@ async def process_company_relationships(row: pd.Series, company_info_cache: Dict
         return relationships
     
     # Process each client in the list
-    clients = parse_client_list(row['Vendor clients domains'])
-    for client in clients:
-        client_domain = client['domain']
-        client_name = client['name']
+    for client_domain, client_name in clients:
         
-        # If we have a name but no domain, try to find the domain
+        # If we have a name but no domain, use the domain resolved for it
         if client_name and not client_domain:
-            print(f"  Searching for domain of {client_name}...")
-            client_domain = await search_company_domain_async(session, client_name)
+            client_domain = name_domains.get(client_name)
             if not client_domain:
-                print(f"  Could not find domain for {client_name}")
                 continue
-            print(f"  Found domain for {client_name}: {client_domain}")
-            await asyncio.sleep(0.1)  # Rate limiting for web search
         
-        print(f"  Processing client: {client_name or client_domain}")
-        await asyncio.sleep(0.1)  # Rate limiting for Clearbit
+        log(f"  Processing client: {client_name or client_domain}")
         client_clearbit = company_info_cache.get(client_domain)
         
         if client_clearbit:
@@ -181,42 +268,134 @@ async def process_company_relationships(row: pd.Series, company_info_cache: Dict
     
     return relationships
 
-async def process_vendor_data(csv_path: str) -> pd.DataFrame:
-    """Process vendor data from CSV file and create relationship records."""
+async def resolve_lookups(
+    vendors: pd.DataFrame,
+    clients: pd.DataFrame,
+    session: aiohttp.ClientSession,
+    scheduler: RequestScheduler,
+    name_domains: Dict[str, Optional[str]],
+    company_info_cache: Dict[str, Optional[Dict[str, Any]]],
+    checkpoint: Optional[Checkpoint] = None
+):
+    """Look up the names and domains of some vendor rows that are not known yet.
+
+    Answers are added to ``name_domains`` and ``company_info_cache``, and
+    the definitive ones recorded in ``checkpoint`` when given. Returns the
+    names and domains whose lookups failed (only tracked with a checkpoint).
+    """
+    report = get_report()
+    failed = set()
+
+    # Resolve each distinct name once, so their domains join the batch lookup
+    with report.stage('resolve_names'):
+        chunk_names = set(clients['client_name'].dropna())
+        names = sorted(chunk_names - set(name_domains))
+        print(f"Searching domains for {len(names)} companies without one...")
+        resolved = await resolve_company_domains(names, session, scheduler)
+        name_domains.update(resolved)
+        if checkpoint is not None:
+            recorded = definitive_answers('domain', resolved)
+            failed |= set(resolved) - set(recorded)
+            checkpoint.record_lookups('domain', recorded)
+
+    # Collect all unique domains (vendors and clients) not looked up yet
+    domains = set(vendors['Vendor Domain'].dropna()) | set(clients['client_domain'].dropna())
+    domains.update(name_domains[name] for name in chunk_names if name_domains[name])
+    domains = sorted(domains - set(company_info_cache))
+
+    with report.stage('enrich_domains'):
+        # Fetch company information for all domains concurrently
+        print("Fetching company information from Clearbit...")
+        deferred = DeferredRetryQueue()
+        found = await fetch_company_info_batch(domains, session, scheduler, deferred)
+
+        # Final sweep over lookups Clearbit was still processing
+        if len(deferred):
+            print(f"Waiting for {len(deferred)} lookups Clearbit is still processing...")
+        found.update(await deferred.drain_async(lambda domain: request_company_info_async(session, scheduler, domain)))
+        answers = {domain: found.get(domain) for domain in domains}
+        company_info_cache.update(answers)
+        if checkpoint is not None:
+            recorded = definitive_answers('info', answers)
+            failed |= set(answers) - set(recorded)
+            checkpoint.record_lookups('info', recorded)
+    return failed
+
+async def process_vendor_data(csv_path: str, checkpoint: Optional[Checkpoint] = None) -> pd.DataFrame:
+    """Process vendor data from CSV file and create relationship records.
+
+    With a checkpoint, rows are enriched in chunks of CHECKPOINT_CHUNKSIZE;
+    each chunk's definitive lookups and finished rows are recorded as they
+    complete, and whatever an interrupted run already recorded is not done
+    again. Failed lookups, and rows built from them, are retried.
+    """
     print("\n=== Starting Proven Connections Data Processor (Async Version) ===")
     print("This may take a few minutes...\n")
+    report = get_report()
 
-    # Read the CSV file
-    df = pd.read_csv(csv_path)
-    print(f"Read {len(df)} vendors from CSV")
-    
-    # Drop rows where client domains column is empty
-    df = df.dropna(subset=['Vendor clients domains'])
-    
-    # Drop duplicates
-    df = df.drop_duplicates()
-    
-    # Collect all unique domains (vendors and clients)
-    all_domains = set()
-    all_domains.update(df['Vendor Domain'].dropna())
-    for clients in df['Vendor clients domains'].dropna():
-        # Only add known domains to the batch lookup
-        client_entries = parse_client_list(clients)
-        all_domains.update(client['domain'] for client in client_entries if client['domain'])
+    with report.stage('read'):
+        # Read the CSV file
+        df = pd.read_csv(csv_path)
+        print(f"Read {len(df)} vendors from CSV")
+        
+        # Drop rows where client domains column is empty
+        df = df.dropna(subset=['Vendor clients domains'])
+        
+        # Normalize vendor domains so variants of one domain share a lookup
+        df = df.assign(**{'Vendor Domain': normalize_domains(df['Vendor Domain'])})
+        
+        # Drop duplicates
+        df = df.drop_duplicates()
+    report.count('vendors', len(df))
     
-    # Fetch company information for all domains in parallel
-    print("Fetching company information from Clearbit...")
-    company_info_cache = await fetch_company_info_batch(list(all_domains))
+    with report.stage('parse'):
+        # Rows finished by an earlier, interrupted run come from the checkpoint
+        row_keys = Checkpoint.row_keys(df) if checkpoint is not None else None
+        pending = df if checkpoint is None else df[~row_keys.isin(set(checkpoint.completed))]
+        
+        # Parse every client list in one vectorized pass
+        clients = explode_clients(df[CLIENTS_COLUMN])
+        client_lists = group_by_row(clients)
+    report.count('vendors_from_checkpoint', len(df) - len(pending))
+    report.count('client_entries', len(clients))
     
-    # Process relationships and create new records
-    all_relationships = []
-    async with aiohttp.ClientSession() as session:
-        for _, row in df.iterrows():
-            relationships = await process_company_relationships(row, company_info_cache, session)
-            all_relationships.extend(relationships)
+    # Lookups answered before an interrupted run stopped are not requested again
+    name_domains = dict(checkpoint.lookups['domain']) if checkpoint is not None else {}
+    company_info_cache = dict(checkpoint.lookups['info']) if checkpoint is not None else {}
     
-    # Create new DataFrame with relationship records
-    relationships_df = pd.DataFrame(all_relationships)
+    # With a checkpoint, rows are enriched a chunk at a time and recorded as
+    # each chunk completes; otherwise all rows share one batch of lookups
+    chunksize = CHECKPOINT_CHUNKSIZE if checkpoint is not None else max(len(pending), 1)
+    built = {}
+    failed = set()
+    # One scheduler paces every Clearbit request of the run
+    scheduler = RequestScheduler()
+    async with create_session(scheduler) as session:
+        for start in range(0, len(pending), chunksize):
+            chunk = pending.iloc[start:start + chunksize]
+            failed |= await resolve_lookups(
+                chunk, clients[clients.index.isin(chunk.index)], session, scheduler,
+                name_domains, company_info_cache, checkpoint
+            )
+            
+            # Build relationship records from the resolved lookups
+            with report.stage('build'):
+                for index, row in chunk.iterrows():
+                    row_clients = client_lists.get(index, [])
+                    built[index] = process_company_relationships(row, row_clients, company_info_cache, name_domains)
+                    # Rows missing a failed lookup are built again when resuming
+                    if checkpoint is not None and failed.isdisjoint(row_lookups(row['Vendor Domain'], row_clients, name_domains)):
+                        checkpoint.record(row_keys[index], row['Vendor Name'], built[index])
+    print(f"Made {scheduler.requests} Clearbit requests")
+
+    with report.stage('build'):
+        # Create new DataFrame with relationship records, in input order
+        relationships_df = pd.DataFrame([
+            relationship
+            for index in df.index
+            for relationship in (built[index] if index in built else checkpoint.get(row_keys[index]))
+        ])
+    report.count('relationships', len(relationships_df))
     
     print("\n=== Data Processing Complete! ===\n")
     return relationships_df
@@ -1,15 +1,23 @@
 import pandas as pd
 import os
-import requests
 import time
 from typing import Optional, Dict, Any, List
 import json
 
-from .config import CLEARBIT_API_KEY
+from .config import CLEARBIT_API_KEY, CLEARBIT_COMPANY_URL
+from .domains import normalize_domains
+from .enrichment_cache import get_cache
+from .parsing import CLIENTS_COLUMN, group_by_row, split_clients
+from .sync_http import clearbit_get, executor
 
 def get_company_info_by_domain(domain: str, max_retries: int = 3) -> Optional[Dict[str, Any]]:
     """Get company information from Clearbit API with retry logic for 202 responses."""
-    url = f"https://company.clearbit.com/v2/companies/find?domain={domain}"
+    cache = get_cache()
+    hit, cached_info = cache.get_company_info(domain)
+    if hit:
+        return cached_info
+
+    url = f"{CLEARBIT_COMPANY_URL}/v2/companies/find?domain={domain}"
     
     headers = {
         'Authorization': f'Bearer {CLEARBIT_API_KEY}'
@@ -18,17 +26,23 @@ def get_company_info_by_domain(domain: str, max_retries: int = 3) -> Optional[Di
     retries = 0
     while retries < max_retries:
         try:
-            response = requests.get(url, headers=headers)
+            response = clearbit_get(url, headers=headers)
             
             if response.status_code == 200:
                 data = response.json()
-                return {
+                company_info = {
                     'name': data.get('name'),
                     'domain': data.get('domain'),
                     'logo': data.get('logo'),
                     'lat': data.get('geo', {}).get('lat'),
                     'lng': data.get('geo', {}).get('lng')
                 }
+                cache.set_company_info(domain, company_info)
+                return company_info
+            elif response.status_code == 404:
+                print(f"No company found for {domain}")
+                cache.set_company_info(domain, None)
+                return None
             elif response.status_code == 202:
                 print(f"Request accepted for {domain}, waiting for processing (attempt {retries + 1}/{max_retries})")
                 retries += 1
@@ -45,18 +59,15 @@ def get_company_info_by_domain(domain: str, max_retries: int = 3) -> Optional[Di
     print(f"Max retries reached for {domain}")
     return None
 
-def parse_client_list(clients_str: str) -> List[str]:
-    """Parse a string of client domains into a list of domains."""
-    if not pd.notna(clients_str):
-        return []
-
-    # Split by comma and clean each domain
-    domains = [domain.strip() for domain in clients_str.split(',')]
-    # Filter out empty domains
-    return [domain for domain in domains if domain]
+def process_company_relationships(
+    row: pd.Series,
+    client_domains: List[str],
+    company_info_cache: Dict[str, Optional[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """Process vendor and client relationships with full company information.
 
-def process_company_relationships(row: pd.Series) -> List[Dict[str, Any]]:
-    """Process vendor and client relationships with full company information."""
+    ``company_info_cache`` holds the company information fetched for the run.
+    """
     relationships = []
     
     # Get vendor information first
@@ -64,7 +75,7 @@ def process_company_relationships(row: pd.Series) -> List[Dict[str, Any]]:
     vendor_domain = row['Vendor Domain']
     if pd.notna(vendor_domain):
         print(f"Processing vendor: {row['Vendor Name']} ({vendor_domain})")
-        vendor_info = get_company_info_by_domain(vendor_domain)
+        vendor_info = company_info_cache.get(vendor_domain)
         if not vendor_info:
             vendor_info = {
                 'name': row['Vendor Name'],
@@ -78,11 +89,9 @@ def process_company_relationships(row: pd.Series) -> List[Dict[str, Any]]:
         return relationships
     
     # Process each client in the list
-    client_domains = parse_client_list(row['Vendor clients domains'])
     for client_domain in client_domains:
         print(f"  Processing client domain: {client_domain}")
-        time.sleep(0.5)  # Rate limiting
-        client_info = get_company_info_by_domain(client_domain)
+        client_info = company_info_cache.get(client_domain)
         
         if not client_info:
             client_info = {
@@ -118,10 +127,20 @@ def process_vendor_data(csv_path: str):
     df = pd.read_csv(csv_path)
     print(f"Read {len(df)} vendors from CSV")
     
+    # Normalize domains so variants of one domain share a lookup
+    df['Vendor Domain'] = normalize_domains(df['Vendor Domain'])
+    
+    # Parse every client list in one vectorized pass
+    client_lists = group_by_row(normalize_domains(split_clients(df[CLIENTS_COLUMN])))
+    
+    # Look up every distinct domain once, concurrently on the thread pool
+    domains = sorted(set(df['Vendor Domain'].dropna()) | {d for clients in client_lists.values() for d in clients})
+    company_info_cache = dict(zip(domains, executor.map(get_company_info_by_domain, domains)))
+    
     # Process each row and collect all relationships
     all_relationships = []
-    for _, row in df.iterrows():
-        relationships = process_company_relationships(row)
+    for index, row in df.iterrows():
+        relationships = process_company_relationships(row, client_lists.get(index, []), company_info_cache)
         all_relationships.extend(relationships)
     
     # Convert to DataFrame
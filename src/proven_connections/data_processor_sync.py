@@ -1,79 +1,115 @@
 import pandas as pd
 import os
-import requests
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import json
 
+from .checkpoint import Checkpoint, definitive_answers, row_lookups
+from .deferred import PENDING, DeferredRetryQueue
+from .domains import normalize_domain, normalize_domains
+from .enrichment_cache import get_cache
+from .parsing import CLIENTS_COLUMN, explode_clients, group_by_row
+from .run_report import get_report, log
+from .sync_http import clearbit_get, executor, get_scheduler
+
 import os
 config_path = os.path.join(os.path.dirname(__file__), 'config.py')
 with open(config_path) as f:
     exec(f.read())
 
-def get_company_info_by_domain(domain: str, max_retries: int = 3) -> Optional[Dict[str, Any]]:
-    """Get company information from Clearbit API with retry logic for 202 responses."""
-    url = f"https://company.clearbit.com/v2/companies/find?domain={domain}"
+def request_company_info(domain: str) -> Any:
+    """Make one Clearbit lookup for a domain; returns PENDING while Clearbit is still processing it."""
+    cache = get_cache()
+    url = f"{CLEARBIT_COMPANY_URL}/v2/companies/find?domain={domain}"
     
     headers = {
         'Authorization': f'Bearer {CLEARBIT_API_KEY}'
     }
     
-    retries = 0
-    while retries < max_retries:
-        try:
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'name': data.get('name'),
-                    'domain': domain,  # Use the exact domain we queried with
-                    'logo': data.get('logo'),
-                    'lat': data.get('geo', {}).get('lat'),
-                    'lng': data.get('geo', {}).get('lng')
-                }
-            elif response.status_code == 202:
-                print(f"Request accepted for {domain}, waiting for processing (attempt {retries + 1}/{max_retries})")
-                retries += 1
-                if retries < max_retries:
-                    time.sleep(2)  # Wait 2 seconds before retrying
-                continue
-            else:
-                print(f"Failed to get data for {domain}. Status Code: {response.status_code}")
-                return None
-        except Exception as e:
-            print(f"Error fetching data for {domain}: {str(e)}")
+    try:
+        response = clearbit_get(url, headers=headers)
+        
+        if response.status_code == 200:
+            data = response.json()
+            company_info = {
+                'name': data.get('name'),
+                'domain': domain,  # Use the exact domain we queried with
+                'logo': data.get('logo'),
+                'lat': data.get('geo', {}).get('lat'),
+                'lng': data.get('geo', {}).get('lng')
+            }
+            cache.set_company_info(domain, company_info)
+            return company_info
+        elif response.status_code == 404:
+            log(f"No company found for {domain}")
+            cache.set_company_info(domain, None)
             return None
-    
-    print(f"Max retries reached for {domain}")
-    return None
+        elif response.status_code == 202:
+            log(f"Request accepted for {domain}, will poll again later")
+            return PENDING
+        elif response.status_code == 429:
+            log(f"Rate limited on {domain}, will retry later")
+            return PENDING
+        else:
+            log(f"Failed to get data for {domain}. Status Code: {response.status_code}")
+            return None
+    except Exception as e:
+        log(f"Error fetching data for {domain}: {str(e)}")
+        return None
 
-def search_company_domain(company_name: str) -> Optional[str]:
-    """Search for a company's domain using Clearbit Autocomplete API."""
-    if not CLEARBIT_API_KEY:
-        print("  Warning: CLEARBIT_API_KEY not set, skipping domain search")
+def lookup_company_info(domain: str) -> Any:
+    """Company information from the cache, else from Clearbit; PENDING while Clearbit is still processing it."""
+    hit, cached_info = get_cache().get_company_info(domain)
+    if hit:
+        return cached_info
+    return request_company_info(domain)
+
+def get_company_info_by_domain(domain: str, deferred: Optional[DeferredRetryQueue] = None) -> Optional[Dict[str, Any]]:
+    """Get company information from Clearbit API.
+
+    A lookup Clearbit is still processing (202) is pushed onto ``deferred``
+    and None is returned for now; without a queue, it is polled until done.
+    """
+    if deferred is not None and domain in deferred:
+        return None  # Already waiting on Clearbit
+
+    company_info = lookup_company_info(domain)
+    if company_info is not PENDING:
+        return company_info
+    if deferred is not None:
+        deferred.push(domain)
         return None
-        
+    queue = DeferredRetryQueue()
+    queue.push(domain)
+    return queue.drain(request_company_info).get(domain)
+
+def request_company_domain(company_name: str) -> Any:
+    """Search for a company's domain using Clearbit Autocomplete API; returns PENDING when rate limited."""
+    cache = get_cache()
     try:
         # Use Clearbit's Autocomplete API to find the company
-        url = 'https://autocomplete.clearbit.com/v1/companies/suggest'
-        response = requests.get(
+        url = f'{CLEARBIT_AUTOCOMPLETE_URL}/v1/companies/suggest'
+        response = clearbit_get(
             url,
             headers={'Authorization': f'Bearer {CLEARBIT_API_KEY}'},
             params={'query': company_name}
         )
         
         if response.status_code == 401:
-            print("  Warning: Invalid CLEARBIT_API_KEY, skipping domain search")
+            log("  Warning: Invalid CLEARBIT_API_KEY, skipping domain search")
             return None
+        elif response.status_code == 429:
+            log(f"  Rate limited on {company_name}, will retry later")
+            return PENDING
         elif response.status_code != 200:
-            print(f"  Failed to search for {company_name}. Status Code: {response.status_code}")
+            log(f"  Failed to search for {company_name}. Status Code: {response.status_code}")
             return None
             
         results = response.json()
         
         # Look for the most likely company match
         if not results:
+            cache.set_domain(company_name, None)
             return None
             
         # The API returns results sorted by relevance
@@ -83,60 +119,111 @@ def search_company_domain(company_name: str) -> Optional[str]:
             if not domain:
                 continue
                 
-            # Remove www. if present
-            domain = domain.replace('www.', '')
+            # Canonical form (also strips www.), None if it isn't a domain
+            domain = normalize_domain(domain)
             
             # Basic validation of domain
-            if '.' not in domain or len(domain.split('.')) < 2:
+            if not domain:
                 continue
                 
             # If company name appears in domain, it's likely the right one
             company_words = company_name.lower().split()
             domain_words = domain.lower().split('.')
             if any(word in domain_words[0] for word in company_words if len(word) > 2):
+                cache.set_domain(company_name, domain)
                 return domain
             
             # Otherwise, return first valid domain
+            cache.set_domain(company_name, domain)
             return domain
+
+        # None of the suggestions had a usable domain
+        cache.set_domain(company_name, None)
             
     except Exception as e:
-        print(f"  Error searching for {company_name}: {str(e)}")
+        log(f"  Error searching for {company_name}: {str(e)}")
     
     return None
 
-def parse_client_list(clients_str: str) -> List[Dict[str, str]]:
-    """Parse a string of client domains into a list of client info dicts."""
-    if not pd.notna(clients_str):
-        return []
+def lookup_company_domain(company_name: str) -> Any:
+    """A company's domain from the cache, else from Clearbit; PENDING when rate limited."""
+    if not CLEARBIT_API_KEY:
+        log("  Warning: CLEARBIT_API_KEY not set, skipping domain search")
+        return None
+    hit, cached_domain = get_cache().get_domain(company_name)
+    if hit:
+        return cached_domain
+    return request_company_domain(company_name)
 
-    # Split by comma and clean each entry
-    entries = [entry.strip() for entry in clients_str.split(',')]
-    
-    # Process each entry to determine if it's a domain or company name
-    clients = []
-    for entry in entries:
-        if not entry:
-            continue
-            
-        # Check if entry looks like a domain (contains a dot)
-        if '.' in entry:
-            clients.append({'domain': entry, 'name': None})
+def search_company_domain(company_name: str) -> Optional[str]:
+    """Search for a company's domain, retrying with backoff while rate limited."""
+    domain = lookup_company_domain(company_name)
+    if domain is not PENDING:
+        return domain
+    queue = DeferredRetryQueue()
+    queue.push(company_name)
+    return queue.drain(request_company_domain).get(company_name)
+
+def fetch_company_info_batch(domains: List[str], deferred: Optional[DeferredRetryQueue] = None) -> Dict[str, Dict[str, Any]]:
+    """Fetch company information for multiple domains on the thread pool, within the scheduler's limits.
+
+    Domains Clearbit is still processing are left on ``deferred`` when given,
+    otherwise they are polled until done.
+    """
+    queue = deferred if deferred is not None else DeferredRetryQueue()
+    found = {}
+    for domain, result in zip(domains, executor.map(lookup_company_info, domains)):
+        if result is PENDING:
+            queue.push(domain)
+        elif result is not None:
+            found[domain] = result
+    if deferred is None:
+        found.update(queue.drain(request_company_info, executor))
+    return found
+
+def resolve_company_domains(names: List[str]) -> Dict[str, Optional[str]]:
+    """Resolve distinct company names to domains concurrently, one lookup per name.
+
+    Names that were rate limited are retried from a deferred queue before
+    they are given up.
+    """
+    deferred = DeferredRetryQueue()
+    name_domains = {}
+    for name, domain in zip(names, executor.map(lookup_company_domain, names)):
+        if domain is PENDING:
+            deferred.push(name)
         else:
-            # Entry is likely a company name
-            clients.append({'domain': None, 'name': entry})
-    
-    return clients
+            name_domains[name] = domain
+    if len(deferred):
+        print(f"Retrying {len(deferred)} rate-limited name lookups...")
+    name_domains.update(deferred.drain(request_company_domain, executor))
+    for name in names:
+        domain = name_domains.get(name)
+        if domain:
+            log(f"  Found domain for {name}: {domain}")
+        else:
+            log(f"  Could not find domain for {name}")
+    return {name: name_domains.get(name) for name in names}
 
-def process_company_relationships(row: pd.Series) -> List[Dict[str, Any]]:
-    """Process vendor and client relationships with full company information."""
+def process_company_relationships(
+    row: pd.Series,
+    clients: List[Tuple[Optional[str], Optional[str]]],
+    company_info_cache: Dict[str, Dict[str, Any]],
+    name_domains: Dict[str, Optional[str]]
+) -> List[Dict[str, Any]]:
+    """Process vendor and client relationships with full company information.
+
+    ``clients`` holds the row's parsed (domain, name) client entries;
+    ``company_info_cache`` the company information fetched for the run.
+    """
     relationships = []
     
     # Get vendor information first
     vendor_info = None
     vendor_domain = row['Vendor Domain']
     if pd.notna(vendor_domain):
-        print(f"Processing vendor: {row['Vendor Name']} ({vendor_domain})")
-        vendor_clearbit = get_company_info_by_domain(vendor_domain)
+        log(f"Processing vendor: {row['Vendor Name']} ({vendor_domain})")
+        vendor_clearbit = company_info_cache.get(vendor_domain)
         if vendor_clearbit:
             vendor_info = vendor_clearbit
         else:
@@ -152,24 +239,16 @@ def process_company_relationships(row: pd.Series) -> List[Dict[str, Any]]:
         return relationships
     
     # Process each client in the list
-    clients = parse_client_list(row['Vendor clients domains'])
-    for client in clients:
-        client_domain = client['domain']
-        client_name = client['name']
+    for client_domain, client_name in clients:
         
-        # If we have a name but no domain, try to find the domain
+        # If we have a name but no domain, use the domain resolved for it
         if client_name and not client_domain:
-            print(f"  Searching for domain of {client_name}...")
-            client_domain = search_company_domain(client_name)
+            client_domain = name_domains.get(client_name)
             if not client_domain:
-                print(f"  Could not find domain for {client_name}")
                 continue
-            print(f"  Found domain for {client_name}: {client_domain}")
-            time.sleep(0.1)  # Rate limiting for web search
         
-        print(f"  Processing client: {client_name or client_domain}")
-        time.sleep(0.1)  # Rate limiting for Clearbit
-        client_clearbit = get_company_info_by_domain(client_domain)
+        log(f"  Processing client: {client_name or client_domain}")
+        client_clearbit = company_info_cache.get(client_domain)
         
         if client_clearbit:
             client_info = client_clearbit
@@ -210,27 +289,124 @@ def process_company_relationships(row: pd.Series) -> List[Dict[str, Any]]:
     
     return relationships
 
-def process_vendor_data(csv_path: str) -> pd.DataFrame:
-    """Process vendor data from CSV file and create relationship records."""
-    # Read the CSV file
-    df = pd.read_csv(csv_path)
-    print(f"Read {len(df)} vendors from CSV")
+def resolve_lookups(
+    vendors: pd.DataFrame,
+    clients: pd.DataFrame,
+    name_domains: Dict[str, Optional[str]],
+    company_info_cache: Dict[str, Optional[Dict[str, Any]]],
+    checkpoint: Optional[Checkpoint] = None
+):
+    """Look up the names and domains of some vendor rows that are not known yet.
+
+    Answers are added to ``name_domains`` and ``company_info_cache``, and
+    the definitive ones recorded in ``checkpoint`` when given. Returns the
+    names and domains whose lookups failed (only tracked with a checkpoint).
+    """
+    report = get_report()
+    failed = set()
     
-    # Drop rows where client domains column is empty
-    df = df.dropna(subset=['Vendor clients domains'])
+    # Resolve each distinct name once, so their domains join the batch lookup
+    with report.stage('resolve_names'):
+        chunk_names = set(clients['client_name'].dropna())
+        names = sorted(chunk_names - set(name_domains))
+        print(f"Searching domains for {len(names)} companies without one...")
+        resolved = resolve_company_domains(names)
+        name_domains.update(resolved)
+        if checkpoint is not None:
+            recorded = definitive_answers('domain', resolved)
+            failed |= set(resolved) - set(recorded)
+            checkpoint.record_lookups('domain', recorded)
     
-    # Drop duplicates
-    df = df.drop_duplicates()
+    # Collect all unique domains (vendors and clients) not looked up yet
+    domains = set(vendors['Vendor Domain'].dropna()) | set(clients['client_domain'].dropna())
+    domains.update(name_domains[name] for name in chunk_names if name_domains[name])
+    domains = sorted(domains - set(company_info_cache))
     
-    # Process relationships and create new records
-    print("Fetching company information from Clearbit...")
-    all_relationships = []
-    for _, row in df.iterrows():
-        relationships = process_company_relationships(row)
-        all_relationships.extend(relationships)
+    with report.stage('enrich_domains'):
+        # Fetch company information for all domains on the thread pool
+        print("Fetching company information from Clearbit...")
+        deferred = DeferredRetryQueue()
+        found = fetch_company_info_batch(domains, deferred)
+        
+        # Final sweep over lookups Clearbit was still processing
+        if len(deferred):
+            print(f"Waiting for {len(deferred)} lookups Clearbit is still processing...")
+        found.update(deferred.drain(request_company_info, executor))
+        answers = {domain: found.get(domain) for domain in domains}
+        company_info_cache.update(answers)
+        if checkpoint is not None:
+            recorded = definitive_answers('info', answers)
+            failed |= set(answers) - set(recorded)
+            checkpoint.record_lookups('info', recorded)
+    return failed
+
+def process_vendor_data(csv_path: str, checkpoint: Optional[Checkpoint] = None) -> pd.DataFrame:
+    """Process vendor data from CSV file and create relationship records.
+
+    With a checkpoint, rows are enriched in chunks of CHECKPOINT_CHUNKSIZE;
+    each chunk's definitive lookups and finished rows are recorded as they
+    complete, and whatever an interrupted run already recorded is not done
+    again. Failed lookups, and rows built from them, are retried.
+    """
+    report = get_report()
+    
+    with report.stage('read'):
+        # Read the CSV file
+        df = pd.read_csv(csv_path)
+        print(f"Read {len(df)} vendors from CSV")
+        
+        # Drop rows where client domains column is empty
+        df = df.dropna(subset=['Vendor clients domains'])
+        
+        # Normalize vendor domains so variants of one domain share a lookup
+        df = df.assign(**{'Vendor Domain': normalize_domains(df['Vendor Domain'])})
+        
+        # Drop duplicates
+        df = df.drop_duplicates()
+    report.count('vendors', len(df))
+    
+    with report.stage('parse'):
+        # Rows finished by an earlier, interrupted run come from the checkpoint
+        row_keys = Checkpoint.row_keys(df) if checkpoint is not None else None
+        pending = df if checkpoint is None else df[~row_keys.isin(set(checkpoint.completed))]
+        
+        # Parse every client list in one vectorized pass
+        clients = explode_clients(df[CLIENTS_COLUMN])
+        client_lists = group_by_row(clients)
+    report.count('vendors_from_checkpoint', len(df) - len(pending))
+    report.count('client_entries', len(clients))
+    
+    # Lookups answered before an interrupted run stopped are not requested again
+    name_domains = dict(checkpoint.lookups['domain']) if checkpoint is not None else {}
+    company_info_cache = dict(checkpoint.lookups['info']) if checkpoint is not None else {}
+    
+    # With a checkpoint, rows are enriched a chunk at a time and recorded as
+    # each chunk completes; otherwise all rows share one batch of lookups
+    chunksize = CHECKPOINT_CHUNKSIZE if checkpoint is not None else max(len(pending), 1)
+    built = {}
+    failed = set()
+    for start in range(0, len(pending), chunksize):
+        chunk = pending.iloc[start:start + chunksize]
+        failed |= resolve_lookups(chunk, clients[clients.index.isin(chunk.index)], name_domains, company_info_cache, checkpoint)
+        
+        # Build relationship records from the resolved lookups
+        with report.stage('build'):
+            for index, row in chunk.iterrows():
+                row_clients = client_lists.get(index, [])
+                built[index] = process_company_relationships(row, row_clients, company_info_cache, name_domains)
+                # Rows missing a failed lookup are built again when resuming
+                if checkpoint is not None and failed.isdisjoint(row_lookups(row['Vendor Domain'], row_clients, name_domains)):
+                    checkpoint.record(row_keys[index], row['Vendor Name'], built[index])
+    print(f"Made {get_scheduler().requests} Clearbit requests")
     
-    # Create new DataFrame with relationship records
-    relationships_df = pd.DataFrame(all_relationships)
+    with report.stage('build'):
+        # Create new DataFrame with relationship records, in input order
+        relationships_df = pd.DataFrame([
+            relationship
+            for index in df.index
+            for relationship in (built[index] if index in built else checkpoint.get(row_keys[index]))
+        ])
+    report.count('relationships', len(relationships_df))
     
     return relationships_df
 
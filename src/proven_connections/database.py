@@ -1,8 +1,8 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from typing import List
-from .models import Base, Client, Vendor
+from typing import List, Optional, Dict, Any, Tuple
+from .models import Base, Client, Vendor, client_vendor_association
 
 class Database:
     def __init__(self, db_url: str = "sqlite:///./proven_connections.db"):
@@ -12,17 +12,50 @@ class Database:
     def create_tables(self):
         Base.metadata.create_all(bind=self.engine)
         
-    def get_client_vendors(self, client_id: int) -> List[Vendor]:
-        """Get all vendors associated with a specific client."""
+    def get_client_vendors(self, client_id: int, limit: int = 100, after: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Get one page of vendors for a client, ordered by vendor ID.
+
+        Returns the page and the cursor to pass as ``after`` for the next page
+        (None when this is the last page).
+        """
+        assoc = client_vendor_association
         with self.SessionLocal() as session:
-            client = session.query(Client).filter(Client.id == client_id).first()
-            return client.vendors if client else []
+            query = (
+                session.query(Vendor.id, Vendor.name, Vendor.email, Vendor.service_type)
+                .join(assoc, assoc.c.vendor_id == Vendor.id)
+                .filter(assoc.c.client_id == client_id)
+            )
+            if after is not None:
+                query = query.filter(assoc.c.vendor_id > after)
+            # Fetch one extra row to know whether another page exists
+            rows = query.order_by(assoc.c.vendor_id).limit(limit + 1).all()
+            return self._page(rows, limit)
             
-    def get_vendor_clients(self, vendor_id: int) -> List[Client]:
-        """Get all clients associated with a specific vendor."""
+    def get_vendor_clients(self, vendor_id: int, limit: int = 100, after: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Get one page of clients for a vendor, ordered by client ID.
+
+        Returns the page and the cursor to pass as ``after`` for the next page
+        (None when this is the last page).
+        """
+        assoc = client_vendor_association
         with self.SessionLocal() as session:
-            vendor = session.query(Vendor).filter(Vendor.id == vendor_id).first()
-            return vendor.clients if vendor else []
+            query = (
+                session.query(Client.id, Client.name, Client.email)
+                .join(assoc, assoc.c.client_id == Client.id)
+                .filter(assoc.c.vendor_id == vendor_id)
+            )
+            if after is not None:
+                query = query.filter(assoc.c.client_id > after)
+            # Fetch one extra row to know whether another page exists
+            rows = query.order_by(assoc.c.client_id).limit(limit + 1).all()
+            return self._page(rows, limit)
+
+    @staticmethod
+    def _page(rows: list, limit: int) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Split a limit+1 result into the page items and the next cursor."""
+        items = [dict(row._mapping) for row in rows[:limit]]
+        next_after = items[-1]['id'] if len(rows) > limit else None
+        return items, next_after
             
     def add_client_vendor_relationship(self, client_id: int, vendor_id: int) -> bool:
         """Add a relationship between a client and a vendor."""
@@ -0,0 +1,109 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from .config import DEFERRED_BASE_DELAY, DEFERRED_MAX_ATTEMPTS, DEFERRED_MAX_DELAY
+from .run_report import get_report, log
+
+# Returned by a fetch function when the provider is still processing the lookup
+PENDING = object()
+
+class DeferredRetryQueue:
+    """Lookups the provider has not answered yet (202 accepted, 429 rate limited), polled again later.
+
+    Each key is re-polled after an exponentially growing, jittered delay, so
+    the caller can carry on with other lookups meanwhile. Keys still pending
+    after ``max_attempts`` polls are given up. Values fetched successfully are
+    collected in ``resolved``.
+    """
+
+    def __init__(
+        self,
+        base_delay: float = DEFERRED_BASE_DELAY,
+        max_delay: float = DEFERRED_MAX_DELAY,
+        max_attempts: int = DEFERRED_MAX_ATTEMPTS,
+        jitter: float = 0.5
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.jitter = jitter
+        self.resolved: Dict[Hashable, Any] = {}
+        self.given_up: List[Hashable] = []
+        self._heap: List[Tuple[float, int, Hashable, int]] = []
+        self._queued = set()
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._queued
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before poll number ``attempt`` (0-based)."""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * random.uniform(1 - self.jitter, 1)
+
+    def push(self, key: Hashable, attempt: int = 0):
+        """Schedule ``key`` to be polled again; a key already queued is not added twice."""
+        if key in self._queued:
+            return
+        self._queued.add(key)
+        get_report().count('deferred_retries' if attempt else 'deferred')
+        heapq.heappush(self._heap, (time.monotonic() + self.delay(attempt), next(self._seq), key, attempt))
+
+    def next_due_in(self) -> float:
+        """Seconds until the earliest queued key is due (0 if one already is)."""
+        return max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else 0.0
+
+    def _pop_due(self) -> List[Tuple[Hashable, int]]:
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, attempt = heapq.heappop(self._heap)
+            self._queued.discard(key)
+            due.append((key, attempt))
+        return due
+
+    def _record(self, key: Hashable, attempt: int, value: Any):
+        if value is PENDING:
+            if attempt + 1 < self.max_attempts:
+                self.push(key, attempt + 1)
+            else:
+                log(f"Still pending after {self.max_attempts} polls, giving up on {key}")
+                get_report().count('deferred_given_up')
+                self.given_up.append(key)
+        elif value is not None:
+            self.resolved[key] = value
+
+    def poll(self, fetch: Callable[[Hashable], Any], pool: Optional[Executor] = None):
+        """Poll every key that is due now, without waiting for the others.
+
+        With ``pool``, keys that are due together are fetched on it concurrently.
+        """
+        due = self._pop_due()
+        values = pool.map(fetch, [key for key, _ in due]) if pool is not None else (fetch(key) for key, _ in due)
+        for (key, attempt), value in zip(due, values):
+            self._record(key, attempt, value)
+
+    def drain(self, fetch: Callable[[Hashable], Any], pool: Optional[Executor] = None) -> Dict[Hashable, Any]:
+        """Final sweep: keep polling until every queued key is resolved or given up."""
+        while self._heap:
+            time.sleep(self.next_due_in())
+            self.poll(fetch, pool)
+        return self.resolved
+
+    async def drain_async(self, fetch: Callable[[Hashable], Awaitable[Any]]) -> Dict[Hashable, Any]:
+        """Async final sweep; keys that fall due together are polled concurrently."""
+        while self._heap:
+            await asyncio.sleep(self.next_due_in())
+            due = self._pop_due()
+            values = await asyncio.gather(*(fetch(key) for key, _ in due))
+            for (key, attempt), value in zip(due, values):
+                self._record(key, attempt, value)
+        return self.resolved
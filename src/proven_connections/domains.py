@@ -0,0 +1,81 @@
+import re
+from functools import lru_cache
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import tldextract
+    # Use the suffix list bundled with the package; never fetch it at runtime
+    _extract = tldextract.TLDExtract(suffix_list_urls=())
+except ImportError:
+    _extract = None
+
+# Multi-label public suffixes used when tldextract is not installed
+FALLBACK_SUFFIXES = {
+    'ac.uk', 'co.uk', 'gov.uk', 'ltd.uk', 'me.uk', 'net.uk', 'nhs.uk', 'org.uk', 'plc.uk', 'sch.uk',
+    'com.au', 'edu.au', 'gov.au', 'net.au', 'org.au', 'co.nz', 'govt.nz', 'org.nz', 'co.za', 'org.za',
+    'co.jp', 'ne.jp', 'or.jp', 'co.kr', 'co.in', 'net.in', 'org.in', 'co.il', 'com.ar', 'com.br',
+    'com.cn', 'com.hk', 'com.mx', 'com.my', 'com.sg', 'com.tr', 'com.tw', 'gov.ie',
+}
+
+_IPV4 = re.compile(r'^\d{1,3}(\.\d{1,3}){3}$')
+# Lower-case ASCII host names, which normalize_domain only reduces to their registrable domain
+_PLAIN_HOST = re.compile(r'(?!www\.)[a-z0-9-]+(\.[a-z0-9-]+)+')
+
+@lru_cache(maxsize=65536)
+def registrable_domain(host: str) -> str:
+    """Reduce a host name to the domain registered under its public suffix."""
+    if _IPV4.match(host):
+        return host
+    if _extract is not None:
+        parts = _extract(host)
+        if parts.domain and parts.suffix:
+            return f'{parts.domain}.{parts.suffix}'
+        return host
+    labels = host.split('.')
+    suffix_len = 2 if len(labels) > 2 and '.'.join(labels[-2:]) in FALLBACK_SUFFIXES else 1
+    return '.'.join(labels[-(suffix_len + 1):])
+
+@lru_cache(maxsize=65536)
+def normalize_domain(value: Any) -> Optional[str]:
+    """Canonical form of a domain or URL, or None if it does not contain one.
+
+    Lower-cases, strips scheme, credentials, port, path and ``www.``,
+    IDNA-encodes international names and reduces the host to its
+    registrable domain, so ``https://WWW.Shop.Example.co.uk/about`` becomes
+    ``example.co.uk``.
+    """
+    if not isinstance(value, str):
+        return None
+    host = value.strip().lower()
+    if '://' in host:
+        host = host.split('://', 1)[1]
+    host = re.split(r'[/?#]', host, maxsplit=1)[0]
+    host = host.rsplit('@', 1)[-1].split(':', 1)[0].strip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    try:
+        host = host.encode('idna').decode('ascii')
+    except UnicodeError:
+        pass
+    if '.' not in host or any(c.isspace() for c in host):
+        return None
+    return registrable_domain(host)
+
+def normalize_domains(domains: pd.Series) -> pd.Series:
+    """Normalize a column of domains; values that cannot be normalized are kept as they are.
+
+    Each distinct value is normalized once, and plain host names skip the
+    URL parsing.
+    """
+    codes, uniques = pd.factorize(domains)
+    values = np.array([
+        registrable_domain(value) if isinstance(value, str) and _PLAIN_HOST.fullmatch(value)
+        else normalize_domain(value) or value
+        for value in uniques
+    ] + [None], dtype=object)
+    # Missing values (code -1) are kept as they are
+    result = np.where(codes >= 0, values[codes], domains.to_numpy(dtype=object))
+    return pd.Series(result, index=domains.index, dtype=object)
@@ -0,0 +1,95 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .config import ENRICHMENT_CACHE_PATH, ENRICHMENT_CACHE_TTL_DAYS, ENRICHMENT_NEGATIVE_TTL_DAYS
+
+DAY = 24 * 60 * 60
+
+class EnrichmentCache:
+    """Persistent SQLite cache for Clearbit lookups, shared by every processor.
+
+    Stores domain -> company info and name -> domain results. A lookup the
+    provider answered with "not found" is stored as a negative entry (value
+    None) with its own, shorter TTL, so it is not retried on every run.
+    Transient failures (errors, 202s, rate limits) are never cached.
+    """
+
+    def __init__(
+        self,
+        path: str = ENRICHMENT_CACHE_PATH,
+        ttl_days: float = ENRICHMENT_CACHE_TTL_DAYS,
+        negative_ttl_days: float = ENRICHMENT_NEGATIVE_TTL_DAYS
+    ):
+        self.path = path
+        self.ttl = ttl_days * DAY
+        self.negative_ttl = negative_ttl_days * DAY
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS company_info (domain TEXT PRIMARY KEY, info TEXT, fetched_at REAL NOT NULL)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS name_domain (name TEXT PRIMARY KEY, domain TEXT, fetched_at REAL NOT NULL)')
+
+    @staticmethod
+    def _domain_key(domain: str) -> str:
+        return domain.strip().lower()
+
+    @staticmethod
+    def _name_key(name: str) -> str:
+        return ' '.join(name.split()).lower()
+
+    def _get(self, table: str, key_column: str, value_column: str, key: str) -> Tuple[bool, Optional[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT {value_column}, fetched_at FROM {table} WHERE {key_column} = ?', (key,)
+            ).fetchone()
+        if row is not None:
+            value, fetched_at = row
+            ttl = self.ttl if value is not None else self.negative_ttl
+            if time.time() - fetched_at < ttl:
+                self.hits += 1
+                return True, value
+        self.misses += 1
+        return False, None
+
+    def _set(self, table: str, key_column: str, value_column: str, key: str, value: Optional[str]):
+        with self._lock:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO {table} ({key_column}, {value_column}, fetched_at) VALUES (?, ?, ?)',
+                (key, value, time.time())
+            )
+
+    def get_company_info(self, domain: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Return (hit, info) for a domain; info is None for a cached "not found"."""
+        hit, value = self._get('company_info', 'domain', 'info', self._domain_key(domain))
+        return hit, json.loads(value) if value is not None else None
+
+    def set_company_info(self, domain: str, info: Optional[Dict[str, Any]]):
+        """Store company info for a domain, or None to record that it was not found."""
+        self._set('company_info', 'domain', 'info', self._domain_key(domain), json.dumps(info) if info is not None else None)
+
+    def get_domain(self, name: str) -> Tuple[bool, Optional[str]]:
+        """Return (hit, domain) for a company name; domain is None for a cached "not found"."""
+        return self._get('name_domain', 'name', 'domain', self._name_key(name))
+
+    def set_domain(self, name: str, domain: Optional[str]):
+        """Store the domain found for a company name, or None if none was found."""
+        self._set('name_domain', 'name', 'domain', self._name_key(name), domain)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+_cache: Optional[EnrichmentCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> EnrichmentCache:
+    """Return the process-wide enrichment cache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EnrichmentCache()
+    return _cache
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from .config import INCREMENTAL_MANIFEST_PATH
+from .domains import normalize_domains
+from .run_report import get_report
+
+VENDOR_KEY = 'Vendor Domain'
+
+def read_vendor_input(csv_path: str) -> pd.DataFrame:
+    """Read a vendors CSV with the same filtering the processors apply."""
+    df = pd.read_csv(csv_path)
+    df = df.dropna(subset=['Vendor clients domains', VENDOR_KEY])
+    return df.drop_duplicates()
+
+def vendor_keys(df: pd.DataFrame) -> pd.Series:
+    """Normalized vendor domain of every input row, as the processors write it."""
+    return normalize_domains(df[VENDOR_KEY])
+
+def vendor_hashes(df: pd.DataFrame) -> Dict[str, str]:
+    """Content hash of every vendor's input rows, keyed by normalized vendor domain.
+
+    Spellings of the same domain (``www.acme.com``, ``acme.com``) share one
+    hash, since their relationships share one ``vendor_domain`` in the output.
+    """
+    row_hashes = pd.util.hash_pandas_object(df.astype(str), index=False).map('{:016x}'.format)
+    return {
+        domain: hashlib.sha1(''.join(sorted(hashes)).encode()).hexdigest()
+        for domain, hashes in row_hashes.groupby(vendor_keys(df).values)
+    }
+
+def load_manifest(path: str = INCREMENTAL_MANIFEST_PATH) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_manifest(input_path: str, output_path: str, hashes: Optional[Dict[str, str]] = None, path: str = INCREMENTAL_MANIFEST_PATH):
+    """Record which vendor rows produced ``output_path``, for the next incremental run."""
+    if hashes is None:
+        hashes = vendor_hashes(read_vendor_input(input_path))
+    manifest = {
+        'input': os.path.abspath(input_path),
+        'output': os.path.abspath(output_path),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'vendors': hashes
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def process_incremental(
+    csv_path: str,
+    output_path: str,
+    process: Callable[[str], pd.DataFrame],
+    manifest_path: str = INCREMENTAL_MANIFEST_PATH
+) -> pd.DataFrame:
+    """Re-enrich only vendors added or changed since the last run and merge them into its output.
+
+    Relationships of changed and removed vendors are dropped from the previous
+    output; those of added and changed vendors are processed afresh. Falls back
+    to a full run when there is no previous manifest or output. ``process``
+    enriches a vendors CSV into relationships. Writes the merged relationships
+    to ``output_path`` and a new manifest.
+    """
+    df = read_vendor_input(csv_path)
+    keys = vendor_keys(df)
+    hashes = vendor_hashes(df)
+    manifest = load_manifest(manifest_path)
+
+    if manifest is None or not os.path.exists(manifest['output']):
+        print("No previous run to compare against, processing all vendors")
+        previous = pd.DataFrame()
+        previous_hashes = {}
+    else:
+        previous = pd.read_csv(manifest['output'])
+        previous_hashes = manifest['vendors']
+
+    changed = {domain for domain, digest in hashes.items() if previous_hashes.get(domain) != digest}
+    removed = set(previous_hashes) - set(hashes)
+    # Manifests written before keys were normalized hold raw domains; every
+    # vendor whose output rows are dropped is re-enriched, so none goes missing
+    stale = set(normalize_domains(pd.Series(sorted(changed | removed), dtype=object)))
+    changed = stale & set(hashes)
+    print(f"Incremental run: {len(changed)} added or changed vendors, {len(stale - changed)} removed, "
+          f"{len(hashes) - len(changed)} unchanged")
+
+    if len(previous):
+        # Outputs written before domains were normalized hold raw vendor domains
+        previous = previous[~normalize_domains(previous['vendor_domain']).isin(stale)]
+
+    if changed:
+        # The processors take a CSV path, so hand them just the rows to re-enrich
+        with tempfile.TemporaryDirectory() as tmp:
+            changed_path = os.path.join(tmp, os.path.basename(csv_path))
+            df[keys.isin(changed)].to_csv(changed_path, index=False)
+            fresh = process(changed_path)
+        merged = pd.concat([previous, fresh], ignore_index=True)
+    else:
+        merged = previous.reset_index(drop=True)
+
+    with get_report().stage('write'):
+        merged.to_csv(output_path, index=False)
+    get_report().count('vendors_unchanged', len(hashes) - len(changed))
+    write_manifest(csv_path, output_path, hashes, manifest_path)
+    return merged
@@ -0,0 +1,197 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def percentiles(values: Sequence[float], qs: Iterable[float] = (50, 95, 99)) -> Dict[str, float]:
+    """Nearest-rank percentiles of a list of samples, keyed 'p50', 'p95', ..."""
+    ordered = sorted(values)
+    result = {}
+    for q in qs:
+        if not ordered:
+            result[f"p{q:g}"] = 0.0
+            continue
+        rank = math.ceil(q / 100 * len(ordered))
+        result[f"p{q:g}"] = ordered[max(0, min(len(ordered), rank) - 1)]
+    return result
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {v:g}" for k, v in items]
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._values.items())
+        lines = self.header()
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                bucket_labels = _labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """A minimal in-process metrics registry rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    'http_requests_total', 'HTTP requests by route and status code.', ('method', 'route', 'status'))
+LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route.', ('method', 'route'))
+IN_FLIGHT = registry.gauge(
+    'http_requests_in_flight', 'HTTP requests currently being served by route.', ('route',))
+STAGE_LATENCY = registry.histogram(
+    'search_stage_duration_seconds', 'Time spent in internal request stages (lookup, serialization).', ('stage',))
+
+@contextmanager
+def time_stage(stage: str):
+    """Record how long the enclosed block takes as an internal request stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+
+def match_route(routes: list, scope) -> str:
+    """Return the template of the route serving a request, or 'unmatched'."""
+    from starlette.routing import Match
+    for route in routes:
+        match, child_scope = route.matches(scope)
+        if match != Match.FULL:
+            continue
+        matched = child_scope.get('route', route)
+        path = getattr(matched, 'path', None)
+        if isinstance(path, str):
+            return path
+        # Included routers may carry no path of their own; look inside them
+        nested = getattr(matched, 'routes', None) or getattr(getattr(matched, 'original_router', None), 'routes', None)
+        return match_route(nested, scope) if nested else 'unmatched'
+    return 'unmatched'
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts, status codes,
+    latency and in-flight requests.
+
+    Requests are labelled with the matched route template (e.g.
+    ``/api/vendor/{vendor_name}/clients``) rather than the raw path, so
+    label cardinality stays bounded.
+    """
+
+    def __init__(self, app, routes: Optional[list] = None):
+        self.app = app
+        self.routes = routes if routes is not None else []
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        route = match_route(self.routes, scope)
+        method = scope['method']
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        IN_FLIGHT.inc(route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            LATENCY.observe(time.perf_counter() - start, method, route)
+            REQUESTS.inc(method, route, str(status['code']))
+            IN_FLIGHT.dec(route)
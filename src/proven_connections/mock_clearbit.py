@@ -0,0 +1,258 @@
+"""
+Local stand-in for the Clearbit APIs, for offline benchmarks and regression runs.
+
+In record mode every request is proxied to the real API and final answers
+(200 and 404) are appended to a JSON-lines cassette. In replay mode the
+cassette is served locally; unknown requests get 404, or a deterministic
+synthetic company with --synthesize. Replay can add latency and answer a
+fraction of requests with 202 (still processing) or 429 (rate limited).
+The injected behaviour is derived from a hash of the request and --seed,
+so it is the same on every run whatever the request order.
+
+    python -m proven_connections.mock_clearbit record --cassette data/clearbit.cassette.jsonl
+    python -m proven_connections.mock_clearbit replay --cassette data/clearbit.cassette.jsonl --latency-ms 80 --rate-202 0.1 --rate-429 0.02
+
+Point the processors at it with
+CLEARBIT_COMPANY_URL=http://127.0.0.1:8765 CLEARBIT_AUTOCOMPLETE_URL=http://127.0.0.1:8765.
+Counters are served at /__stats.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+SUGGEST_PATH = '/v1/companies/suggest'
+
+def request_key(path: str, query: str) -> str:
+    """Cassette key of a request: the path and its sorted query parameters."""
+    return f'{path}?{urlencode(sorted(parse_qsl(query)))}'
+
+def load_cassette(path: str) -> Dict[str, Tuple[int, Any]]:
+    """Read a cassette into ``key -> (status, body)``; later entries win."""
+    entries = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial last line from an interrupted recording
+                entries[entry['key']] = (entry['status'], entry['body'])
+    return entries
+
+def synthetic_response(path: str, query: str) -> Tuple[int, Any]:
+    """A deterministic made-up answer for requests the cassette doesn't cover."""
+    params = dict(parse_qsl(query))
+    if path == '/v2/companies/find' and 'domain' in params:
+        domain = params['domain']
+        digest = int(hashlib.sha1(domain.encode()).hexdigest()[:8], 16)
+        return 200, {
+            'name': domain.split('.')[0].replace('-', ' ').title(),
+            'domain': domain,
+            'logo': f'https://logo.clearbit.com/{domain}',
+            'geo': {'lat': round(digest % 18000 / 100 - 90, 4), 'lng': round(digest // 18000 % 36000 / 100 - 180, 4)}
+        }
+    name = params.get('name') or params.get('query')
+    if name:
+        domain = re.sub(r'[^a-z0-9]+', '', name.lower()) + '.com'
+        if path == SUGGEST_PATH:
+            return 200, [{'name': name, 'domain': domain, 'logo': f'https://logo.clearbit.com/{domain}'}]
+        return 200, {'name': name, 'domain': domain}
+    return 404, {'error': {'type': 'unknown_record'}}
+
+class MockClearbitServer(ThreadingHTTPServer):
+    """HTTP server holding the cassette, behaviour settings and counters."""
+
+    daemon_threads = True
+    request_queue_size = 128  # The default backlog of 5 stalls concurrent clients on SYN retries
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        cassette_path: str,
+        record: bool = False,
+        synthesize: bool = False,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_202: float = 0.0,
+        pending_polls: int = 1,
+        rate_429: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 0,
+        company_upstream: str = 'https://company.clearbit.com',
+        autocomplete_upstream: str = 'https://autocomplete.clearbit.com'
+    ):
+        super().__init__(address, MockClearbitHandler)
+        self.cassette_path = cassette_path
+        self.cassette = load_cassette(cassette_path)
+        self.record = record
+        self.synthesize = synthesize
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_202 = rate_202
+        self.pending_polls = pending_polls
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.seed = seed
+        self.company_upstream = company_upstream.rstrip('/')
+        self.autocomplete_upstream = autocomplete_upstream.rstrip('/')
+        self.attempts: Dict[str, int] = defaultdict(int)
+        self.statuses: Counter = Counter()
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def fraction(self, *parts: Any) -> float:
+        """Deterministic value in [0, 1) for a request and a purpose."""
+        digest = hashlib.sha1(':'.join(map(str, (self.seed, *parts))).encode()).hexdigest()
+        return int(digest[:8], 16) / 2 ** 32
+
+    def next_attempt(self, key: str) -> int:
+        with self._lock:
+            self.attempts[key] += 1
+            return self.attempts[key]
+
+    def count(self, status: int):
+        with self._lock:
+            self.statuses[status] += 1
+
+    def fetch_upstream(self, path: str, query: str, authorization: Optional[str]) -> Tuple[int, Any]:
+        """Proxy a request to the real API, appending final answers to the cassette."""
+        base = self.autocomplete_upstream if path == SUGGEST_PATH else self.company_upstream
+        headers = {'Authorization': authorization} if authorization else {}
+        response = self._session.get(f'{base}{path}', params=parse_qsl(query), headers=headers, timeout=30)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if response.status_code in (200, 404):
+            key = request_key(path, query)
+            line = json.dumps({'key': key, 'status': response.status_code, 'body': body})
+            with self._lock:
+                self.cassette[key] = (response.status_code, body)
+                with open(self.cassette_path, 'a') as f:
+                    f.write(line + '\n')
+        return response.status_code, body
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': sum(self.statuses.values()),
+                'statuses': {str(status): n for status, n in sorted(self.statuses.items())},
+                'distinct_requests': len(self.attempts),
+                'cassette_entries': len(self.cassette)
+            }
+
+class MockClearbitHandler(BaseHTTPRequestHandler):
+    server: MockClearbitServer
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/__stats':
+            self._send(200, self.server.stats())
+            return
+
+        server = self.server
+        key = request_key(url.path, url.query)
+        attempt = server.next_attempt(key)
+
+        if server.record:
+            try:
+                status, body = server.fetch_upstream(url.path, url.query, self.headers.get('Authorization'))
+            except requests.RequestException as e:
+                status, body = 502, {'error': {'type': 'upstream_error', 'message': str(e)}}
+            server.count(status)
+            self._send(status, body)
+            return
+
+        latency = server.latency_ms + server.jitter_ms * server.fraction(key, attempt, 'latency')
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+        if server.fraction(key, attempt, '429') < server.rate_429:
+            server.count(429)
+            self._send(429, {'error': {'type': 'rate_limit'}}, {'Retry-After': str(server.retry_after)})
+            return
+        if attempt <= server.pending_polls and server.fraction(key, '202') < server.rate_202:
+            server.count(202)
+            self._send(202, {})
+            return
+
+        if key in server.cassette:
+            status, body = server.cassette[key]
+        elif server.synthesize:
+            status, body = synthetic_response(url.path, url.query)
+        else:
+            status, body = 404, {'error': {'type': 'unknown_record'}}
+        server.count(status)
+        self._send(status, body)
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # One line per request would dominate benchmark output
+
+def start_mock_server(cassette_path: str, host: str = '127.0.0.1', port: int = 0, **options) -> MockClearbitServer:
+    """Start a mock server on a background thread (port 0 picks a free port); stop it with ``shutdown()``."""
+    server = MockClearbitServer((host, port), cassette_path, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('--cassette', required=True, help='JSON-lines file of recorded responses')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--synthesize', action='store_true', help='Answer requests missing from the cassette with synthetic companies')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Added to every replayed response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Up to this much extra latency per response')
+    parser.add_argument('--rate-202', type=float, default=0.0, help='Fraction of lookups answered 202 at first')
+    parser.add_argument('--pending-polls', type=int, default=1, help='Requests a 202 lookup takes before it resolves')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='Fraction of requests answered 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429')
+    parser.add_argument('--seed', type=int, default=0, help='Changes which requests get 202/429 and how much jitter')
+    parser.add_argument('--company-upstream', default='https://company.clearbit.com')
+    parser.add_argument('--autocomplete-upstream', default='https://autocomplete.clearbit.com')
+    args = parser.parse_args()
+
+    server = MockClearbitServer(
+        (args.host, args.port), args.cassette,
+        record=args.mode == 'record', synthesize=args.synthesize,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        rate_202=args.rate_202, pending_polls=args.pending_polls,
+        rate_429=args.rate_429, retry_after=args.retry_after, seed=args.seed,
+        company_upstream=args.company_upstream, autocomplete_upstream=args.autocomplete_upstream
+    )
+    print(f"Mock Clearbit ({args.mode}, {len(server.cassette)} cassette entries) on {server.base_url}")
+    print(f"Set CLEARBIT_COMPANY_URL={server.base_url} CLEARBIT_AUTOCOMPLETE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Table, ForeignKey
+from sqlalchemy import Column, Integer, String, Table, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -9,7 +9,11 @@ client_vendor_association = Table(
     'client_vendor_association',
     Base.metadata,
     Column('client_id', Integer, ForeignKey('clients.id')),
-    Column('vendor_id', Integer, ForeignKey('vendors.id'))
+    Column('vendor_id', Integer, ForeignKey('vendors.id')),
+    # Composite indexes back the keyset pagination in Database: each listing
+    # is an index range scan on (owner_id, related_id) starting after the cursor
+    Index('ix_client_vendor_client_id_vendor_id', 'client_id', 'vendor_id'),
+    Index('ix_client_vendor_vendor_id_client_id', 'vendor_id', 'client_id')
 )
 
 class Client(Base):
@@ -0,0 +1,53 @@
+from typing import Dict, Hashable, List, Union
+
+import numpy as np
+import pandas as pd
+
+from .domains import normalize_domains
+
+CLIENTS_COLUMN = 'Vendor clients domains'
+
+def split_clients(clients: pd.Series) -> pd.Series:
+    """Split comma-separated client lists into one stripped, non-empty entry per row.
+
+    The whole column is split in a single pass: the lists are joined and
+    split once, and each entry is mapped back to its row through the comma
+    counts. The result keeps the index of ``clients``, repeated once per
+    entry in list order.
+    """
+    values = clients.dropna().astype(str).tolist()
+    counts = np.fromiter((value.count(',') + 1 for value in values), dtype=np.int64, count=len(values))
+    entries = [entry.strip() for entry in ','.join(values).split(',')] if values else []
+    entries = pd.Series(entries, index=np.repeat(clients.dropna().index.to_numpy(), counts), dtype=object)
+    return entries[entries.to_numpy() != '']
+
+def explode_clients(clients: pd.Series) -> pd.DataFrame:
+    """Split client lists into one row per entry, classified as domain or name.
+
+    Entries that look like domains (contain a dot) are normalized into
+    ``client_domain``, the rest are company names in ``client_name``; the
+    other column is None.
+    """
+    entries = split_clients(clients)
+    is_domain = np.fromiter(('.' in entry for entry in entries.to_numpy()), dtype=bool, count=len(entries))
+    return pd.DataFrame({
+        'client_domain': normalize_domains(pd.Series(np.where(is_domain, entries.to_numpy(), None), index=entries.index, dtype=object)),
+        'client_name': pd.Series(np.where(is_domain, None, entries.to_numpy()), index=entries.index, dtype=object)
+    })
+
+def group_by_row(exploded: Union[pd.Series, pd.DataFrame]) -> Dict[Hashable, List]:
+    """Regroup an exploded table into per-input-row lists, keyed by the original index.
+
+    Series give lists of values, frames lists of row tuples. A row's entries
+    must be contiguous, as split_clients and explode_clients produce them.
+    Rows without entries are absent from the result.
+    """
+    if isinstance(exploded, pd.DataFrame):
+        values = list(zip(*(exploded[column].tolist() for column in exploded.columns)))
+    else:
+        values = exploded.tolist()
+    index = exploded.index.to_numpy()
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]]) if len(index) else np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(index)]
+    keys = index[starts].tolist()
+    return {key: values[start:end] for key, start, end in zip(keys, starts.tolist(), ends.tolist())}
@@ -0,0 +1,192 @@
+import contextvars
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from .config import ADMIN_TOKEN, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL, PROFILE_DIR, PROFILE_MAX_FILES
+
+_PROFILE_ID = re.compile(r'^[\w-]+$')
+
+# Finished profiles are written (and old ones pruned) off the event loop, one at a time
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='profile-writer')
+
+# The sampler of the request currently being profiled, if any
+_active_sampler: contextvars.ContextVar = contextvars.ContextVar('active_sampler', default=None)
+
+def is_admin(token: Optional[str]) -> bool:
+    """Check an admin token against ADMIN_TOKEN (always False when unset)."""
+    return bool(ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+class StackSampler:
+    """Periodically sample the call stacks of a set of threads.
+
+    Samples are aggregated as folded stacks ("frame;frame;frame count"), the
+    input format of flamegraph.pl, inferno and speedscope.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._threads: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def add_thread(self, thread_id: int):
+        with self._lock:
+            self._threads.add(thread_id)
+
+    def remove_thread(self, thread_id: int):
+        with self._lock:
+            self._threads.discard(thread_id)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label.replace(';', ':')
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads)
+            frames = sys._current_frames()
+            for thread_id in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    self.samples[';'.join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        """Write the collected samples as a folded-stack file."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp_path, path)
+
+def list_profile_files(profile_dir: str) -> list:
+    """Profile files in ``profile_dir``, oldest first."""
+    if not os.path.isdir(profile_dir):
+        return []
+    entries = [entry for entry in os.scandir(profile_dir) if entry.name.endswith('.folded')]
+    return [entry.name for entry in sorted(entries, key=lambda entry: (entry.stat().st_mtime_ns, entry.name))]
+
+def save_profile(sampler: StackSampler, profile_dir: str, profile_id: str, max_files: int = PROFILE_MAX_FILES):
+    """Stop ``sampler``, write its profile and delete the oldest beyond ``max_files``."""
+    sampler.stop()
+    os.makedirs(profile_dir, exist_ok=True)
+    sampler.write(os.path.join(profile_dir, f"{profile_id}.folded"))
+    names = list_profile_files(profile_dir)
+    for name in names[:max(0, len(names) - max_files)]:
+        try:
+            os.remove(os.path.join(profile_dir, name))
+        except FileNotFoundError:
+            pass
+
+def run_sampled(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call ``func``, sampling this thread too if the current request is being profiled."""
+    sampler = _active_sampler.get()
+    if sampler is None:
+        return func(*args, **kwargs)
+    thread_id = threading.get_ident()
+    sampler.add_thread(thread_id)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        sampler.remove_thread(thread_id)
+
+class ProfilingMiddleware:
+    """ASGI middleware capturing a stack profile of selected requests.
+
+    A request is profiled when it carries ``X-Profile: 1`` together with a
+    valid ``X-Admin-Token``, or when it is picked at random with probability
+    PROFILE_SAMPLE_RATE. The event loop thread is sampled for the request's
+    lifetime, along with any worker thread running its query work (see
+    workers.run_blocking); other requests interleaved on the event loop may
+    show up in the profile. The profile ID is returned in ``X-Profile-Id``.
+    Profiles are written off the event loop and only the newest
+    ``max_files`` are kept. Requests that are not profiled pay only the
+    header check.
+    """
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE, profile_dir: str = PROFILE_DIR,
+                 max_files: int = PROFILE_MAX_FILES):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.profile_dir = profile_dir
+        self.max_files = max_files
+
+    def _should_profile(self, scope) -> bool:
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        headers: Dict[bytes, bytes] = dict(scope.get('headers') or [])
+        if headers.get(b'x-profile') not in (b'1', b'true'):
+            return False
+        token = headers.get(b'x-admin-token')
+        return is_admin(token.decode('latin-1') if token is not None else None)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers', [])) + [(b'x-profile-id', profile_id.encode())]
+            await send(message)
+
+        sampler = StackSampler()
+        sampler.add_thread(threading.get_ident())
+        token = _active_sampler.set(sampler)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _active_sampler.reset(token)
+            _writer.submit(save_profile, sampler, self.profile_dir, profile_id, self.max_files)
+
+admin_router = APIRouter(prefix="/admin")
+
+def _require_admin(token: Optional[str]):
+    if not is_admin(token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@admin_router.get("/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """List captured request profiles, newest first."""
+    _require_admin(x_admin_token)
+    names = list_profile_files(PROFILE_DIR)[::-1]
+    return {"profiles": [name[:-len('.folded')] for name in names]}
+
+@admin_router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Download one profile as a folded-stack file for flamegraph tools."""
+    _require_admin(x_admin_token)
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+    if not _PROFILE_ID.match(profile_id) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
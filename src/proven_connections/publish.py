@@ -0,0 +1,164 @@
+"""
+Versioned, immutable publishing of the relationships dataset.
+
+Each publish writes ``<DATASETS_DIR>/<version>/relationships.parquet``
+(zstd-compressed) with a ``manifest.json`` of row counts and hashes. Both are
+written into a temporary directory that is renamed into place, and the
+``CURRENT`` pointer is then replaced atomically, so readers only ever see
+complete versions. Older versions stay on disk for rollback.
+
+    python -m proven_connections.publish data/vendor_client_relationships_11Mar2025.csv
+    python -m proven_connections.publish --list
+    python -m proven_connections.publish --set-current 20250311T120000Z-1a2b3c4d
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .config import DATASETS_DIR
+
+DATA_FILE = 'relationships.parquet'
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+def content_hash(df: pd.DataFrame) -> str:
+    """Hash of the dataset's rows, independent of the file encoding."""
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()
+    return hashlib.sha256(rows + json.dumps(list(df.columns)).encode()).hexdigest()
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _write_atomic(path: str, text: str):
+    """Replace ``path`` with ``text`` so readers see either the old or the new content."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)  # mkstemp files are private to the owner
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def current_version(datasets_dir: str = DATASETS_DIR) -> Optional[str]:
+    """Version the CURRENT pointer names, or None if nothing has been published."""
+    try:
+        with open(os.path.join(datasets_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def read_manifest(version: str, datasets_dir: str = DATASETS_DIR) -> Dict[str, Any]:
+    with open(os.path.join(datasets_dir, version, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+def dataset_path(version: Optional[str] = None, datasets_dir: str = DATASETS_DIR) -> Optional[str]:
+    """Parquet file of ``version`` (default: the current one), or None if there is none."""
+    version = version or current_version(datasets_dir)
+    if version is None:
+        return None
+    path = os.path.join(datasets_dir, version, DATA_FILE)
+    return path if os.path.exists(path) else None
+
+def list_versions(datasets_dir: str = DATASETS_DIR) -> List[Dict[str, Any]]:
+    """Manifests of every published version, oldest first."""
+    if not os.path.isdir(datasets_dir):
+        return []
+    versions = [
+        name for name in os.listdir(datasets_dir)
+        if not name.startswith('.') and os.path.exists(os.path.join(datasets_dir, name, MANIFEST_FILE))
+    ]
+    return [read_manifest(version, datasets_dir) for version in sorted(versions)]
+
+def set_current(version: str, datasets_dir: str = DATASETS_DIR):
+    """Point CURRENT at an existing version (e.g. to roll back)."""
+    if dataset_path(version, datasets_dir) is None:
+        raise ValueError(f"No published dataset version {version!r} in {datasets_dir}")
+    _write_atomic(os.path.join(datasets_dir, CURRENT_FILE), version + '\n')
+
+def publish_dataset(df: pd.DataFrame, source: str = '', datasets_dir: str = DATASETS_DIR) -> str:
+    """Publish ``df`` as a new immutable version and make it current; returns the version.
+
+    Publishing content identical to the current version only returns its name.
+    """
+    os.makedirs(datasets_dir, exist_ok=True)
+    digest = content_hash(df)
+    current = current_version(datasets_dir)
+    if current is not None and read_manifest(current, datasets_dir)['content_sha256'] == digest:
+        print(f"Dataset unchanged, current version stays {current}")
+        return current
+
+    version = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{digest[:8]}"
+    tmp_dir = tempfile.mkdtemp(dir=datasets_dir, prefix=f'.{version}.')
+    try:
+        data_file = os.path.join(tmp_dir, DATA_FILE)
+        df.to_parquet(data_file, index=False, compression='zstd')
+        manifest = {
+            'version': version,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'source': source,
+            'rows': len(df),
+            'vendors': int(df['vendor_name'].nunique()) if 'vendor_name' in df else None,
+            'clients': int(df['client_name'].nunique()) if 'client_name' in df else None,
+            'columns': list(df.columns),
+            'content_sha256': digest,
+            'files': {DATA_FILE: {'bytes': os.path.getsize(data_file), 'sha256': file_hash(data_file)}}
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+            f.write('\n')
+        os.chmod(tmp_dir, 0o755)  # mkdtemp directories are private to the owner
+        os.rename(tmp_dir, os.path.join(datasets_dir, version))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    set_current(version, datasets_dir)
+    print(f"Published dataset version {version} ({len(df)} rows)")
+    return version
+
+def load_dataset(version: Optional[str] = None, datasets_dir: str = DATASETS_DIR) -> pd.DataFrame:
+    """Read a published version (default: the current one)."""
+    path = dataset_path(version, datasets_dir)
+    if path is None:
+        raise FileNotFoundError(f"No published dataset in {datasets_dir}")
+    return pd.read_parquet(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', nargs='?', help='Relationships CSV to publish as a new version')
+    parser.add_argument('--datasets-dir', default=DATASETS_DIR)
+    parser.add_argument('--list', action='store_true', help='List published versions')
+    parser.add_argument('--set-current', metavar='VERSION', help='Point CURRENT at an existing version')
+    args = parser.parse_args()
+
+    if args.list:
+        current = current_version(args.datasets_dir)
+        for manifest in list_versions(args.datasets_dir):
+            marker = '*' if manifest['version'] == current else ' '
+            print(f"{marker} {manifest['version']}  {manifest['rows']} rows  {manifest['source']}")
+    elif args.set_current:
+        try:
+            set_current(args.set_current, args.datasets_dir)
+        except ValueError as e:
+            sys.exit(str(e))
+        print(f"Current dataset version is now {args.set_current}")
+    elif args.csv:
+        publish_dataset(pd.read_csv(args.csv), source=os.path.basename(args.csv), datasets_dir=args.datasets_dir)
+    else:
+        parser.error('give a CSV to publish, --list or --set-current')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import atexit
+import json
+import threading
+import time
+from collections import Counter
+from typing import Iterator, List, Optional
+from urllib.parse import parse_qs
+
+from .config import QUERY_LOG_PATH
+from .metrics import match_route
+
+# Only API traffic is worth replaying; static assets and admin calls are skipped
+LOGGED_PREFIX = '/api/'
+
+class QueryLog:
+    """Append-only log of query traces, one compact JSON array per line.
+
+    Each line is ``[timestamp, method, route, path, query_string, status,
+    duration_ms]``. Client addresses, headers and cookies are never written.
+    Lines are buffered and flushed at most once per ``flush_interval`` seconds.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._file = open(path, 'a', buffering=1 << 16)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        atexit.register(self.close)
+
+    def write(self, method: str, route: str, path: str, query: str, status: int, duration_ms: float):
+        line = json.dumps(
+            [round(time.time(), 3), method, route, path, query, status, round(duration_ms, 2)],
+            separators=(',', ':'), ensure_ascii=False
+        )
+        with self._lock:
+            self._file.write(line + '\n')
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self._file.flush()
+                self._last_flush = now
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+def read_traces(path: str) -> Iterator[List]:
+    """Yield the trace records of a query log, skipping any partial last line."""
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def popular_search_terms(path: str, top_n: int, route: str = '/api/search/companies') -> List[str]:
+    """Return the ``top_n`` most frequent search queries recorded in a query log."""
+    counts = Counter()
+    for record in read_traces(path):
+        if len(record) >= 5 and record[2] == route:
+            for q in parse_qs(record[4]).get('q', []):
+                counts[q] += 1
+    return [q for q, _ in counts.most_common(top_n)]
+
+class QueryLogMiddleware:
+    """ASGI middleware writing a trace of every API request to a QueryLog.
+
+    Enabled by setting QUERY_LOG_PATH; a no-op pass-through otherwise.
+    """
+
+    def __init__(self, app, routes: Optional[list] = None, path: Optional[str] = QUERY_LOG_PATH):
+        self.app = app
+        self.routes = routes if routes is not None else []
+        self.log = QueryLog(path) if path else None
+
+    async def __call__(self, scope, receive, send):
+        if self.log is None or scope['type'] != 'http' or not scope['path'].startswith(LOGGED_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.log.write(
+                scope['method'],
+                match_route(self.routes, scope),
+                scope['path'],
+                scope.get('query_string', b'').decode('latin-1'),
+                status['code'],
+                (time.perf_counter() - start) * 1000
+            )
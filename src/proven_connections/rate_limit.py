@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from .config import CLEARBIT_BURST, CLEARBIT_MAX_IN_FLIGHT, CLEARBIT_RATE_LIMIT
+
+class AsyncTokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding at most ``capacity``.
+
+    Waiters are served in arrival order, so a steady backlog is released at
+    exactly ``rate`` per second.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+class RequestScheduler:
+    """Admits outgoing API requests at the provider's quota.
+
+    A request needs a free slot (at most ``max_in_flight`` open at once) and a
+    token from the rate limiter. One scheduler is shared by every lookup of a
+    run so the whole workload proceeds at the maximum allowed rate.
+    """
+
+    def __init__(
+        self,
+        rate: float = CLEARBIT_RATE_LIMIT,
+        burst: int = CLEARBIT_BURST,
+        max_in_flight: int = CLEARBIT_MAX_IN_FLIGHT
+    ):
+        self.max_in_flight = max_in_flight
+        self.bucket = AsyncTokenBucket(rate, burst)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.requests = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold an in-flight slot for one request, waiting for a rate token first."""
+        async with self._slots:
+            await self.bucket.acquire()
+            self.requests += 1
+            yield
+
+class TokenBucket:
+    """Thread-safe counterpart of AsyncTokenBucket for the synchronous processors."""
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        # Sleeping under the lock queues the other threads behind this one
+        with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                time.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+class ThreadedRequestScheduler:
+    """RequestScheduler for requests made from worker threads."""
+
+    def __init__(
+        self,
+        rate: float = CLEARBIT_RATE_LIMIT,
+        burst: int = CLEARBIT_BURST,
+        max_in_flight: int = CLEARBIT_MAX_IN_FLIGHT
+    ):
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(rate, burst)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    @contextmanager
+    def slot(self):
+        """Hold an in-flight slot for one request, waiting for a rate token first."""
+        with self._slots:
+            self.bucket.acquire()
+            with self._lock:
+                self.requests += 1
+            yield
@@ -0,0 +1,142 @@
+"""
+Replay a captured query log against a running (or locally started) server.
+
+Requests are issued with their original relative timing divided by
+--speedup (0 replays as fast as possible), on up to --concurrency
+connections at once. Throughput and latency percentiles are reported
+overall and per route.
+
+    python -m proven_connections.replay queries.log --base-url http://127.0.0.1:8000 --speedup 10
+    python -m proven_connections.replay queries.log --serve proven_connections.app:app --concurrency 32
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+import requests
+
+from .metrics import percentiles
+from .querylog import read_traces
+
+_local = threading.local()
+
+def _session() -> requests.Session:
+    """One keep-alive session per replay thread."""
+    if not hasattr(_local, 'session'):
+        _local.session = requests.Session()
+    return _local.session
+
+def _send(base_url: str, record: List, timeout: float):
+    """Issue one traced request and return (route, latency_ms, ok)."""
+    _, method, route, path, query, _, _ = record[:7]
+    url = base_url + quote(path) + (f'?{query}' if query else '')
+    start = time.perf_counter()
+    try:
+        response = _session().request(method, url, timeout=timeout)
+        ok = response.status_code < 500
+    except requests.RequestException:
+        ok = False
+    return route, (time.perf_counter() - start) * 1000, ok
+
+def wait_for_server(base_url: str, timeout: float = 120.0, path: str = '/readyz'):
+    """Poll the readiness check until the server has loaded its data.
+
+    Raises RuntimeError if the server reports that loading failed and
+    TimeoutError after ``timeout`` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = requests.get(base_url + path, timeout=2)
+            if response.status_code == 200:
+                return
+            if response.status_code == 503 and response.json().get('status') == 'failed':
+                raise RuntimeError(f"Server at {base_url} failed to load: {response.json().get('error')}")
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server at {base_url} did not become ready")
+
+def replay(records: List[List], base_url: str, concurrency: int = 16, speedup: float = 1.0, timeout: float = 30.0) -> Dict:
+    """Replay trace records and return a throughput and latency summary."""
+    by_route = defaultdict(list)
+    errors = 0
+    lag = []
+    first_ts = records[0][0] if records else 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        for record in records:
+            if speedup > 0:
+                due = start + (record[0] - first_ts) / speedup
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    lag.append(-delay * 1000)
+            futures.append(pool.submit(_send, base_url, record, timeout))
+        for future in futures:
+            route, latency, ok = future.result()
+            by_route[route].append(latency)
+            errors += not ok
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [latency for latencies in by_route.values() for latency in latencies]
+    return {
+        'requests': len(all_latencies),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(all_latencies) / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {k: round(v, 2) for k, v in percentiles(all_latencies).items()},
+        'max_schedule_lag_ms': round(max(lag), 2) if lag else 0.0,
+        'routes': {
+            route: {'requests': len(latencies), **{k: round(v, 2) for k, v in percentiles(latencies).items()}}
+            for route, latencies in sorted(by_route.items())
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('trace', help='Query log written with QUERY_LOG_PATH')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--serve', metavar='APP', help='Start uvicorn with this app (e.g. proven_connections.app:app) for the replay')
+    parser.add_argument('--concurrency', type=int, default=16, help='Maximum requests in flight')
+    parser.add_argument('--speedup', type=float, default=1.0, help='Divide recorded gaps by this factor (0 = no pacing)')
+    parser.add_argument('--limit', type=int, help='Replay only the first N records')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    args = parser.parse_args()
+
+    records = list(islice(read_traces(args.trace), args.limit))
+    if not records:
+        sys.exit(f"No trace records in {args.trace}")
+
+    server: Optional[subprocess.Popen] = None
+    if args.serve:
+        port = args.base_url.rsplit(':', 1)[-1].strip('/')
+        env = dict(os.environ, QUERY_LOG_PATH='')  # Don't log the replayed traffic
+        server = subprocess.Popen([sys.executable, '-m', 'uvicorn', args.serve, '--port', port, '--log-level', 'warning'], env=env)
+    try:
+        try:
+            wait_for_server(args.base_url)
+        except (RuntimeError, TimeoutError) as e:
+            sys.exit(str(e))
+        print(f"Replaying {len(records)} requests against {args.base_url} "
+              f"(concurrency={args.concurrency}, speedup={args.speedup})", file=sys.stderr)
+        print(json.dumps(replay(records, args.base_url, args.concurrency, args.speedup, args.timeout), indent=2))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Structured report of one enrichment run.
+
+The processors time their stages (read, parse, name resolution, domain
+enrichment, relationship build, write, publish), count rows, lookups, deferred
+retries and HTTP statuses, and record the latency of every Clearbit
+request into the current report. ``as_dict`` summarizes it with latency
+percentiles for the JSON run report.
+
+Per-row progress goes through ``log``, which the report's quiet mode
+silences; summaries are still printed.
+"""
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from .enrichment_cache import get_cache
+from .metrics import percentiles
+
+STAGES = ['read', 'parse', 'resolve_names', 'enrich_domains', 'build', 'write', 'publish']
+
+class RunReport:
+    """Stage timings, counters and HTTP latencies collected during one run."""
+
+    def __init__(self, quiet: bool = False):
+        self.quiet = quiet
+        self.started_at = time.time()
+        self.stage_seconds: Dict[str, float] = defaultdict(float)
+        self.stage_calls: Counter = Counter()
+        self.counters: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.latencies_ms: Dict[str, List[float]] = defaultdict(list)
+        self._cache_start = get_cache().stats()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block; repeated stages (e.g. per chunk) accumulate."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stage_seconds[name] += time.perf_counter() - start
+                self.stage_calls[name] += 1
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def http(self, endpoint: str, status: int, latency_ms: float):
+        """Record one Clearbit response."""
+        with self._lock:
+            self.statuses[status] += 1
+            self.latencies_ms[endpoint].append(latency_ms)
+
+    def log(self, *args, **kwargs):
+        """Per-row progress output, suppressed in quiet mode."""
+        if not self.quiet:
+            print(*args, **kwargs)
+
+    def as_dict(self) -> Dict[str, Any]:
+        cache = get_cache().stats()
+        with self._lock:
+            all_latencies = [ms for latencies in self.latencies_ms.values() for ms in latencies]
+            ordered = [name for name in STAGES if name in self.stage_seconds]
+            ordered += sorted(set(self.stage_seconds) - set(ordered))
+            return {
+                'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+                'elapsed_s': round(time.perf_counter() - self._start, 3),
+                'stages': {
+                    name: {'seconds': round(self.stage_seconds[name], 3), 'calls': self.stage_calls[name]}
+                    for name in ordered
+                },
+                'counters': dict(sorted(self.counters.items())),
+                'cache': {key: cache[key] - self._cache_start[key] for key in ('hits', 'misses')},
+                'http': {
+                    'requests': len(all_latencies),
+                    'statuses': {str(status): n for status, n in sorted(self.statuses.items())},
+                    'latency_ms': {k: round(v, 2) for k, v in percentiles(all_latencies).items()},
+                    'endpoints': {
+                        endpoint: {'requests': len(latencies), **{k: round(v, 2) for k, v in percentiles(latencies).items()}}
+                        for endpoint, latencies in sorted(self.latencies_ms.items())
+                    }
+                }
+            }
+
+    def write(self, path: str):
+        """Write the report as JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+            f.write('\n')
+
+_report: Optional[RunReport] = None
+
+def start_report(quiet: bool = False) -> RunReport:
+    """Begin a new run report and make it the current one."""
+    global _report
+    _report = RunReport(quiet)
+    return _report
+
+def get_report() -> RunReport:
+    """Return the current run report, starting one if none was."""
+    return _report if _report is not None else start_report()
+
+def log(*args, **kwargs):
+    """Print per-row progress unless the current report is quiet."""
+    get_report().log(*args, **kwargs)
+
+def record_response(response, *args, **kwargs):
+    """``requests`` response hook recording the request into the current report."""
+    get_report().http(urlsplit(response.url).path, response.status_code, response.elapsed.total_seconds() * 1000)
+
+def trace_config():
+    """aiohttp trace config recording every request into the current report."""
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        context.start = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        get_report().http(params.url.path, params.response.status, (time.perf_counter() - context.start) * 1000)
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    return config
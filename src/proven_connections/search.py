@@ -1,14 +1,23 @@
 import pandas as pd
-from typing import List, Dict, Any
+import numpy as np
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Optional
 import os
 
 class RelationshipSearch:
-    def __init__(self, csv_path: str):
-        """Initialize the search with the relationship CSV data."""
-        self.df = pd.read_csv(csv_path)
+    def __init__(self, data_path: str, prefix_cache_max_len: int = 3):
+        """Initialize the search with the relationship data (a published Parquet dataset or a CSV).
+
+        Results for every query of up to ``prefix_cache_max_len`` characters
+        are precomputed (0 disables the prefix cache).
+        """
+        self.df = pd.read_parquet(data_path) if data_path.endswith('.parquet') else pd.read_csv(data_path)
         # Remove any NaN values and convert to list of strings
         self.vendors = sorted([str(x) for x in self.df['vendor_name'].dropna().unique()])
         self.clients = sorted([str(x) for x in self.df['client_name'].dropna().unique()])
+        self.prefix_cache_max_len = prefix_cache_max_len
+        self._build_entities()
+        self._build_prefix_cache()
         
     def search_vendors(self, query: str, limit: int = 10) -> List[str]:
         """Search for vendors containing the query string."""
@@ -115,62 +124,154 @@ class RelationshipSearch:
             vendors.append(vendor_data)
         return sorted(vendors, key=lambda x: x['name'])
 
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lower-case a query and drop spaces and punctuation, as search keys do."""
+        return query.lower().replace(' ', '').replace('-', '').replace('_', '').replace('.', '')
+
+    def _entity_table(self, kind: str) -> pd.DataFrame:
+        """One row per distinct (name, domain key) of a kind, from its first occurrence."""
+        names = self.df[f'{kind}_name']
+        domains = self.df[f'{kind}_domain']
+        table = pd.DataFrame({
+            'type': kind,
+            'name': names,
+            'domain': domains,
+            'logo': self.df[f'{kind}_logo'],
+            'latitude': self.df[f'{kind}_lat'],
+            'longitude': self.df[f'{kind}_lng'],
+            'row': np.arange(len(self.df)),
+            # Search in both name and domain, removing spaces and special characters
+            'name_key': names.str.lower().str.replace(' ', '').str.replace('-', '').str.replace('_', ''),
+            'domain_key': domains.str.lower()
+                .str.replace(r'\.com|\.org|\.net|\.co\.\w+|\.\w+$', '', regex=True)
+                .str.replace('.', '').str.replace('-', '').str.replace('_', '')
+        })
+        if kind == 'vendor':
+            table['proven_url'] = self.df['vendor_proven_url']
+        table = table[names.notna()]
+        # Rows sharing a name and domain key always match together, so the
+        # first of them stands for all
+        return table.drop_duplicates(['name', 'domain_key'])
+
+    def _build_entities(self):
+        """Build the entity table that search_all scans and the prefix cache indexes.
+
+        Entity IDs follow result order: name length, then vendors before
+        clients, then first appearance in the data. Any subset of IDs in
+        ascending order is therefore already correctly ranked.
+        """
+        vendors = self._entity_table('vendor')
+        clients = self._entity_table('client')
+        entities = pd.concat([vendors, clients], ignore_index=True)
+        entities['type_order'] = (entities['type'] == 'client').astype(int)
+        entities['name_len'] = entities['name'].astype(str).str.len()
+        entities = entities.sort_values(['name_len', 'type_order', 'row'], kind='mergesort').reset_index(drop=True)
+
+        self._name_keys = entities['name_key']
+        self._domain_keys = entities['domain_key']
+        # Entities of the same type and name collapse to one result
+        self._entity_group, _ = pd.factorize(entities['type'] + '\0' + entities['name'].astype(str))
+
+        self._entity_results = []
+        for row in entities.itertuples(index=False):
+            result = {
+                'name': row.name,
+                'domain': row.domain if pd.notna(row.domain) else None,
+                'logo': row.logo if pd.notna(row.logo) else None,
+                'latitude': float(row.latitude) if pd.notna(row.latitude) else None,
+                'longitude': float(row.longitude) if pd.notna(row.longitude) else None,
+                'type': row.type
+            }
+            if row.type == 'vendor':
+                result['proven_url'] = row.proven_url if pd.notna(row.proven_url) else None
+            self._entity_results.append(result)
+
+    def _dedupe(self, ids: np.ndarray) -> np.ndarray:
+        """Keep the best-ranked entity of each (type, name) among ascending IDs."""
+        _, first = np.unique(self._entity_group[ids], return_index=True)
+        return ids[np.sort(first)].astype(np.int32)
+
+    def _match_ids(self, search_term: str) -> np.ndarray:
+        """Scan the entity keys for a normalized term and return ranked entity IDs."""
+        mask = (
+            self._name_keys.str.contains(search_term, regex=False, na=False)
+            | self._domain_keys.str.contains(search_term, regex=False, na=False)
+        )
+        return self._dedupe(np.flatnonzero(mask.to_numpy()))
+
+    def _build_prefix_cache(self):
+        """Precompute result IDs for every query of up to prefix_cache_max_len characters.
+
+        A short term matches an entity exactly when it is one of the entity's
+        key substrings, so the results for all such terms come from a single
+        pass over the keys.
+        """
+        self._prefix_cache: Dict[str, np.ndarray] = {}
+        max_len = self.prefix_cache_max_len
+        if max_len <= 0:
+            return
+        postings = defaultdict(list)
+        for entity_id, keys in enumerate(zip(self._name_keys, self._domain_keys)):
+            grams = set()
+            for key in keys:
+                if not isinstance(key, str):
+                    continue
+                for size in range(1, max_len + 1):
+                    for start in range(len(key) - size + 1):
+                        grams.add(key[start:start + size])
+            for gram in grams:
+                postings[gram].append(entity_id)
+        for gram, ids in postings.items():
+            self._prefix_cache[gram] = self._dedupe(np.array(ids, dtype=np.int32))
+
+    def warm_prefixes(self, queries: Iterable[str]) -> int:
+        """Cache results for popular longer queries (e.g. from the query log).
+
+        Returns the number of queries added to the cache.
+        """
+        added = 0
+        for query in queries:
+            search_term = self.normalize_query(query)
+            if len(search_term) > self.prefix_cache_max_len and search_term not in self._prefix_cache:
+                self._prefix_cache[search_term] = self._match_ids(search_term)
+                added += 1
+        return added
+
+    def _cached_ids(self, search_term: str) -> Optional[np.ndarray]:
+        """Return cached result IDs for a normalized term, or None on a cache miss."""
+        ids = self._prefix_cache.get(search_term)
+        if ids is None and search_term and len(search_term) <= self.prefix_cache_max_len:
+            # Every substring this short is in the cache, so a miss means no matches
+            return np.empty(0, dtype=np.int32)
+        return ids
+
+    def cached_search(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Answer a search from the prefix cache only, or return None on a miss.
+
+        A query that normalizes to '' is a miss, so search_all answers it.
+        """
+        if not query:
+            return []
+        ids = self._cached_ids(self.normalize_query(query))
+        if ids is None:
+            return None
+        return [self._entity_results[i] for i in ids]
+
     def search_all(self, query: str) -> List[Dict[str, Any]]:
-        """Search for both vendors and clients with unified results."""
+        """Search for both vendors and clients with unified results.
+
+        Results are sorted by name length to prioritize shorter matches. The
+        returned dicts are shared with the cache and must not be modified.
+        The normalized query is matched as a literal substring, so characters
+        such as ``(`` or ``|`` have no regex meaning; a query of only spaces
+        and punctuation normalizes to '' and matches every entity.
+        """
         if not query:
             return []
 
-        # Search in both name and domain, removing spaces and special characters
-        search_term = query.lower().replace(' ', '').replace('-', '').replace('_', '').replace('.', '')
-        
-        # Search for vendors
-        vendor_name_mask = self.df['vendor_name'].str.lower().str.replace(' ', '').str.replace('-', '').str.replace('_', '').str.contains(search_term, na=False)
-        vendor_domains = self.df['vendor_domain'].str.lower()
-        vendor_domains = vendor_domains.str.replace(r'\.com|\.org|\.net|\.co\.\w+|\.\w+$', '', regex=True)
-        vendor_domains = vendor_domains.str.replace('.', '').str.replace('-', '').str.replace('_', '')
-        vendor_domain_mask = vendor_domains.str.contains(search_term, na=False)
-        vendor_mask = vendor_name_mask | vendor_domain_mask
-        vendor_details = self.df[vendor_mask].drop_duplicates('vendor_name')
-        
-        # Search for clients
-        client_name_mask = self.df['client_name'].str.lower().str.replace(' ', '').str.replace('-', '').str.replace('_', '').str.contains(search_term, na=False)
-        client_domains = self.df['client_domain'].str.lower()
-        client_domains = client_domains.str.replace(r'\.com|\.org|\.net|\.co\.\w+|\.\w+$', '', regex=True)
-        client_domains = client_domains.str.replace('.', '').str.replace('-', '').str.replace('_', '')
-        client_domain_mask = client_domains.str.contains(search_term, na=False)
-        client_mask = client_name_mask | client_domain_mask
-        client_details = self.df[client_mask].drop_duplicates('client_name')
-        
-        # Convert vendors to list of dicts
-        vendor_results = [
-            {
-                'name': row['vendor_name'],
-                'domain': row['vendor_domain'],
-                'logo': row['vendor_logo'],
-                'latitude': float(row['vendor_lat']) if pd.notna(row['vendor_lat']) else None,
-                'longitude': float(row['vendor_lng']) if pd.notna(row['vendor_lng']) else None,
-                'type': 'vendor',
-                'proven_url': row['vendor_proven_url'] if pd.notna(row['vendor_proven_url']) else None
-            }
-            for _, row in vendor_details.iterrows()
-            if pd.notna(row['vendor_name'])
-        ]
-        
-        # Convert clients to list of dicts
-        client_results = [
-            {
-                'name': row['client_name'],
-                'domain': row['client_domain'],
-                'logo': row['client_logo'],
-                'latitude': float(row['client_lat']) if pd.notna(row['client_lat']) else None,
-                'longitude': float(row['client_lng']) if pd.notna(row['client_lng']) else None,
-                'type': 'client'
-            }
-            for _, row in client_details.iterrows()
-            if pd.notna(row['client_name'])
-        ]
-        
-        # Combine and sort results by name length to prioritize shorter matches
-        all_results = vendor_results + client_results
-        all_results.sort(key=lambda x: len(x['name']))
-        return all_results
+        search_term = self.normalize_query(query)
+        ids = self._cached_ids(search_term)
+        if ids is None:
+            ids = self._match_ids(search_term)
+        return [self._entity_results[i] for i in ids]
@@ -0,0 +1,36 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one in-flight computation.
+
+    The first caller for a key starts the computation; callers arriving while
+    it is still running await the same result instead of recomputing it.
+    Results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.deduplicated = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the result of ``func()``, sharing it with concurrent calls for ``key``."""
+        task = self._calls.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.deduplicated += 1
+        # Shield so one caller disconnecting does not cancel the shared work
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """Counts of computations run and requests served by joining one."""
+        return {
+            "executed": self.executed,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._calls)
+        }
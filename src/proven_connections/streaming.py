@@ -0,0 +1,125 @@
+"""
+Streaming enrichment for vendor files too large to hold in memory.
+
+The input is read in chunks of vendor rows. Each chunk's client lists are
+exploded vectorially, its names and domains are looked up through the
+shared request scheduler, and its relationships are built with vectorized
+joins and appended to the output file. Memory use depends on the chunk
+size, not on the input size; lookups repeated across chunks are served by
+the persistent enrichment cache.
+"""
+import asyncio
+import itertools
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+import pandas as pd
+
+from .config import STREAM_CHUNKSIZE
+from .data_processor_async import (
+    create_session, fetch_company_info_batch, request_company_info_async, resolve_company_domains
+)
+from .deferred import DeferredRetryQueue
+from .domains import normalize_domains
+from .parsing import CLIENTS_COLUMN, explode_clients
+from .rate_limit import RequestScheduler
+from .run_report import get_report
+
+RELATIONSHIP_COLUMNS = [
+    'vendor_name', 'vendor_domain', 'vendor_proven_url', 'vendor_logo', 'vendor_lat', 'vendor_lng',
+    'client_name', 'client_domain', 'client_logo', 'client_lat', 'client_lng'
+]
+INFO_COLUMNS = ['name', 'logo', 'lat', 'lng']
+
+async def enrich_chunk(
+    chunk: pd.DataFrame,
+    clients: pd.DataFrame,
+    session: aiohttp.ClientSession,
+    scheduler: RequestScheduler
+) -> Tuple[pd.DataFrame, Dict[str, Optional[str]]]:
+    """Look up one chunk's names and domains; returns (domain-indexed info table, name -> domain)."""
+    report = get_report()
+    with report.stage('resolve_names'):
+        names = sorted(set(clients['client_name'].dropna()))
+        name_domains = await resolve_company_domains(names, session, scheduler)
+
+    with report.stage('enrich_domains'):
+        domains = set(chunk['Vendor Domain']) | set(clients['client_domain'].dropna())
+        domains.update(domain for domain in name_domains.values() if domain)
+        deferred = DeferredRetryQueue()
+        found = await fetch_company_info_batch(sorted(domains), session, scheduler, deferred)
+        found.update(await deferred.drain_async(lambda domain: request_company_info_async(session, scheduler, domain)))
+
+    info = pd.DataFrame.from_dict(found, orient='index').reindex(columns=INFO_COLUMNS)
+    return info, name_domains
+
+def build_relationships(
+    chunk: pd.DataFrame,
+    clients: pd.DataFrame,
+    info: pd.DataFrame,
+    name_domains: Dict[str, Optional[str]]
+) -> pd.DataFrame:
+    """Join vendor rows, exploded clients and looked-up info into relationship records."""
+    clients = clients.assign(client_domain=clients['client_domain'].fillna(clients['client_name'].map(name_domains)))
+    clients = clients.dropna(subset=['client_domain'])
+    # One position per relationship from here on
+    vendors = chunk.loc[clients.index].reset_index(drop=True)
+    clients = clients.reset_index(drop=True)
+    vendor_domains = vendors['Vendor Domain']
+    client_domains = clients['client_domain']
+    vendor_info = info.reindex(vendor_domains.values).reset_index(drop=True)
+    client_info = info.reindex(client_domains.values).reset_index(drop=True)
+
+    # Clients Clearbit doesn't know keep their listed name, or one derived from the domain
+    derived_names = client_domains.str.split('.').str[0].str.replace('-', ' ').str.title()
+    derived_names = derived_names.where(client_domains.str.contains('.', regex=False), client_domains)
+
+    return pd.DataFrame({
+        'vendor_name': vendor_info['name'].fillna(vendors['Vendor Name']),
+        'vendor_domain': vendor_domains,
+        'vendor_proven_url': vendors['Vendor Proven URL'] if 'Vendor Proven URL' in vendors else vendor_domains,
+        'vendor_logo': vendor_info['logo'],
+        'vendor_lat': vendor_info['lat'],
+        'vendor_lng': vendor_info['lng'],
+        'client_name': client_info['name'].fillna(clients['client_name'].fillna(derived_names)),
+        'client_domain': client_domains,
+        'client_logo': client_info['logo'],
+        'client_lat': client_info['lat'],
+        'client_lng': client_info['lng']
+    }, columns=RELATIONSHIP_COLUMNS)
+
+async def stream_vendor_data_async(csv_path: str, output_path: str, chunksize: int = STREAM_CHUNKSIZE) -> int:
+    """Enrich ``csv_path`` chunk by chunk, appending relationships to ``output_path``."""
+    pd.DataFrame(columns=RELATIONSHIP_COLUMNS).to_csv(output_path, index=False)
+    total = 0
+    report = get_report()
+    scheduler = RequestScheduler()
+    async with create_session(scheduler) as session:
+        with pd.read_csv(csv_path, chunksize=chunksize) as reader:
+            for number in itertools.count(1):
+                with report.stage('read'):
+                    chunk = next(reader, None)
+                    if chunk is None:
+                        break
+                    # Rows without a vendor domain or clients produce no relationships.
+                    # Duplicates are only dropped within a chunk, which keeps memory flat.
+                    chunk = chunk.dropna(subset=['Vendor Domain', CLIENTS_COLUMN]).drop_duplicates()
+                    chunk = chunk.assign(**{'Vendor Domain': normalize_domains(chunk['Vendor Domain'])})
+                with report.stage('parse'):
+                    clients = explode_clients(chunk[CLIENTS_COLUMN])
+                info, name_domains = await enrich_chunk(chunk, clients, session, scheduler)
+                with report.stage('build'):
+                    relationships = build_relationships(chunk, clients, info, name_domains)
+                with report.stage('write'):
+                    relationships.to_csv(output_path, mode='a', header=False, index=False)
+                total += len(relationships)
+                report.count('vendors', len(chunk))
+                report.count('client_entries', len(clients))
+                report.count('relationships', len(relationships))
+                print(f"Chunk {number}: {len(chunk)} vendors, {len(relationships)} relationships "
+                      f"({total} total, {scheduler.requests} Clearbit requests)")
+    return total
+
+def stream_vendor_data(csv_path: str, output_path: str, chunksize: int = STREAM_CHUNKSIZE) -> int:
+    """Synchronous entry point for stream_vendor_data_async; returns the number of relationships written."""
+    return asyncio.run(stream_vendor_data_async(csv_path, output_path, chunksize))
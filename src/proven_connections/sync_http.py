@@ -0,0 +1,59 @@
+"""
+Pooled, rate-limited Clearbit requests for the synchronous processors.
+
+Every request goes through one keep-alive ``requests.Session`` whose
+connection pool matches CLEARBIT_MAX_IN_FLIGHT, and is admitted by a
+ThreadedRequestScheduler with the same quota as the async path. Lookups
+run concurrently on ``executor``, so the sync processors get parallel
+throughput without aiohttp.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import CLEARBIT_MAX_IN_FLIGHT
+from .rate_limit import ThreadedRequestScheduler
+from .run_report import record_response
+
+# Lookups block on the network, so threads rather than processes
+executor = ThreadPoolExecutor(max_workers=CLEARBIT_MAX_IN_FLIGHT, thread_name_prefix='clearbit')
+
+_session: Optional[requests.Session] = None
+_scheduler: Optional[ThreadedRequestScheduler] = None
+_lock = threading.Lock()
+
+def create_session(max_connections: int = CLEARBIT_MAX_IN_FLIGHT) -> requests.Session:
+    """A keep-alive session pooling up to ``max_connections`` connections per host.
+
+    Every response is recorded in the current run report.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.hooks['response'].append(record_response)
+    return session
+
+def get_scheduler() -> ThreadedRequestScheduler:
+    """Return the process-wide scheduler for synchronous Clearbit requests."""
+    global _scheduler
+    with _lock:
+        if _scheduler is None:
+            _scheduler = ThreadedRequestScheduler()
+    return _scheduler
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = create_session()
+    return _session
+
+def clearbit_get(url: str, **kwargs) -> requests.Response:
+    """GET ``url`` on the pooled session once the scheduler admits it."""
+    with get_scheduler().slot():
+        return get_session().get(url, **kwargs)
@@ -0,0 +1,166 @@
+"""
+Generate synthetic vendor-client relationship datasets for benchmarking.
+
+Output uses the exact column layout of the processed relationships files
+(e.g. vendor_client_relationships_11Mar2025.csv). Rows are streamed to disk
+as they are generated, so memory use does not grow with the row count.
+
+    python -m proven_connections.synthetic_data --rows 10000000 --output data/synthetic_10m.csv.gz
+"""
+import argparse
+import csv
+import gzip
+import random
+import sys
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+COLUMNS = [
+    'vendor_name', 'vendor_domain', 'vendor_proven_url', 'vendor_logo', 'vendor_lat', 'vendor_lng',
+    'client_name', 'client_domain', 'client_logo', 'client_lat', 'client_lng'
+]
+
+ADJECTIVES = [
+    'Abbey', 'Acme', 'Allied', 'Apex', 'Atlantic', 'Atlas', 'Blue', 'Bright', 'Celtic', 'Central',
+    'Clear', 'Coastal', 'Crown', 'Delta', 'Eagle', 'Emerald', 'Evergreen', 'First', 'Global', 'Golden',
+    'Grand', 'Green', 'Harbour', 'Highland', 'Horizon', 'Iron', 'Island', 'Key', 'Liberty', 'Lime',
+    'Metro', 'Modern', 'National', 'Neptune', 'North', 'Nova', 'Oak', 'Omega', 'Orion', 'Pacific',
+    'Peak', 'Pioneer', 'Premier', 'Prime', 'Quantum', 'Rapid', 'Red', 'River', 'Royal', 'Silver',
+    'Smart', 'Solar', 'Southern', 'Star', 'Summit', 'Swift', 'Titan', 'Trinity', 'United', 'Vertex',
+]
+NOUNS = [
+    'Analytics', 'Bio', 'Builders', 'Capital', 'Care', 'Chemicals', 'Cloud', 'Consulting', 'Data', 'Design',
+    'Devices', 'Digital', 'Dynamics', 'Energy', 'Engineering', 'Foods', 'Freight', 'Furniture', 'Health', 'Homes',
+    'Industries', 'Insights', 'Labs', 'Logistics', 'Marine', 'Media', 'Medical', 'Motors', 'Networks', 'Pharma',
+    'Plastics', 'Power', 'Print', 'Retail', 'Robotics', 'Security', 'Software', 'Solutions', 'Systems', 'Telecom',
+    'Textiles', 'Tools', 'Trading', 'Travel', 'Ventures', 'Water', 'Wellness', 'Works',
+]
+SUFFIXES = ['', '', '', ' Ltd', ' Limited', ' Group', ' Inc', ' & Co', ' Holdings', ' International']
+PLACES = [
+    '', 'Dublin', 'Cork', 'Galway', 'Limerick', 'London', 'Manchester', 'Berlin', 'Paris', 'Madrid',
+    'Boston', 'Chicago', 'Toronto', 'Sydney', 'Munich', 'Amsterdam', 'Milan', 'Lyon', 'Leeds', 'Austin',
+]
+TLDS = ['.com', '.com', '.com', '.ie', '.ie', '.co.uk', '.de', '.net', '.org', '.io', '.com.au', '.fr']
+# (lat, lng) centres that located entities cluster around
+CITIES = [
+    (53.35, -6.26), (51.90, -8.47), (53.27, -9.05), (52.66, -8.63), (51.51, -0.13), (53.48, -2.24),
+    (52.52, 13.40), (48.86, 2.35), (40.42, -3.70), (42.36, -71.06), (41.88, -87.63), (43.65, -79.38),
+]
+
+NAME_SPACE = len(ADJECTIVES) * len(NOUNS) * len(PLACES)
+
+def _entity(kind: str, idx: int, seed: int, location_rate: float, logo_rate: float) -> Tuple:
+    """Deterministically derive (name, domain, logo, lat, lng) for one entity."""
+    rng = random.Random(f'{seed}:{kind}:{idx}')
+    slot = idx % NAME_SPACE
+    adjective = ADJECTIVES[slot % len(ADJECTIVES)]
+    noun = NOUNS[(slot // len(ADJECTIVES)) % len(NOUNS)]
+    place = PLACES[(slot // (len(ADJECTIVES) * len(NOUNS))) % len(PLACES)]
+    core = f"{adjective} {noun}" + (f" {place}" if place else '')
+    # Beyond NAME_SPACE entities, names repeat across distinct companies
+    name = core + rng.choice(SUFFIXES)
+    tld = rng.choice(TLDS)
+    slug = core.lower().replace(' ', rng.choice(['', '', '-']))
+    domain = slug + (str(idx // NAME_SPACE) if idx >= NAME_SPACE else '') + tld
+
+    roll = rng.random()
+    if roll < 0.02:
+        # The same company written as different domain strings
+        domain = 'www.' + domain
+    elif roll < 0.03:
+        domain = domain.upper()
+
+    logo = f'https://logo.clearbit.com/{domain.lower()}' if rng.random() < logo_rate else ''
+    if rng.random() < location_rate:
+        lat, lng = rng.choice(CITIES)
+        lat, lng = round(lat + rng.gauss(0, 0.3), 7), round(lng + rng.gauss(0, 0.3), 7)
+    else:
+        lat, lng = '', ''
+    return name, domain, logo, lat, lng
+
+def generate_rows(
+    rows: int,
+    clients: Optional[int] = None,
+    alpha: float = 1.5,
+    min_degree: int = 2,
+    max_degree: int = 5000,
+    client_skew: float = 2.5,
+    location_rate: float = 0.6,
+    logo_rate: float = 0.7,
+    seed: int = 42
+) -> Iterator[List]:
+    """Yield relationship rows until ``rows`` have been produced.
+
+    Vendor degrees follow a Pareto (power-law) distribution with shape
+    ``alpha``. Clients are drawn from a pool skewed towards low ranks, so
+    popular clients are shared by many vendors.
+    """
+    rng = random.Random(seed)
+    n_clients = clients or max(10, rows // 3)
+
+    vendor = lru_cache(maxsize=1024)(lambda idx: _entity('vendor', idx, seed, 0.85, logo_rate))
+    client = lru_cache(maxsize=200_000)(lambda idx: _entity('client', idx, seed, location_rate, logo_rate))
+
+    produced = 0
+    vendor_idx = 0
+    while produced < rows:
+        v_name, v_domain, v_logo, v_lat, v_lng = vendor(vendor_idx)
+        proven_url = f"https://directory.enterprise-ireland.com/vendor/{v_name.lower().replace(' ', '-').replace('&', 'and')}"
+        degree = min(max_degree, rows - produced, int(min_degree * rng.paretovariate(alpha)))
+        seen = set()
+        for _ in range(degree):
+            client_idx = int(n_clients * rng.random() ** client_skew)
+            if client_idx in seen:
+                continue
+            seen.add(client_idx)
+            c_name, c_domain, c_logo, c_lat, c_lng = client(client_idx)
+            yield [v_name, v_domain, proven_url, v_logo, v_lat, v_lng, c_name, c_domain, c_logo, c_lat, c_lng]
+            produced += 1
+        vendor_idx += 1
+
+def write_dataset(path: str, rows: int, **kwargs) -> int:
+    """Stream a synthetic dataset to ``path`` ('-' for stdout, '.gz' for gzip)."""
+    if path == '-':
+        out = sys.stdout
+    elif path.endswith('.gz'):
+        out = gzip.open(path, 'wt', newline='', compresslevel=5)
+    else:
+        out = open(path, 'w', newline='', buffering=1 << 20)
+    try:
+        writer = csv.writer(out)
+        writer.writerow(COLUMNS)
+        count = 0
+        batch = []
+        for row in generate_rows(rows, **kwargs):
+            batch.append(row)
+            if len(batch) >= 10_000:
+                writer.writerows(batch)
+                count += len(batch)
+                batch = []
+        writer.writerows(batch)
+        return count + len(batch)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, required=True, help='Number of relationship rows to generate')
+    parser.add_argument('--output', default='-', help="Output path ('-' for stdout, '.gz' to compress)")
+    parser.add_argument('--clients', type=int, help='Size of the client pool (default: rows / 3)')
+    parser.add_argument('--alpha', type=float, default=1.5, help='Pareto shape of vendor degrees')
+    parser.add_argument('--client-skew', type=float, default=2.5, help='Higher values share popular clients more')
+    parser.add_argument('--location-rate', type=float, default=0.6, help='Fraction of clients with coordinates')
+    parser.add_argument('--logo-rate', type=float, default=0.7, help='Fraction of entities with a logo')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    count = write_dataset(
+        args.output, args.rows, clients=args.clients, alpha=args.alpha, client_skew=args.client_skew,
+        location_rate=args.location_rate, logo_rate=args.logo_rate, seed=args.seed
+    )
+    if args.output != '-':
+        print(f"Wrote {count} relationships to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
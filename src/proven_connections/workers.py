@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .config import SEARCH_WORKERS, SEARCH_MAX_CONCURRENCY, SEARCH_TIMEOUT
+from .profiling import run_sampled
+
+# Query work runs on threads rather than processes so every worker shares the
+# in-memory index instead of holding its own copy
+_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix='search')
+_limiter: Optional[asyncio.Semaphore] = None
+# Slow work that is not a query (e.g. dataset diffs) gets a thread of its own
+_background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='background')
+
+def _get_limiter() -> asyncio.Semaphore:
+    """Create the admission semaphore lazily inside the running event loop."""
+    global _limiter
+    if _limiter is None:
+        _limiter = asyncio.Semaphore(SEARCH_MAX_CONCURRENCY)
+    return _limiter
+
+async def run_blocking(func: Callable[..., Any], *args: Any, timeout: Optional[float] = SEARCH_TIMEOUT, **kwargs: Any) -> Any:
+    """Run CPU-bound query work on the bounded search pool.
+
+    At most SEARCH_MAX_CONCURRENCY calls are admitted at once and the whole
+    call, including time spent waiting for a slot, is limited to ``timeout``
+    seconds. Raises asyncio.TimeoutError when the limit is exceeded. A call
+    that timed out keeps its slot until the worker thread has finished it,
+    so abandoned work cannot pile up behind the pool.
+    """
+    loop = asyncio.get_running_loop()
+    limiter = _get_limiter()
+    deadline = None if timeout is None else loop.time() + timeout
+    # Carry context variables (e.g. per-request state) into the worker thread
+    call = functools.partial(contextvars.copy_context().run, run_sampled, func, *args, **kwargs)
+
+    await asyncio.wait_for(limiter.acquire(), timeout)
+    try:
+        future = loop.run_in_executor(_executor, call)
+    except BaseException:
+        limiter.release()
+        raise
+
+    def _finished(done: asyncio.Future):
+        limiter.release()
+        if not done.cancelled():
+            done.exception()  # Retrieved here in case the caller timed out
+
+    future.add_done_callback(_finished)
+    remaining = None if deadline is None else max(0.0, deadline - loop.time())
+    # Shield the worker's future: cancelling it would report it done while the thread still runs
+    return await asyncio.wait_for(asyncio.shield(future), remaining)
+
+async def run_background(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run slow, non-query work on its own thread, outside the search pool and its limits.
+
+    Calls run one at a time, so a slow job only delays other background
+    jobs and never holds a search worker or admission slot.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, run_sampled, func, *args, **kwargs)
+    return await loop.run_in_executor(_background_executor, call)
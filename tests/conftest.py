@@ -0,0 +1,18 @@
+import pytest
+
+from proven_connections import enrichment_cache
+from proven_connections.deferred import DeferredRetryQueue
+from proven_connections.run_report import start_report
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A fresh enrichment cache in a temporary directory, used by get_cache()."""
+    fresh = enrichment_cache.EnrichmentCache(str(tmp_path / 'enrichment.sqlite'))
+    monkeypatch.setattr(enrichment_cache, '_cache', fresh)
+    start_report(quiet=True)
+    return fresh
+
+@pytest.fixture
+def no_retry_delay(monkeypatch):
+    """Deferred lookups are polled again immediately."""
+    monkeypatch.setattr(DeferredRetryQueue, 'delay', lambda self, attempt: 0.0)
@@ -0,0 +1,98 @@
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from proven_connections import app as server
+from proven_connections import publish
+from proven_connections.changes import compute_changes, summarize
+
+def relationships(*rows):
+    """Relationship rows from (vendor name, vendor domain, vendor logo, client name, client domain)."""
+    df = pd.DataFrame(rows, columns=['vendor_name', 'vendor_domain', 'vendor_logo', 'client_name', 'client_domain'])
+    return df.assign(vendor_lat=np.nan, vendor_lng=np.nan, client_logo=None, client_lat=np.nan, client_lng=np.nan)
+
+OLD = relationships(
+    ('Acme', 'acme.com', 'acme.png', 'Initech', 'initech.com'),
+    ('Acme', 'acme.com', 'acme.png', 'Umbrella', 'umbrella.com'),
+    ('Globex', 'globex.com', None, 'Initech', 'initech.com'),
+)
+
+def test_identical_versions_have_no_changes():
+    shuffled = OLD.iloc[::-1].reset_index(drop=True)
+    assert all(len(df) == 0 for df in compute_changes(OLD, shuffled).values())
+
+def test_domain_spellings_are_the_same_entity():
+    new = OLD.assign(vendor_domain=['https://www.Acme.com/', 'acme.com', 'globex.com'])
+    changes = compute_changes(OLD, new)
+    assert not len(changes['edges_added']) and not len(changes['edges_removed'])
+    assert not len(changes['entities_added']) and not len(changes['entity_changes'])
+    # The stored spelling itself did change on that row
+    assert changes['edges_changed']['fields'].tolist() == [['vendor_domain']]
+
+def test_added_and_removed_relationships_and_companies():
+    new = pd.concat([
+        OLD.iloc[:2],
+        relationships(('Hooli', 'hooli.com', None, 'Initech', 'initech.com')),
+    ], ignore_index=True)
+    changes = compute_changes(OLD, new)
+    assert changes['edges_added'][['vendor_name', 'client_name']].values.tolist() == [['Hooli', 'Initech']]
+    assert changes['edges_removed'][['vendor_name', 'client_name']].values.tolist() == [['Globex', 'Initech']]
+    assert changes['entities_added'].to_dict('records') == [{'kind': 'vendor', 'key': 'hooli.com', 'name': 'Hooli'}]
+    assert changes['entities_removed'].to_dict('records') == [{'kind': 'vendor', 'key': 'globex.com', 'name': 'Globex'}]
+
+def test_company_changes_on_any_of_its_rows_are_reported():
+    new = OLD.copy()
+    new.loc[1, 'vendor_logo'] = 'acme-2024.png'  # Acme's second row only
+    new.loc[2, 'vendor_name'] = 'Globex Corp'
+    changes = compute_changes(OLD, new)
+
+    assert changes['entity_changes'].to_dict('records') == [
+        {'kind': 'vendor', 'key': 'globex.com', 'field': 'name', 'old': 'Globex', 'new': 'Globex Corp'},
+        {'kind': 'vendor', 'key': 'acme.com', 'field': 'logo', 'old': 'acme.png', 'new': ['acme.png', 'acme-2024.png']},
+    ]
+    assert sorted(map(tuple, changes['edges_changed'][['vendor_key', 'client_key']].values)) == [
+        ('acme.com', 'umbrella.com'), ('globex.com', 'initech.com')
+    ]
+
+def test_companies_without_a_domain_are_matched_by_name():
+    old = relationships(('Acme', 'acme.com', None, 'Initech Ltd', None))
+    new = relationships(('Acme', 'acme.com', None, ' initech LTD', None))
+    changes = compute_changes(old, new)
+    assert not len(changes['edges_added']) and not len(changes['entities_added'])
+    assert changes['entity_changes'][['key', 'field']].values.tolist() == [['name:initech ltd', 'name']]
+
+def test_summary_is_json_ready():
+    new = OLD.assign(vendor_logo=[None, 'acme.png', None])
+    result = summarize(compute_changes(OLD, new), limit=1)
+    assert result['summary']['entity_changes'] == 1
+    assert result['changes']['entity_changes'][0]['new'] == [None, 'acme.png']
+    assert result['changes']['edges_changed'][0]['fields'] == ['vendor_logo']
+
+@pytest.fixture
+def served(monkeypatch):
+    """The API serving OLD's successor, with OLD published as version v1."""
+    new = OLD.assign(vendor_name=['Acme', 'Acme', 'Globex Corp'])
+    monkeypatch.setattr(server, 'search', types.SimpleNamespace(df=new))
+    monkeypatch.setattr(server, 'dataset_version', 'v2')
+    monkeypatch.setattr(server, 'changes_cache', {})
+    monkeypatch.setattr(publish, 'list_versions', lambda: [{'version': 'v1'}, {'version': 'v2'}])
+    monkeypatch.setattr(publish, 'load_dataset', lambda version: OLD)
+    return TestClient(server.app)
+
+def test_changes_endpoint(served):
+    response = served.get('/api/changes', params={'since': 'v1'})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body['from'], body['to']) == ('v1', 'v2')
+    assert body['summary']['entity_changes'] == 1
+    assert body['changes']['entity_changes'][0]['new'] == 'Globex Corp'
+
+def test_changes_since_an_unknown_version(served):
+    assert served.get('/api/changes', params={'since': 'v0'}).status_code == 404
+
+def test_changes_when_serving_the_fallback_csv(served, monkeypatch):
+    monkeypatch.setattr(server, 'dataset_version', None)
+    assert served.get('/api/changes', params={'since': 'v1'}).status_code == 409
@@ -0,0 +1,136 @@
+import itertools
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from proven_connections import data_processor_sync, enrichment_cache
+from proven_connections.checkpoint import Checkpoint, definitive_answers
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'run.checkpoint.jsonl')
+    checkpoint = Checkpoint(path)
+    checkpoint.record_lookups('domain', {'Initech': 'initech.com', 'Nowhere Ltd': None})
+    checkpoint.record_lookups('info', {'initech.com': {'name': 'Initech', 'lat': 1.5}})
+    checkpoint.record('row-1', 'Acme', [{'vendor_name': 'Acme', 'client_domain': 'initech.com'}])
+    checkpoint.close()
+    # An interrupted write leaves a partial last line
+    with open(path, 'a') as f:
+        f.write('{"key": "row-2", "vend')
+
+    resumed = Checkpoint(path, resume=True)
+    assert resumed.completed == {'row-1': [{'vendor_name': 'Acme', 'client_domain': 'initech.com'}]}
+    assert resumed.lookups == {
+        'domain': {'Initech': 'initech.com', 'Nowhere Ltd': None},
+        'info': {'initech.com': {'name': 'Initech', 'lat': 1.5}},
+    }
+    resumed.close()
+
+    # Without --resume the previous run's progress is discarded
+    fresh = Checkpoint(path)
+    assert not fresh.completed and not fresh.lookups['info']
+    fresh.remove()
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-run."""
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+class Clearbit:
+    """Knows every company; raises Crash on request number ``crash_at`` and answers 503 for ``failing`` keys."""
+
+    def __init__(self, crash_at=None, failing=()):
+        self.crash_at = crash_at
+        self.failing = set(failing)
+        self.calls = Counter()
+
+    def __call__(self, url, headers=None, params=None):
+        key = params['query'] if params else url.rsplit('domain=', 1)[1]
+        self.calls[key] += 1
+        if sum(self.calls.values()) == self.crash_at:
+            raise Crash()
+        if key in self.failing:
+            return FakeResponse(503)
+        if params:
+            return FakeResponse(200, [{'domain': key.lower().replace(' ', '') + '.com'}])
+        return FakeResponse(200, {'name': key.split('.')[0].title(), 'logo': f'https://logo/{key}', 'geo': {}})
+
+VENDORS = pd.DataFrame({
+    'Vendor Name': ['Acme', 'Globex', 'Hooli'],
+    'Vendor Domain': ['acme.com', 'globex.com', 'hooli.com'],
+    'Vendor clients domains': ['initech.com, Umbrella', 'acme.com, Stark Industries', 'initech.com, Wayne Corp'],
+})
+
+@pytest.fixture
+def vendors_csv(tmp_path, monkeypatch, cache):
+    monkeypatch.setattr(data_processor_sync, 'CLEARBIT_API_KEY', 'test-key')
+    monkeypatch.setattr(data_processor_sync, 'CHECKPOINT_CHUNKSIZE', 1)
+    path = tmp_path / 'vendors.csv'
+    VENDORS.to_csv(path, index=False)
+    return str(path)
+
+_runs = itertools.count()
+
+def run(monkeypatch, csv_path, clearbit, checkpoint):
+    """Process with an empty enrichment cache, so every lookup reaches ``clearbit`` or the checkpoint."""
+    path = f'{csv_path}.{next(_runs)}.sqlite'
+    monkeypatch.setattr(enrichment_cache, '_cache', enrichment_cache.EnrichmentCache(path))
+    monkeypatch.setattr(data_processor_sync, 'clearbit_get', clearbit)
+    return data_processor_sync.process_vendor_data(csv_path, checkpoint)
+
+def test_resume_reuses_lookups_and_rows_recorded_before_a_crash(tmp_path, monkeypatch, vendors_csv):
+    expected = run(monkeypatch, vendors_csv, Clearbit(), None)
+
+    path = str(tmp_path / 'run.checkpoint.jsonl')
+    interrupted = Checkpoint(path)
+    with pytest.raises(Crash):
+        # Request 6 is made during the second chunk's network phase
+        run(monkeypatch, vendors_csv, Clearbit(crash_at=6), interrupted)
+    interrupted.close()
+
+    checkpoint = Checkpoint(path, resume=True)
+    assert len(checkpoint.completed) == 1
+    assert checkpoint.lookups['domain'] == {'Umbrella': 'umbrella.com', 'Stark Industries': 'starkindustries.com'}
+    answered = set(checkpoint.lookups['domain']) | set(checkpoint.lookups['info'])
+    second = Clearbit()
+    resumed = run(monkeypatch, vendors_csv, second, checkpoint)
+    checkpoint.close()
+
+    pd.testing.assert_frame_equal(resumed, expected)
+    # Only lookups that had not been answered before the crash are requested again
+    assert {'Umbrella', 'Stark Industries', 'initech.com'} <= answered
+    assert not answered & set(second.calls)
+
+def test_resume_retries_lookups_that_failed_before_a_crash(tmp_path, monkeypatch, vendors_csv):
+    expected = run(monkeypatch, vendors_csv, Clearbit(), None)
+
+    path = str(tmp_path / 'run.checkpoint.jsonl')
+    interrupted = Checkpoint(path)
+    with pytest.raises(Crash):
+        # initech.com is down during the first chunk; the run dies in the second
+        run(monkeypatch, vendors_csv, Clearbit(crash_at=6, failing={'initech.com', 'Umbrella'}), interrupted)
+    interrupted.close()
+
+    checkpoint = Checkpoint(path, resume=True)
+    # Neither the failed lookups nor Acme's row, which was built without them, were kept
+    assert 'initech.com' not in checkpoint.lookups['info'] and 'Umbrella' not in checkpoint.lookups['domain']
+    assert 'acme.com' in checkpoint.lookups['info']
+    assert not checkpoint.completed
+    second = Clearbit()
+    resumed = run(monkeypatch, vendors_csv, second, checkpoint)
+    checkpoint.close()
+
+    assert second.calls['initech.com'] == 1 and second.calls['Umbrella'] == 1
+    assert 'acme.com' not in second.calls
+    pd.testing.assert_frame_equal(resumed, expected)
+
+def test_not_found_answers_are_kept(tmp_path, cache):
+    cache.set_company_info('gone.com', None)
+    answers = {'acme.com': {'name': 'Acme'}, 'gone.com': None, 'down.com': None}
+    assert definitive_answers('info', answers) == {'acme.com': {'name': 'Acme'}, 'gone.com': None}
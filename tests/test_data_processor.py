@@ -0,0 +1,21 @@
+import subprocess
+import sys
+
+import proven_connections
+from proven_connections import data_processor
+
+def test_falls_back_to_the_sync_processor_without_aiohttp(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'aiohttp', None)  # Makes "import aiohttp" raise ImportError
+    # Forget the async processor if another test has imported it
+    monkeypatch.delitem(sys.modules, 'proven_connections.data_processor_async', raising=False)
+    monkeypatch.delattr(proven_connections, 'data_processor_async', raising=False)
+    calls = []
+    monkeypatch.setattr(data_processor.sync, 'process_vendor_data', lambda path, checkpoint=None: calls.append(path) or 'sync')
+
+    assert data_processor.process_vendor_data('vendors.csv') == 'sync'
+    assert calls == ['vendors.csv']
+
+def test_imports_without_aiohttp():
+    code = "import sys; sys.modules['aiohttp'] = None; import proven_connections.data_processor"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,33 @@
+from proven_connections.deferred import PENDING, DeferredRetryQueue
+
+def test_delay_grows_exponentially_up_to_the_cap():
+    queue = DeferredRetryQueue(base_delay=1, max_delay=10, jitter=0)
+    assert [queue.delay(attempt) for attempt in range(6)] == [1, 2, 4, 8, 10, 10]
+
+def test_jitter_only_shortens_the_delay():
+    queue = DeferredRetryQueue(base_delay=4, max_delay=60, jitter=0.5)
+    delays = [queue.delay(0) for _ in range(200)]
+    assert all(2 <= delay <= 4 for delay in delays)
+    assert len(set(delays)) > 1
+
+def test_a_queued_key_is_not_added_twice(cache):
+    queue = DeferredRetryQueue()
+    queue.push('acme.com')
+    queue.push('acme.com')
+    assert len(queue) == 1 and 'acme.com' in queue
+
+def test_drain_polls_until_resolved(cache, no_retry_delay):
+    answers = {'acme.com': [PENDING, PENDING, 'Acme'], 'globex.com': [None]}
+    queue = DeferredRetryQueue()
+    for key in answers:
+        queue.push(key)
+    assert queue.drain(lambda key: answers[key].pop(0)) == {'acme.com': 'Acme'}
+    assert not queue.given_up and not len(queue)
+
+def test_keys_still_pending_are_given_up_after_max_attempts(cache, no_retry_delay):
+    polls = []
+    queue = DeferredRetryQueue(max_attempts=3)
+    queue.push('initech.com')
+    assert queue.drain(lambda key: polls.append(key) or PENDING) == {}
+    assert polls == ['initech.com'] * 3
+    assert queue.given_up == ['initech.com']
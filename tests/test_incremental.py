@@ -0,0 +1,89 @@
+import json
+
+import pandas as pd
+import pytest
+
+from proven_connections import incremental
+from proven_connections.domains import normalize_domains
+
+def write_vendors(path, rows):
+    pd.DataFrame(rows, columns=['Vendor Name', 'Vendor Domain', 'Vendor clients domains']).to_csv(path, index=False)
+
+class FakeProcessor:
+    """Turns each vendor row into one relationship per client, recording the rows it was given."""
+
+    def __init__(self):
+        self.processed = []
+
+    def __call__(self, csv_path):
+        df = pd.read_csv(csv_path)
+        self.processed.append(sorted(df['Vendor Name']))
+        return pd.DataFrame({
+            'vendor_name': df['Vendor Name'],
+            'vendor_domain': normalize_domains(df['Vendor Domain']),
+            'client_domain': df['Vendor clients domains'],
+        })
+
+@pytest.fixture
+def run(tmp_path, cache):
+    paths = {name: str(tmp_path / name) for name in ('vendors.csv', 'relationships.csv', 'manifest.json')}
+    processor = FakeProcessor()
+
+    def run(rows):
+        write_vendors(paths['vendors.csv'], rows)
+        merged = incremental.process_incremental(
+            paths['vendors.csv'], paths['relationships.csv'], processor, manifest_path=paths['manifest.json']
+        )
+        return merged.sort_values(['vendor_name', 'client_domain']).reset_index(drop=True)
+
+    run.processor = processor
+    run.paths = paths
+    return run
+
+ROWS = [
+    ['Acme', 'www.acme.com', 'a.com'],
+    ['Acme Group', 'acme.com', 'b.com'],
+    ['Globex', 'globex.com', 'c.com'],
+]
+
+def test_vendors_sharing_a_normalized_domain_are_re_enriched_together(run):
+    run(ROWS)
+    merged = run([ROWS[0], ['Acme Group', 'acme.com', 'd.com'], ROWS[2]])
+
+    # Only the changed domain is processed, with every row that normalizes to it
+    assert run.processor.processed[-1] == ['Acme', 'Acme Group']
+    assert merged[['vendor_name', 'client_domain']].values.tolist() == [
+        ['Acme', 'a.com'], ['Acme Group', 'd.com'], ['Globex', 'c.com']
+    ]
+
+def test_unchanged_input_is_not_processed_again(run):
+    first = run(ROWS)
+    assert run(ROWS).values.tolist() == first.values.tolist()
+    assert len(run.processor.processed) == 1
+
+def test_manifest_keyed_on_raw_domains_keeps_every_vendor(run):
+    run(ROWS)
+    manifest = json.load(open(run.paths['manifest.json']))
+    # As written before keys were normalized: the www. spelling has a key of its own
+    manifest['vendors']['www.acme.com'] = manifest['vendors']['acme.com']
+    json.dump(manifest, open(run.paths['manifest.json'], 'w'))
+
+    merged = run(ROWS)
+    assert run.processor.processed[-1] == ['Acme', 'Acme Group']
+    assert merged['vendor_name'].tolist() == ['Acme', 'Acme Group', 'Globex']
+
+def test_legacy_output_with_raw_domains_is_not_duplicated(run):
+    run(ROWS)
+    # As written before domains were normalized: output and manifest hold the www. spelling
+    output = pd.read_csv(run.paths['relationships.csv'])
+    output.loc[output['vendor_name'] == 'Acme', 'vendor_domain'] = 'www.acme.com'
+    output.to_csv(run.paths['relationships.csv'], index=False)
+    manifest = json.load(open(run.paths['manifest.json']))
+    manifest['vendors']['www.acme.com'] = manifest['vendors'].pop('acme.com')
+    json.dump(manifest, open(run.paths['manifest.json'], 'w'))
+
+    merged = run([['Acme', 'www.acme.com', 'e.com'], ROWS[1], ROWS[2]])
+    assert run.processor.processed[-1] == ['Acme', 'Acme Group']
+    assert merged[['vendor_name', 'client_domain']].values.tolist() == [
+        ['Acme', 'e.com'], ['Acme Group', 'b.com'], ['Globex', 'c.com']
+    ]
@@ -0,0 +1,53 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from proven_connections.metrics import Histogram, MetricsMiddleware, percentiles, registry
+
+def _metered_app():
+    app = FastAPI()
+
+    @app.get("/metered/{vendor_name}/clients")
+    async def clients(vendor_name: str):
+        return {"vendor": vendor_name}
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(registry.render())
+
+    app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+    return app
+
+def test_metrics_are_labelled_with_the_route_template():
+    client = TestClient(_metered_app())
+    client.get("/metered/Acme/clients")
+    client.get("/metered/Globex/clients")
+    client.get("/nowhere")
+    lines = client.get("/metrics").text.splitlines()
+
+    route = 'route="/metered/{vendor_name}/clients"'
+    assert f'http_requests_total{{method="GET",{route},status="200"}} 2' in lines
+    assert any(line.startswith('http_requests_total{method="GET",route="unmatched",status="404"}') for line in lines)
+    assert f'http_request_duration_seconds_bucket{{method="GET",{route},le="+Inf"}} 2' in lines
+    assert f'http_request_duration_seconds_count{{method="GET",{route}}} 2' in lines
+    assert f'http_requests_in_flight{{{route}}} 0' in lines
+    assert not any('Acme' in line for line in lines)
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram('latency_seconds', 'Latency.', ('stage',), buckets=(0.1, 1.0))
+    for value in [0.05, 0.1, 0.5, 2.0]:
+        histogram.observe(value, 'lookup')
+
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{stage="lookup",le="0.1"} 2',
+        'latency_seconds_bucket{stage="lookup",le="1"} 3',
+        'latency_seconds_bucket{stage="lookup",le="+Inf"} 4',
+        'latency_seconds_sum{stage="lookup"} 2.65',
+        'latency_seconds_count{stage="lookup"} 4',
+    ]
+
+def test_percentiles_use_the_nearest_rank():
+    values = list(range(100, 0, -1))  # 1..100, unsorted
+    assert percentiles(values) == {'p50': 50, 'p95': 95, 'p99': 99}
+    assert percentiles([3.0, 1.0, 2.0], qs=(0, 50, 100)) == {'p0': 1.0, 'p50': 2.0, 'p100': 3.0}
+    assert percentiles([]) == {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
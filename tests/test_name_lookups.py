@@ -0,0 +1,91 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from proven_connections import data_processor_async, data_processor_sync
+from proven_connections.rate_limit import RequestScheduler
+
+NAMES = ['Acme Foods', 'Globex Systems', 'Initech']
+DOMAINS = {'Acme Foods': 'acmefoods.com', 'Globex Systems': 'globexsystems.com', 'Initech': 'initech.com'}
+
+class FakeResponse:
+    def __init__(self, status, body=None):
+        self.status = self.status_code = status
+        self._body = body
+
+    def json(self):
+        return self._body
+
+class RateLimitedApi:
+    """Answers 429 to the first ``limited`` requests for each name, then the name's domain."""
+
+    def __init__(self, limited=1):
+        self.limited = limited
+        self.calls = Counter()
+
+    def answer(self, name):
+        self.calls[name] += 1
+        if self.calls[name] <= self.limited:
+            return FakeResponse(429)
+        return FakeResponse(200, DOMAINS[name])
+
+@pytest.fixture
+def api(monkeypatch, cache, no_retry_delay):
+    api = RateLimitedApi()
+
+    def clearbit_get(url, headers=None, params=None):
+        response = api.answer(params['query'])
+        if response.status == 200:
+            response._body = [{'name': params['query'], 'domain': response._body}]
+        return response
+
+    monkeypatch.setattr(data_processor_sync, 'clearbit_get', clearbit_get)
+    monkeypatch.setattr(data_processor_sync, 'CLEARBIT_API_KEY', 'test-key')
+    return api
+
+def test_sync_name_lookups_are_retried_after_429(api):
+    assert data_processor_sync.resolve_company_domains(NAMES) == DOMAINS
+    assert all(api.calls[name] == 2 for name in NAMES)
+
+def test_sync_single_name_lookup_is_retried_after_429(api):
+    assert data_processor_sync.search_company_domain('Initech') == 'initech.com'
+
+def test_sync_name_lookup_gives_up_after_max_attempts(api):
+    api.limited = 100
+    assert data_processor_sync.resolve_company_domains(['Initech']) == {'Initech': None}
+    # Not cached, so a later run asks again
+    assert api.calls['Initech'] > 1
+    assert data_processor_sync.get_cache().get_domain('Initech') == (False, None)
+
+class FakeSession:
+    def __init__(self, api):
+        self.api = api
+
+    def get(self, url, headers=None):
+        api = self.api
+
+        class Request:
+            async def __aenter__(self):
+                response = api.answer(url.split('name=', 1)[1])
+
+                async def json():
+                    return {'domain': response._body}
+
+                response.json = json
+                return response
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Request()
+
+def test_async_name_lookups_are_retried_after_429(cache, no_retry_delay):
+    api = RateLimitedApi()
+
+    async def resolve():
+        return await data_processor_async.resolve_company_domains(NAMES, FakeSession(api), RequestScheduler(rate=1000))
+
+    assert asyncio.run(resolve()) == DOMAINS
+    assert all(api.calls[name] == 2 for name in NAMES)
+    assert cache.get_domain('Globex Systems') == (True, 'globexsystems.com')
@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from proven_connections import api
+from proven_connections.database import Database
+from proven_connections.models import Client, Vendor
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A database with one client using vendors 1-5 and one vendor serving clients 1-3."""
+    db = Database(f"sqlite:///{tmp_path / 'connections.db'}")
+    db.create_tables()
+    with db.SessionLocal() as session:
+        session.add_all([Client(id=i, name=f'Client {i}', email=f'client{i}@example.com') for i in range(1, 4)])
+        session.add_all([
+            Vendor(id=i, name=f'Vendor {i}', email=f'vendor{i}@example.com', service_type='IT') for i in range(1, 6)
+        ])
+        session.commit()
+    # Inserted out of order: pages follow ids, not insertion order
+    for vendor_id in (4, 2, 5, 1, 3):
+        db.add_client_vendor_relationship(1, vendor_id)
+    for client_id in (3, 2):  # Client 1 already uses vendor 1
+        db.add_client_vendor_relationship(client_id, 1)
+    monkeypatch.setattr(api, 'db', db)
+    return db
+
+def test_pages_follow_the_cursor_until_the_last_one(db):
+    ids, after = [], None
+    pages = 0
+    while True:
+        items, after = db.get_client_vendors(1, limit=2, after=after)
+        ids.extend(item['id'] for item in items)
+        pages += 1
+        if after is None:
+            break
+    assert ids == [1, 2, 3, 4, 5]
+    assert pages == 3
+
+def test_a_full_last_page_has_no_next_cursor(db):
+    items, next_after = db.get_vendor_clients(1, limit=3)
+    assert [item['id'] for item in items] == [1, 2, 3]
+    assert next_after is None
+
+def test_next_after_is_the_last_id_of_the_page(db):
+    items, next_after = db.get_client_vendors(1, limit=2, after=2)
+    assert [item['id'] for item in items] == [3, 4]
+    assert next_after == 4
+
+def test_api_pages(db):
+    client = TestClient(api.app)
+    first = client.get('/clients/1/vendors', params={'limit': 3}).json()
+    assert [item['id'] for item in first['items']] == [1, 2, 3]
+    rest = client.get('/clients/1/vendors', params={'limit': 3, 'after': first['next_after']}).json()
+    assert rest == {'items': [
+        {'id': 4, 'name': 'Vendor 4', 'email': 'vendor4@example.com', 'service_type': 'IT'},
+        {'id': 5, 'name': 'Vendor 5', 'email': 'vendor5@example.com', 'service_type': 'IT'},
+    ], 'next_after': None}
+    # An empty page past the end is not a missing vendor
+    assert client.get('/vendors/1/clients', params={'after': 3}).json() == {'items': [], 'next_after': None}
+    assert client.get('/vendors/99/clients').status_code == 404
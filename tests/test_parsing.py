@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from proven_connections.parsing import explode_clients, group_by_row, split_clients
+
+CLIENTS = pd.Series(
+    ['acme.com, Initech ,www.Globex.com', None, ' , ,', 'Umbrella', 'https://shop.example.co.uk/about,Hooli'],
+    index=[10, 11, 12, 15, 20]
+)
+
+def test_split_keeps_the_row_index_and_drops_empty_entries():
+    entries = split_clients(CLIENTS)
+    assert entries.index.tolist() == [10, 10, 10, 15, 20, 20]
+    assert entries.tolist() == ['acme.com', 'Initech', 'www.Globex.com', 'Umbrella', 'https://shop.example.co.uk/about', 'Hooli']
+
+def test_split_matches_splitting_row_by_row():
+    rng = np.random.default_rng(0)
+    words = ['a.com', 'B Corp', '', ' c.io ', 'D']
+    clients = pd.Series([', '.join(rng.choice(words, rng.integers(1, 5))) for _ in range(200)])
+    expected = [
+        (index, entry.strip()) for index, value in clients.items() for entry in value.split(',') if entry.strip()
+    ]
+    entries = split_clients(clients)
+    assert list(zip(entries.index, entries)) == expected
+
+def test_explode_classifies_domains_and_names():
+    exploded = explode_clients(CLIENTS)
+    assert exploded['client_domain'].tolist() == ['acme.com', None, 'globex.com', None, 'example.co.uk', None]
+    assert exploded['client_name'].tolist() == [None, 'Initech', None, 'Umbrella', None, 'Hooli']
+
+def test_explode_empty_column():
+    exploded = explode_clients(pd.Series([None, ''], dtype=object))
+    assert list(exploded.columns) == ['client_domain', 'client_name'] and exploded.empty
+
+def test_group_by_row():
+    exploded = explode_clients(CLIENTS)
+    assert group_by_row(exploded) == {
+        10: [('acme.com', None), (None, 'Initech'), ('globex.com', None)],
+        15: [(None, 'Umbrella')],
+        20: [('example.co.uk', None), (None, 'Hooli')],
+    }
+    assert group_by_row(exploded['client_name']) == {10: [None, 'Initech', None], 15: ['Umbrella'], 20: [None, 'Hooli']}
+    assert group_by_row(exploded.iloc[:0]) == {}
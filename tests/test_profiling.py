@@ -0,0 +1,35 @@
+import os
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from proven_connections import profiling
+
+def _profiled_app(profile_dir, max_files):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(profiling.ProfilingMiddleware, sample_rate=1.0, profile_dir=str(profile_dir), max_files=max_files)
+    return app
+
+def test_sampled_requests_write_profiles_and_keep_only_the_newest(tmp_path):
+    client = TestClient(_profiled_app(tmp_path, max_files=3))
+    ids = [client.get("/ping").headers["x-profile-id"] for _ in range(5)]
+    profiling._writer.submit(lambda: None).result()  # Wait for queued writes
+
+    assert profiling.list_profile_files(str(tmp_path)) == [f"{i}.folded" for i in ids[-3:]]
+
+def test_save_profile_prunes_oldest_files(tmp_path):
+    for age, name in [(20, '20250101-000000-a'), (10, '20250102-000000-b')]:
+        path = tmp_path / f"{name}.folded"
+        path.write_text("main 1\n")
+        os.utime(path, (time.time() - age, time.time() - age))
+    sampler = profiling.StackSampler(interval=0.001)
+    sampler.start()
+    profiling.save_profile(sampler, str(tmp_path), '20250103-000000-c', max_files=2)
+
+    assert sorted(os.listdir(tmp_path)) == ['20250102-000000-b.folded', '20250103-000000-c.folded']
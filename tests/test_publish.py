@@ -0,0 +1,78 @@
+import os
+
+import pandas as pd
+import pytest
+
+from proven_connections import publish
+
+V1 = pd.DataFrame({'vendor_name': ['Acme', 'Acme'], 'client_name': ['Initech', 'Globex'], 'client_lat': [1.5, None]})
+V2 = pd.concat([V1, pd.DataFrame({'vendor_name': ['Hooli'], 'client_name': ['Initech'], 'client_lat': [2.0]})], ignore_index=True)
+
+def current_pointer(datasets_dir):
+    with open(os.path.join(datasets_dir, publish.CURRENT_FILE)) as f:
+        return f.read().strip()
+
+def test_publish_and_load(tmp_path):
+    version = publish.publish_dataset(V1, source='test', datasets_dir=str(tmp_path))
+    assert current_pointer(tmp_path) == version == publish.current_version(str(tmp_path))
+    pd.testing.assert_frame_equal(publish.load_dataset(datasets_dir=str(tmp_path)), V1)
+
+    manifest = publish.read_manifest(version, str(tmp_path))
+    assert (manifest['rows'], manifest['vendors'], manifest['clients']) == (2, 1, 2)
+    data_file = publish.dataset_path(version, str(tmp_path))
+    assert manifest['files'][publish.DATA_FILE]['sha256'] == publish.file_hash(data_file)
+
+def test_publishing_identical_data_keeps_the_current_version(tmp_path):
+    version = publish.publish_dataset(V1, datasets_dir=str(tmp_path))
+    assert publish.publish_dataset(V1.copy(), datasets_dir=str(tmp_path)) == version
+    assert len(publish.list_versions(str(tmp_path))) == 1
+
+def test_new_versions_become_current_and_old_ones_stay_for_rollback(tmp_path):
+    first = publish.publish_dataset(V1, datasets_dir=str(tmp_path))
+    second = publish.publish_dataset(V2, datasets_dir=str(tmp_path))
+    assert second != first and current_pointer(tmp_path) == second
+    assert [manifest['version'] for manifest in publish.list_versions(str(tmp_path))] == sorted([first, second])
+
+    publish.set_current(first, str(tmp_path))
+    assert current_pointer(tmp_path) == first
+    assert len(publish.load_dataset(datasets_dir=str(tmp_path))) == len(V1)
+    assert len(publish.load_dataset(second, str(tmp_path))) == len(V2)
+
+def test_set_current_to_an_unknown_version_changes_nothing(tmp_path):
+    version = publish.publish_dataset(V1, datasets_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        publish.set_current('20990101T000000Z-deadbeef', str(tmp_path))
+    assert current_pointer(tmp_path) == version
+
+def test_a_failed_publish_leaves_no_partial_version(tmp_path, monkeypatch):
+    version = publish.publish_dataset(V1, datasets_dir=str(tmp_path))
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', fail)
+    with pytest.raises(OSError):
+        publish.publish_dataset(V2, datasets_dir=str(tmp_path))
+    assert current_pointer(tmp_path) == version
+    assert sorted(os.listdir(tmp_path)) == sorted([publish.CURRENT_FILE, version])
+
+def test_nothing_published(tmp_path):
+    assert publish.current_version(str(tmp_path)) is None
+    assert publish.dataset_path(datasets_dir=str(tmp_path)) is None
+    assert publish.list_versions(str(tmp_path / 'missing')) == []
+    with pytest.raises(FileNotFoundError):
+        publish.load_dataset(datasets_dir=str(tmp_path))
+
+def test_the_current_pointer_is_swapped_atomically(tmp_path, monkeypatch):
+    first = publish.publish_dataset(V1, datasets_dir=str(tmp_path))
+    second = publish.publish_dataset(V2, datasets_dir=str(tmp_path))
+
+    def fail(src, dst):
+        raise OSError('rename failed')
+
+    # The new pointer is written aside and renamed over CURRENT; if that fails, CURRENT is untouched
+    monkeypatch.setattr(publish.os, 'replace', fail)
+    with pytest.raises(OSError):
+        publish.set_current(first, str(tmp_path))
+    assert current_pointer(tmp_path) == second
+    assert sorted(os.listdir(tmp_path)) == sorted([publish.CURRENT_FILE, first, second])
@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from proven_connections.rate_limit import AsyncTokenBucket, RequestScheduler
+
+def test_async_bucket_allows_a_burst_then_paces_at_the_rate():
+    async def acquire_all(bucket, n):
+        start = time.monotonic()
+        times = []
+        for _ in range(n):
+            await bucket.acquire()
+            times.append(time.monotonic() - start)
+        return times
+
+    times = asyncio.run(acquire_all(AsyncTokenBucket(rate=50, capacity=5), 15))
+    assert times[4] < 0.02  # The burst is served at once
+    assert 0.18 <= times[-1] < 0.35  # The other 10 at 50 per second
+
+def test_scheduler_limits_requests_in_flight():
+    async def run():
+        scheduler = RequestScheduler(rate=1000, burst=100, max_in_flight=3)
+        in_flight = peak = 0
+
+        async def request():
+            nonlocal in_flight, peak
+            async with scheduler.slot():
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+
+        await asyncio.gather(*(request() for _ in range(12)))
+        return scheduler.requests, peak
+
+    assert asyncio.run(run()) == (12, 3)
@@ -0,0 +1,63 @@
+import importlib.util
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from proven_connections import publish, replay
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def root_app(monkeypatch):
+    monkeypatch.chdir(ROOT)  # The root app mounts ./static
+    spec = importlib.util.spec_from_file_location('root_app', os.path.join(ROOT, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setattr(publish, 'dataset_path', lambda *args, **kwargs: None)
+    return module
+
+def test_root_app_reports_a_failed_load(root_app, tmp_path):
+    root_app.csv_path = str(tmp_path / 'missing.csv')
+    with pytest.raises(FileNotFoundError):
+        root_app.load_data()
+
+    response = TestClient(root_app.app).get('/readyz')
+    assert response.status_code == 503
+    assert response.json()['status'] == 'failed'
+    assert 'missing.csv' in response.json()['error']
+
+def test_root_app_is_ready_once_loaded(root_app, tmp_path):
+    root_app.csv_path = str(tmp_path / 'relationships.csv')
+    with open(root_app.csv_path, 'w') as f:
+        f.write('vendor_name,client_name\nAcme,Globex\n')
+    root_app.load_data()
+
+    response = TestClient(root_app.app).get('/readyz')
+    assert response.json() == {'status': 'ready', 'relationships': 1}
+
+class _Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+def test_wait_for_server_polls_readiness_until_loaded(monkeypatch):
+    answers = iter([_Response(503, {'status': 'loading'}), _Response(200, {'status': 'ready'})])
+    polled = []
+
+    def fake_get(url, timeout):
+        polled.append(url)
+        return next(answers)
+
+    monkeypatch.setattr(replay.requests, 'get', fake_get)
+    monkeypatch.setattr(replay.time, 'sleep', lambda seconds: None)
+    replay.wait_for_server('http://server')
+    assert polled == ['http://server/readyz', 'http://server/readyz']
+
+def test_wait_for_server_stops_when_loading_failed(monkeypatch):
+    monkeypatch.setattr(replay.requests, 'get', lambda url, timeout: _Response(503, {'status': 'failed', 'error': 'boom'}))
+    with pytest.raises(RuntimeError, match='boom'):
+        replay.wait_for_server('http://server')
@@ -0,0 +1,48 @@
+import pytest
+
+from proven_connections.search import RelationshipSearch
+
+COLUMNS = 'vendor_name,vendor_domain,vendor_proven_url,vendor_logo,vendor_lat,vendor_lng,client_name,client_domain,client_logo,client_lat,client_lng'
+ROWS = [
+    'Acme Consulting,acme.ie,https://example.org/acme,,53.3,-6.2,Globex (Ireland),globex.ie,,,',
+    'Acme Consulting,acme.ie,https://example.org/acme,,53.3,-6.2,Initech,initech.com,,52.1,-8.4',
+    'Blue|Sky Labs,bluesky.io,,,,,Globex (Ireland),globex.ie,,,',
+]
+
+@pytest.fixture(scope='module')
+def search(tmp_path_factory):
+    path = tmp_path_factory.mktemp('data') / 'relationships.csv'
+    path.write_text('\n'.join([COLUMNS] + ROWS) + '\n')
+    return RelationshipSearch(str(path), prefix_cache_max_len=3)
+
+def names(results):
+    return [result['name'] for result in results]
+
+def test_punctuation_only_query_matches_everything(search):
+    assert search.cached_search('. - _') is None
+    assert sorted(names(search.search_all('. - _'))) == ['Acme Consulting', 'Blue|Sky Labs', 'Globex (Ireland)', 'Initech']
+
+def test_empty_query_matches_nothing(search):
+    assert search.cached_search('') == []
+    assert search.search_all('') == []
+
+@pytest.mark.parametrize('query, expected', [
+    ('(ire', ['Globex (Ireland)']),
+    ('e|s', ['Blue|Sky Labs']),
+    ('c+', []),
+    ('^acme', []),
+])
+def test_regex_characters_match_literally(search, query, expected):
+    assert names(search.search_all(query)) == expected
+
+@pytest.mark.parametrize('query', ['a', 'ac', 'cme', 'glob', 'Initech', 'ireland', 'zz'])
+def test_prefix_cache_agrees_with_a_scan(search, query):
+    cached = search.cached_search(query)
+    term = search.normalize_query(query)
+    if len(term) <= 3:
+        assert cached is not None
+    if cached is not None:
+        assert cached == [search._entity_results[i] for i in search._match_ids(term)]
+
+def test_results_are_ranked_by_name_length(search):
+    assert names(search.search_all('e')) == ['Initech', 'Blue|Sky Labs', 'Acme Consulting', 'Globex (Ireland)']
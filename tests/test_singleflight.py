@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from proven_connections.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_computation():
+    async def scenario():
+        inflight = SingleFlight()
+        runs = 0
+
+        async def compute():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return {'runs': runs}
+
+        results = await asyncio.gather(*(inflight.do('acme.com', compute) for _ in range(10)))
+        assert runs == 1
+        assert all(result is results[0] for result in results)
+        assert inflight.stats() == {'executed': 1, 'deduplicated': 9, 'in_flight': 0}
+
+        # Once finished, the key is computed again
+        assert await inflight.do('acme.com', compute) == {'runs': 2}
+        assert inflight.stats()['executed'] == 2
+
+    asyncio.run(scenario())
+
+def test_concurrent_calls_share_one_failure():
+    async def scenario():
+        inflight = SingleFlight()
+        runs = 0
+
+        async def fail():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            raise ValueError('upstream down')
+
+        results = await asyncio.gather(*(inflight.do('acme.com', fail) for _ in range(5)), return_exceptions=True)
+        assert runs == 1
+        assert all(isinstance(result, ValueError) for result in results)
+        assert all(result is results[0] for result in results)
+        assert inflight.stats()['in_flight'] == 0
+
+        # A failure is not kept either: the next call runs again
+        with pytest.raises(ValueError):
+            await inflight.do('acme.com', fail)
+        assert runs == 2
+
+    asyncio.run(scenario())
+
+def test_different_keys_are_computed_separately():
+    async def scenario():
+        inflight = SingleFlight()
+
+        async def compute(key):
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(*(inflight.do(key, lambda key=key: compute(key)) for key in ['a', 'b', 'a']))
+        assert results == ['a', 'b', 'a']
+        assert inflight.stats() == {'executed': 2, 'deduplicated': 1, 'in_flight': 0}
+
+    asyncio.run(scenario())
@@ -0,0 +1,57 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from proven_connections import data_processor_sync
+from proven_connections.update_company_info import update_company_info
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+@pytest.fixture
+def clearbit(monkeypatch, cache, no_retry_delay):
+    """Clearbit answering 202, then 429, then the company for every domain, and 429 once per name search."""
+    calls = Counter()
+
+    def clearbit_get(url, headers=None, params=None):
+        key = params['query'] if params else url.rsplit('domain=', 1)[1]
+        calls[key] += 1
+        if params:
+            return FakeResponse(429) if calls[key] == 1 else FakeResponse(200, [{'domain': 'initech.com'}])
+        if calls[key] <= 2:
+            return FakeResponse(202 if calls[key] == 1 else 429)
+        return FakeResponse(200, {'name': key, 'logo': f'https://logo/{key}', 'geo': {'lat': 1.0, 'lng': 2.0}})
+
+    monkeypatch.setattr(data_processor_sync, 'clearbit_get', clearbit_get)
+    monkeypatch.setattr(data_processor_sync, 'CLEARBIT_API_KEY', 'test-key')
+    return calls
+
+def test_pending_and_rate_limited_lookups_are_retried(clearbit):
+    df = pd.DataFrame({
+        'vendor_name': ['Acme', 'Acme'],
+        'vendor_domain': ['acme.com', 'www.acme.com'],
+        'vendor_logo': [None, None],
+        'vendor_lat': [np.nan, np.nan],
+        'vendor_lng': [np.nan, np.nan],
+        'client_name': ['Initech', 'Globex'],
+        'client_domain': [None, 'globex.com'],
+        'client_logo': [None, 'https://logo/globex'],
+        'client_lat': [5.0, 5.0],
+        'client_lng': [6.0, 6.0],
+    })
+    updated = update_company_info(df)
+
+    assert updated['vendor_logo'].tolist() == ['https://logo/acme.com'] * 2
+    assert updated['client_domain'].tolist() == ['initech.com', 'globex.com']
+    assert updated['client_logo'].tolist() == ['https://logo/initech.com', 'https://logo/globex']
+    assert updated['client_lat'].tolist() == [5.0, 5.0]
+    # One lookup per normalized domain: 202, 429, then the answer
+    assert clearbit['acme.com'] == 3 and clearbit['Initech'] == 2
+    assert 'globex.com' not in clearbit
@@ -0,0 +1,29 @@
+import asyncio
+import time
+
+import pytest
+
+from proven_connections import workers
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_finishes(monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(workers, '_limiter', asyncio.Semaphore(1))
+        with pytest.raises(asyncio.TimeoutError):
+            await workers.run_blocking(time.sleep, 0.3, timeout=0.05)
+        assert workers._limiter.locked()
+        await asyncio.sleep(0.4)
+        assert not workers._limiter.locked()
+
+    asyncio.run(scenario())
+
+def test_waiting_for_a_slot_counts_towards_the_timeout(monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(workers, '_limiter', asyncio.Semaphore(1))
+        slow = asyncio.ensure_future(workers.run_blocking(time.sleep, 0.3, timeout=None))
+        await asyncio.sleep(0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await workers.run_blocking(lambda: 'fast', timeout=0.1)
+        await slow
+        assert await workers.run_blocking(lambda: 'fast', timeout=0.1) == 'fast'
+
+    asyncio.run(scenario())